@@ -26,7 +26,7 @@ setup(
     author_email = '$author@gmail',
     url          = base_url,
     download_url = base_url+'/tarball/master',
-    packages     = ['spock'],
+    packages     = ['spock', 'spock.sat'],
     keywords     = ['logic', 'spock'],
     entry_points = {
         'console_scripts': \
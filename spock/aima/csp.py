@@ -10,6 +10,7 @@
          now be imported from the collections module.
       3) move the Zebra puzzle outside of this code and into unittest suite
          (see spock.tests.test_constraints.TestAIMA for more information)
+      4) backtracking_search takes a budget (see spock.budget)
 
     Original file's comments follow:
       CSP (Constraint Satisfaction Problems) problems and solvers. (Chapter 5).
@@ -146,12 +147,15 @@ class CSP(search.Problem):
 #______________________________________________________________________________
 # CSP Backtracking Search
 
-def backtracking_search(csp, mcv=False, lcv=False, fc=False, mac=False):
+def backtracking_search(csp, mcv=False, lcv=False, fc=False, mac=False,
+                        budget=None):
     """Set up to do recursive backtracking search. Allow the following options:
     mcv - If true, use Most Constrained Variable Heuristic
     lcv - If true, use Least Constraining Value Heuristic
     fc  - If true, use Forward Checking
     mac - If true, use Maintaining Arc Consistency.              [Fig. 5.3]
+    budget - A spock.budget.Budget, charged a node per recursive call and
+             an inference per value tried; BudgetExceeded ends the search.
     >>> backtracking_search(australia)
     {'WA': 'B', 'Q': 'B', 'T': 'B', 'V': 'B', 'SA': 'G', 'NT': 'R', 'NSW': 'R'}
     """
@@ -160,16 +164,20 @@ def backtracking_search(csp, mcv=False, lcv=False, fc=False, mac=False):
         for v in csp.vars:
             csp.curr_domains[v] = csp.domains[v][:]
             csp.pruned[v] = []
-    update(csp, mcv=mcv, lcv=lcv, fc=fc, mac=mac)
+    update(csp, mcv=mcv, lcv=lcv, fc=fc, mac=mac, budget=budget)
     return recursive_backtracking({}, csp)
 
 def recursive_backtracking(assignment, csp):
     """Search for a consistent assignment for the csp.
     Each recursive call chooses a variable, and considers values for it."""
+    if csp.budget is not None:
+        csp.budget.spend('nodes')
     if len(assignment) == len(csp.vars):
         return assignment
     var = select_unassigned_variable(assignment, csp)
     for val in order_domain_values(var, assignment, csp):
+        if csp.budget is not None:
+            csp.budget.spend('inferences')
         if csp.fc or csp.nconflicts(var, val, assignment) == 0:
             csp.assign(var, val, assignment)
             result = recursive_backtracking(assignment, csp)
@@ -8,6 +8,38 @@
       3) implemented the rest of WalkSAT,
       4) removed crufty symbolic algebra because it's not
          logic and the implementation was awful anyway
+      5) optional hash-consing of Expr nodes (see `interning`)
+      6) FrozenExpr, a compact immutable Expr with precomputed metadata
+      7) expr() uses a real parser (no more eval) with sane precedence for
+         implication and equivalence, and caches what it parses (each
+         call still gets a fresh Expr unless interning is on)
+      8) compile_sentence() turns a sentence into a Python function once,
+         for callers that evaluate it many times
+      9) tt_entails checks blocks of models at once with bitsets, and
+         switches to a SAT check when there are too many symbols
+     10) to_cnf(s, method='tseitin') for a linear-size, equisatisfiable CNF
+     11) to_cnf caches its conversions
+     12) dpll_satisfiable uses a CDCL solver (spock.sat.cdcl) by default
+     13) WalkSAT updates its clause counts incrementally after each flip
+         (spock.sat.walksat), with restarts and adaptive noise
+     14) PropKB.ask keeps an incremental SAT solver (spock.sat.incremental)
+     15) dpll_satisfiable, WalkSAT and pl_resolution can simplify their
+         clauses first (preprocess=True, see spock.sat.preprocess)
+     16) dpll_satisfiable(s, workers=N) solves by cube-and-conquer on a
+         process pool (spock.sat.cube)
+     17) dpll_satisfiable(s, solver='portfolio') races engines in parallel
+         processes (spock.sat.portfolio)
+     18) dpll_satisfiable(s, proof=...) writes a DRAT proof when s is
+         unsatisfiable (spock.sat.drat)
+     19) dpll_satisfiable and WalkSAT take an optional SolverStats
+         (spock.sat.stats)
+     20) PropKB.backbone() finds the symbols the KB forces true or false
+     21) PropKB.unsat_core() finds the told sentences that make the KB
+         inconsistent (spock.sat.cores)
+     22) dpll_satisfiable, dpll, WalkSAT, tt_entails and fol_bc_ask take
+         a budget (spock.budget) and raise BudgetExceeded past it
+     23) pl_resolution is a given-clause loop with a set of support, a
+         literal index and subsumption
 
     Original file's comments follow:
 """
@@ -29,7 +61,7 @@
           tt_entails       Say if a statement is entailed by a KB
           pl_resolution    Do resolution on propositional sentences
           dpll_satisfiable See if a propositional sentence is satisfiable
-          WalkSAT          (not yet implemented)
+          WalkSAT          Local search for a model
 
       And a few other functions:
 
@@ -38,6 +70,11 @@
 """
 
 import re
+import heapq
+import hashlib
+import itertools
+from collections import OrderedDict
+from contextlib import contextmanager
 from spock.utils import *
 
 #______________________________________________________________________________
@@ -78,28 +115,183 @@ class KB(object):
 
 
 class PropKB(KB):
-    "A KB for Propositional Logic.  Inefficient, with no indexing."
-
-    def __init__(self, sentence=None):
+    """A KB for Propositional Logic.  Inefficient, with no indexing.
+    cnf is the to_cnf method used for told sentences; with 'tseitin' the
+    clauses mention auxiliary symbols, but what the KB entails about the
+    other symbols is unchanged.
+    ask() is answered by an incremental SAT solver that lives as long as
+    the KB does: each clause is guarded by its own selector, so tell and
+    retract only add to the solver or switch a clause off, and learnt
+    clauses are reused from one question to the next.
+    backbone() lists the symbols the KB forces true or false; it is
+    cached until the next tell or retract.  When the KB is inconsistent,
+    unsat_core() says which told sentences are to blame."""
+
+    def __init__(self, sentence=None, cnf='distribute'):
         self._clauses = []
+        self.cnf = cnf
+        self._solver = None
+        self._guards = {}   ## clause -> its selector in self._solver
+        self._backbone = None
+        self._told = []     ## the sentences told and not retracted
         if sentence:
             self.tell(sentence)
 
     def tell(self, sentence):
         "Add the sentence's clauses to the KB"
-        self._clauses.extend(conjuncts(to_cnf(sentence)))
+        clauses = conjuncts(to_cnf(sentence, self.cnf))
+        self._clauses.extend(clauses)
+        self._told.append(sentence)
+        self._backbone = None
+        if self._solver is not None:
+            for c in clauses:
+                self._guard(c)
 
     def ask_generator(self, query):
         "Yield the empty substitution if KB implies query; else False"
-        if not tt_entails(Expr('&', *self._clauses), query):
+        solver = self._incremental()
+        if not solver.entails(query, self._guards.values()):
             return
         yield {}
 
     def retract(self, sentence):
         "Remove the sentence's clauses from the KB"
-        for c in conjuncts(to_cnf(sentence)):
+        self._backbone = None
+        if sentence in self._told:
+            self._told.remove(sentence)
+        for c in conjuncts(to_cnf(sentence, self.cnf)):
             if c in self._clauses:
                 self._clauses.remove(c)
+                if c in self._guards and c not in self._clauses:
+                    self._solver.release(self._guards.pop(c))
+
+    def backbone(self, symbols=None):
+        """The symbols the KB forces, as a dict {symbol: True or False},
+        or False if the KB is unsatisfiable (and so forces everything).
+        symbols limits the answer to those symbols.
+        Every model the solver finds rules out the candidates it gives the
+        other value, so each remaining candidate costs at most one call,
+        and usually far fewer calls are needed than there are symbols."""
+        if self._backbone is None:
+            self._backbone = self._find_backbone()
+        if self._backbone is False or symbols is None:
+            return self._backbone and dict(self._backbone)
+        return dict((sym, self._backbone[sym]) for sym in symbols
+                    if sym in self._backbone)
+
+    def unsat_core(self, minimal=True):
+        """The told sentences that make the KB inconsistent (a minimal set
+        of them, unless minimal is False), or None if it is consistent."""
+        from spock.sat.cores import CoreExtractor
+        extractor = CoreExtractor(cnf=self.cnf)
+        present = set(self._clauses)
+        for sentence in self._told:
+            extractor.add(sentence, [c for c in
+                                     conjuncts(to_cnf(sentence, self.cnf))
+                                     if c in present])
+        return extractor.mus() if minimal else extractor.core()
+
+    def _find_backbone(self):
+        solver = self._incremental()
+        guards = self._guards.values()
+        model = solver.solve((), guards)
+        if model is False:
+            return False
+        candidates = dict((sym, model[sym])
+                          for sym in prop_symbols(Expr('&', *self._clauses))
+                          if sym in model and not is_tseitin_symbol(sym))
+        forced, assumed = {}, []
+        while candidates:
+            sym, value = candidates.popitem()
+            literal = sym if value else Expr('~', sym)
+            model = solver.solve(assumed + [Expr('~', literal)], guards)
+            if model is False:
+                forced[sym] = value
+                assumed.append(literal)     ## helps the calls that follow
+                continue
+            for other, kept in candidates.items():
+                if model.get(other, kept) != kept:
+                    del candidates[other]
+        return forced
+
+    def _incremental(self):
+        "The KB's IncrementalSolver, created on first use."
+        if self._solver is None:
+            from spock.sat import IncrementalSolver
+            self._solver = IncrementalSolver(cnf=self.cnf)
+            for c in self._clauses:
+                self._guard(c)
+        return self._solver
+
+    def _guard(self, clause):
+        if clause not in self._guards:
+            guard = self._guards[clause] = self._solver.new_guard()
+            self._solver.tell(clause, guard)
+
+#______________________________________________________________________________
+# Hash-consing: when interning is enabled, structurally equal Exprs are the
+# same object, so their hashes are cached and equality is an identity check.
+
+_intern_table = None
+_intern_generation = 0
+_intern_generations = itertools.count(1)
+
+class _Interning(type):
+    """Metaclass for Expr.  While interning is enabled, return the canonical
+    node for (class, op, args) instead of building a fresh one."""
+
+    def __call__(cls, op, *args):
+        table = _intern_table
+        if table is None:
+            return type.__call__(cls, op, *args)
+        op = num_or_str(op)
+        args = tuple([intern_expr(cls._coerce(arg)) for arg in args])
+        key = (cls, op) + args
+        node = table.get(key)
+        if node is None:
+            node = type.__call__(cls, op, *args)
+            object.__setattr__(node, '_hash', hash(op) ^ hash(args))
+            object.__setattr__(node, '_interned', _intern_generation)
+            table[key] = node
+        return node
+
+def enable_interning():
+    """Start hash-consing Exprs in a fresh table.  Nodes are shared between
+    sentences, so they must be treated as immutable while interning is on."""
+    global _intern_table, _intern_generation
+    _intern_table = {}
+    _intern_generation = next(_intern_generations)
+
+def disable_interning():
+    """Stop hash-consing and drop the table.  Nodes that were already
+    interned stay valid, they just stop being canonical."""
+    global _intern_table
+    _intern_table = None
+
+@contextmanager
+def interning():
+    """Hash-cons every Expr built inside the with-block.
+    >>> with interning():
+    ...     expr('P & Q') is expr('P & Q')
+    True
+    """
+    saved = _intern_table, _intern_generation
+    enable_interning()
+    try:
+        yield
+    finally:
+        _set_intern_state(*saved)
+
+def _set_intern_state(table, generation):
+    global _intern_table, _intern_generation
+    _intern_table, _intern_generation = table, generation
+
+def intern_expr(e):
+    """Return the canonical node for e.  This is a no-op when interning is
+    disabled or e is already canonical."""
+    if _intern_table is None or e._interned == _intern_generation:
+        return e
+    return e.__class__(e.op, *e.args)
 
 class Expr(object):
     """A symbolic mathematical expression.  We use this class for logical
@@ -145,7 +337,12 @@ class Expr(object):
     1 doesn't know how to add an Expr.  (Adding an __radd__ method to Expr
     wouldn't help, because int.__add__ is still called first.) Therefore,
     you should use Expr(1) + x instead, or ONE + x, or expr('1 + x').
+
+    See `interning` for a mode where equal Exprs are shared (hash-consed).
     """
+    __metaclass__ = _Interning
+
+    _interned = 0 ## generation of the intern table that owns this node
 
     def __init__(self, op, *args):
         "Op is a string or number; args are Exprs (or are coerced to Exprs)."
@@ -172,13 +369,57 @@ class Expr(object):
 
     def __eq__(self, other):
         """x and y are equal iff their ops and args are equal."""
-        return (other is self) or (isinstance(other, Expr)
-            and self.op == other.op and self.args == other.args)
+        if other is self:
+            return True
+        if not isinstance(other, Expr):
+            return False
+        if (self._interned and self._interned == other._interned
+            and self.__class__ is other.__class__):
+            ## Both canonical in the same table, so they differ structurally
+            return False
+        a, b = self.args, other.args
+        if a.__class__ is not b.__class__: ## list vs. FrozenExpr's tuple
+            a, b = list(a), list(b)
+        return self.op == other.op and a == b
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
 
     def __hash__(self):
         "Need a hash method so Exprs can live in dicts."
+        if self._interned:
+            return self._hash
         return hash(self.op) ^ hash(tuple(self.args))
 
+    @staticmethod
+    def _coerce(arg):
+        "How constructor args are coerced to Exprs."
+        return expr(arg)
+
+    ## Node metadata.  These are computed on demand here; FrozenExpr
+    ## precomputes them into slots when the node is built.
+
+    @property
+    def arity(self):
+        return len(self.args)
+
+    @property
+    def literal(self):
+        "Is this a FOL literal?  (see is_literal)"
+        return is_symbol(self.op) or (self.op == '~' and self.args[0].literal)
+
+    @property
+    def variable(self):
+        "Is this a logic variable?  (see is_variable)"
+        return not self.args and is_var_symbol(self.op)
+
+    @property
+    def symbols(self):
+        "The frozenset of propositional symbols in this Expr."
+        if is_prop_symbol(self.op):
+            return frozenset([self])
+        return frozenset().union(*[arg.symbols for arg in self.args])
+
     # See http://www.python.org/doc/current/lib/module-operator.html
     # Not implemented: not, abs, pos, concat, contains, *item, *slice
     def __lt__(self, other):     return self.__class__('<',  self, other)
@@ -201,6 +442,118 @@ class Expr(object):
     def __mod__(self, other):    return self.__class__('<=>',  self, other) ## (x % y)
 
 
+class FrozenExpr(Expr):
+    """An immutable Expr that never allocates a per-instance __dict__.
+    The hash, arity, literal and variable flags, and the set of
+    propositional symbols are computed once when the node is built, so
+    hashing and the is_literal, is_variable and prop_symbols checks are
+    O(1).  Args are stored as a tuple, and children are frozen too.
+    Use freeze() to convert a sentence.
+    Note that unlike Expr (and spock.Expression), you cannot hang ad-hoc
+    attributes on a FrozenExpr.
+    """
+    __slots__ = ('op', 'args', 'arity', 'literal', 'variable', 'symbols',
+                 '_hash', '_interned')
+
+    def __init__(self, op, *args):
+        assert isinstance(op, str) or (isnumber(op) and not args)
+        op = num_or_str(op)
+        args = tuple([freeze(arg) for arg in args])
+        init = object.__setattr__
+        init(self, 'op', op)
+        init(self, 'args', args)
+        init(self, 'arity', len(args))
+        init(self, 'literal',
+             is_symbol(op) or (op == '~' and args[0].literal))
+        init(self, 'variable', not args and is_var_symbol(op))
+        init(self, '_hash', hash(op) ^ hash(args))
+        init(self, '_interned', 0)
+        if is_prop_symbol(op):
+            symbols = frozenset([self])
+        else:
+            ## Share the children's sets whenever one already covers the rest
+            symbols = frozenset()
+            for arg in args:
+                if not arg.symbols <= symbols:
+                    if symbols <= arg.symbols:
+                        symbols = arg.symbols
+                    else:
+                        symbols = symbols | arg.symbols
+        init(self, 'symbols', symbols)
+
+    @staticmethod
+    def _coerce(arg):
+        return freeze(arg)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenExpr is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("FrozenExpr is immutable")
+
+    def __eq__(self, other):
+        if other is self:
+            return True
+        if isinstance(other, FrozenExpr) and other._hash != self._hash:
+            return False
+        return Expr.__eq__(self, other)
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (self.__class__, (self.op,) + self.args)
+
+def freeze(e):
+    """Return a FrozenExpr equal to e (coercing strings and numbers first).
+    >>> freeze('P & ~Q').symbols == frozenset([P, Q])
+    True
+    """
+    if isinstance(e, FrozenExpr):
+        return e
+    e = expr(e)
+    return FrozenExpr(e.op, *e.args)
+
+class LRUCache(object):
+    """A bounded mapping that forgets its least recently used entries.
+    Counts hits and misses so callers can tell whether it is paying off."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data[key] = value
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        data = self._data
+        data.pop(key, None)
+        data[key] = value
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = self.misses = 0
+
+    def info(self):
+        "A dict of the hit and miss counts and the current and maximum size."
+        return dict(hits=self.hits, misses=self.misses,
+                    size=len(self._data), maxsize=self.maxsize)
 
 def expr(s):
     """Create an Expr representing a logic expression by parsing the input
@@ -210,22 +563,128 @@ def expr(s):
       'x <== y'   parses as   (x << y)    # Reverse implication
       'x <=> y'   parses as   (x % y)     # Logical equivalence
       'x =/= y'   parses as   (x ^ y)     # Logical disequality (xor)
-    But BE CAREFUL; precedence of implication is wrong. expr('P & Q ==> R & S')
-    is ((P & (Q >> R)) & S); so you must use expr('(P & Q) ==> (R & S)').
+    Operators bind like Python's, except that implication is looser than
+    | and &, and equivalence is loosest of all.  Implication associates to
+    the right.  So expr('P & Q ==> R & S') is ((P & Q) >> (R & S)).
     >>> expr('P <=> Q(1)')
     (P <=> Q(1))
     >>> expr('P & Q | ~R(x, F(x))')
     ((P & Q) | ~R(x, F(x)))
+
+    Parsed sentences are kept in a bounded cache (expr.cache), so the same
+    text is only parsed once.  Each call gets its own copy of the cached
+    tree (or, while interning, the shared canonical nodes).
     """
     if isinstance(s, Expr): return s
     if isnumber(s): return Expr(s)
-    ## Replace the alternative spellings of operators with canonical spellings
-    s = s.replace('==>', '>>').replace('<==', '<<')
-    s = s.replace('<=>', '%').replace('=/=', '^')
-    ## Replace a symbol or number, such as 'P' with 'Expr("P")'
-    s = re.sub(r'([a-zA-Z0-9_.]+)', r'Expr("\1")', s)
-    ## Now eval the string.  (A security hole; do not use with an adversary.)
-    return eval(s, {'Expr':Expr})
+    result = expr.cache.get(s)
+    if result is None:
+        result = _ExprParser(s).parse_all()
+        expr.cache[s] = result
+    if _intern_table is None:
+        return _copy_expr(result)
+    return intern_expr(result)
+
+def _copy_expr(e):
+    "A fresh copy of the tree e, sharing no nodes or args lists with it."
+    return Expr(e.op, *[_copy_expr(arg) for arg in e.args])
+
+expr.cache = LRUCache(4096)
+
+_expr_token = re.compile(r"""\s*(?:([a-zA-Z0-9_.]+)|
+                            (==>|<==|<=>|=/=|<=|>=|>>|<<|\*\*|[&|^~+\-*/%<>(),]))""",
+                         re.VERBOSE)
+
+## token: (binding power, op, right associative?)
+_infix_ops = {
+    '<=>': (10, '<=>', False), '%':   (10, '<=>', False),
+    '==>': (20, '>>', True),   '>>':  (20, '>>', True),
+    '<==': (20, '<<', True),   '<<':  (20, '<<', True),
+    '<':   (30, '<', False),   '>':   (30, '>', False),
+    '<=':  (30, '<=', False),  '>=':  (30, '>=', False),
+    '|':   (40, '|', False),
+    '^':   (50, '^', False),   '=/=': (50, '^', False),
+    '&':   (60, '&', False),
+    '+':   (70, '+', False),   '-':   (70, '-', False),
+    '*':   (80, '*', False),   '/':   (80, '/', False),
+    '**':  (100, '**', True),
+    }
+_prefix_ops = {'~': 90, '-': 90}
+
+class _ExprParser(object):
+    """Pratt (top-down operator precedence) parser behind expr()."""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = []  ## (is_name, text) pairs
+        pos, end = 0, len(text.rstrip())
+        while pos < end:
+            match = _expr_token.match(text, pos)
+            if match is None:
+                raise SyntaxError("bad character %r in expression %r"
+                                  % (text[pos:].lstrip()[:1], text))
+            name, op = match.groups()
+            self.tokens.append((name is not None, str(name or op)))
+            pos = match.end()
+        self.tokens.append((False, None))
+        self.pos = 0
+
+    def error(self, message):
+        return SyntaxError("%s in expression %r" % (message, self.text))
+
+    def next(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def expect(self, text):
+        is_name, token = self.next()
+        if is_name or token != text:
+            raise self.error("expected %r but found %s"
+                             % (text, 'end' if token is None else repr(token)))
+
+    def parse_all(self):
+        result = self.parse(0)
+        if self.tokens[self.pos][1] is not None:
+            raise self.error("unexpected %r" % self.tokens[self.pos][1])
+        return result
+
+    def parse(self, rbp):
+        left = self.prefix()
+        while True:
+            is_name, token = self.tokens[self.pos]
+            info = None if is_name else _infix_ops.get(token)
+            if info is None or info[0] <= rbp:
+                return left
+            self.pos += 1
+            lbp, op, right_assoc = info
+            left = Expr(op, left, self.parse(lbp - 1 if right_assoc else lbp))
+
+    def prefix(self):
+        is_name, token = self.next()
+        if is_name:
+            if self.tokens[self.pos] != (False, '('):
+                return Expr(token)
+            self.pos += 1
+            if not is_symbol(token):
+                raise self.error("%r cannot be applied to arguments" % token)
+            args = []
+            if self.tokens[self.pos] != (False, ')'):
+                args.append(self.parse(0))
+                while self.tokens[self.pos] == (False, ','):
+                    self.pos += 1
+                    args.append(self.parse(0))
+            self.expect(')')
+            return Expr(token, *args)
+        elif token == '(':
+            result = self.parse(0)
+            self.expect(')')
+            return result
+        elif token in _prefix_ops:
+            return Expr(token, self.parse(_prefix_ops[token]))
+        elif token is None:
+            raise self.error("unexpected end")
+        raise self.error("unexpected %r" % token)
 
 def is_symbol(s):
     "A string s is a symbol if it starts with an alphabetic char."
@@ -251,7 +710,7 @@ def is_positive(s):
 
 def is_literal(s):
     """is s a FOL literal? """
-    return is_symbol(s.op) or (s.op == '~' and is_literal(s.args[0]))
+    return s.literal
 
 def literals(s):
     """returns the list of literals of logical expression s.  """
@@ -292,34 +751,73 @@ A, B, C, F, G, P, Q, x, y, z  = map(Expr, 'ABCFGPQxyz')
 
 #______________________________________________________________________________
 
-def tt_entails(kb, alpha):
-    """Use truth tables to determine if KB entails sentence alpha. [Fig. 7.10]"""
-    return tt_check_all(kb, alpha, prop_symbols(kb & alpha), {})
+def tt_entails(kb, alpha, method='auto', budget=None):
+    """Use truth tables to determine if KB entails sentence alpha. [Fig. 7.10]
+    method is 'bitslice' (check a block of 2**tt_entails.block_symbols
+    models at a time with bitsets, stopping at the first block with a
+    counter-model), 'enumerate' (the book's model-at-a-time recursion),
+    'sat' (KB entails alpha iff KB & ~alpha is unsatisfiable) or 'auto',
+    which is 'bitslice' up to tt_entails.max_symbols symbols and 'sat'
+    beyond that.  budget (a spock.budget.Budget) is charged a node per
+    model checked ('sat' passes it on to dpll_satisfiable)."""
+    symbols = prop_symbols(kb & alpha)
+    if method == 'auto':
+        if len(symbols) > tt_entails.max_symbols: method = 'sat'
+        else: method = 'bitslice'
+    if method == 'bitslice':
+        return tt_check_blocks(kb, alpha, symbols, budget)
+    elif method == 'sat':
+        return dpll_satisfiable(kb & ~alpha, budget=budget) is False
+    elif method == 'enumerate':
+        return tt_check_all(compile_sentence(kb), compile_sentence(alpha),
+                            symbols, {}, budget)
+    raise ValueError("unknown tt_entails method %r" % (method,))
+
+tt_entails.block_symbols = 12
+tt_entails.max_symbols = 24
+
+def tt_check_blocks(kb, alpha, symbols, budget=None):
+    """Auxiliary routine to implement tt_entails.  The first
+    tt_entails.block_symbols symbols take every combination of values
+    within one block of bitsets; the rest are fixed per block, and the
+    blocks count through their values."""
+    from spock.sat.bitslice import enumeration_bitsets, evaluate_planes
+    counter = Expr('&', kb, Expr('~', alpha))
+    inner, outer = (symbols[:tt_entails.block_symbols],
+                    symbols[tt_entails.block_symbols:])
+    ones = (1 << (1 << len(inner))) - 1
+    planes = dict([(s, (bits, ones ^ bits)) for s, bits
+                   in zip(inner, enumeration_bitsets(len(inner)))])
+    for block in xrange(1 << len(outer)):
+        if budget is not None:
+            budget.spend('nodes', 1 << len(inner))
+        for i, s in enumerate(outer):
+            planes[s] = (ones, 0) if block >> i & 1 else (0, ones)
+        if evaluate_planes(counter, planes, ones)[0]:
+            return False
+    return True
 
-def tt_check_all(kb, alpha, symbols, model):
+def tt_check_all(kb, alpha, symbols, model, budget=None):
     "Auxiliary routine to implement tt_entails."
     if not symbols:
-        if pl_true(kb, model): return pl_true(alpha, model)
+        if budget is not None:
+            budget.spend('nodes')
+        kb, alpha = compile_sentence(kb), compile_sentence(alpha)
+        if kb(model): return alpha(model)
         else: return True
-        assert result != None
     else:
         P, rest = symbols[0], symbols[1:]
-        return (tt_check_all(kb, alpha, rest, extend(model, P, True)) and
-                tt_check_all(kb, alpha, rest, extend(model, P, False)))
+        return (tt_check_all(kb, alpha, rest, extend(model, P, True),
+                             budget) and
+                tt_check_all(kb, alpha, rest, extend(model, P, False),
+                             budget))
 
 def prop_symbols(x):
     "Return a list of all propositional symbols in x."
     if not isinstance(x, Expr):
         from spock import Expression
         raise Exception, Expression(x)#['wat',x] #return []
-    elif is_prop_symbol(x.op):
-        return [x]
-    else:
-        s = set(())
-        for arg in x.args:
-            for symbol in prop_symbols(arg):
-                s.add(symbol)
-        return list(s)
+    return list(x.symbols)
 
 def tt_true(alpha):
     """Is the sentence alpha a tautology? (alpha will be coerced to an expr.)"""
@@ -329,14 +827,18 @@ def pl_true(exp, model={}):
     """Return True if the propositional logic expression is true in the model,
     and False if it is false. If the model does not specify the value for
     every proposition, this may return None to indicate 'not obvious';
-    this may happen even when the expression is tautological."""
+    this may happen even when the expression is tautological.
+    Models are keyed by symbol; for atoms, the op string works too."""
     op, args = exp.op, exp.args
-    if not len(args):
-        return model.get(op, model.get(exp, False))
-    if exp == TRUE:
-        return True
-    elif exp == FALSE:
-        return False
+    if not args:
+        if op == 'TRUE':
+            return True
+        elif op == 'FALSE':
+            return False
+        value = model.get(exp)
+        if value is None:
+            value = model.get(op)
+        return value
     elif is_prop_symbol(op):
         return model.get(exp)
     elif op == '~':
@@ -359,10 +861,15 @@ def pl_true(exp, model={}):
         return result
 
     p, q = args
-    if op == '>>':
-        return pl_true(~p | q, model)
-    elif op == '<<':
-        return pl_true(p | ~q, model)
+    if op == '>>' or op == '<<':
+        if op == '<<': p, q = q, p
+        ## Same as pl_true(~p | q), without building the Expr
+        pt = pl_true(p, model)
+        if pt == False: return True
+        qt = pl_true(q, model)
+        if qt == True: return True
+        if pt == None or qt == None: return None
+        return False
     pt = pl_true(p, model)
     if pt == None: return None
     qt = pl_true(q, model)
@@ -374,13 +881,111 @@ def pl_true(exp, model={}):
     else:
         raise ValueError, "illegal operator in logic expression" + str(exp)
 
+class CompiledSentence(object):
+    """A propositional sentence compiled into a Python function of the
+    symbol values, so evaluating it is one call instead of a walk over the
+    Expr.  Call it with a model: either a dict like pl_true takes, or a
+    sequence of values in the order of self.symbols.  The result is the same
+    as pl_true's, including None when the model leaves something unknown
+    (such models take the slow path through pl_true).  See compile_sentence.
+    """
+
+    def __init__(self, sentence, symbols=None):
+        self.sentence = sentence
+        if symbols is None:
+            symbols = prop_symbols(sentence)
+        self.symbols = list(symbols)
+        index = dict([(s, i) for i, s in enumerate(self.symbols)])
+        try:
+            self.function = eval('lambda m: ' + _sentence_source(sentence, index),
+                                 {})
+        except (ValueError, SyntaxError, RuntimeError, MemoryError):
+            ## Unsupported or too deeply nested; fall back on pl_true
+            self.function = None
+
+    def __call__(self, model):
+        if self.function is not None:
+            if isinstance(model, dict):
+                values = map(model.get, self.symbols)
+            else:
+                values = model
+            if None not in values:
+                return self.function(values)
+        if not isinstance(model, dict):
+            model = dict(zip(self.symbols, model))
+        return pl_true(self.sentence, model)
+
+    def __repr__(self):
+        return 'CompiledSentence(%r)' % (self.sentence,)
+
+def compile_sentence(sentence, symbols=None):
+    """Compile a propositional sentence for fast repeated evaluation (see
+    CompiledSentence).  Results are cached, so compiling the same sentence
+    again is cheap.
+    >>> compile_sentence(expr('A & ~B'))({A: True, B: False})
+    True
+    >>> compile_sentence(expr('A & ~B'), [A, B])([True, True])
+    False
+    """
+    if isinstance(sentence, CompiledSentence) and symbols is None:
+        return sentence
+    sentence = expr(sentence)
+    key = (sentence, None if symbols is None else tuple(symbols))
+    result = compile_sentence.cache.get(key)
+    if result is None:
+        result = compile_sentence.cache[key] = CompiledSentence(sentence, symbols)
+    return result
+
+compile_sentence.cache = LRUCache(256)
+
+_MAX_SOURCE_DEPTH = 50 ## stay well inside the limits of Python's own parser
+
+def _sentence_source(e, index, depth=0):
+    """Python source for e as a function of m, the list of symbol values in
+    the order given by index.  Associative ops are flattened so the source
+    stays shallow."""
+    op, args = e.op, e.args
+    if not args and op == 'TRUE':
+        return 'True'
+    elif not args and op == 'FALSE':
+        return 'False'
+    elif is_prop_symbol(op):
+        if e not in index:
+            raise ValueError("no value slot for %s" % e)
+        return 'm[%d]' % index[e]
+    depth += 1
+    if depth > _MAX_SOURCE_DEPTH:
+        raise ValueError("sentence is nested too deeply to compile")
+    if op == '~':
+        return '(not %s)' % _sentence_source(args[0], index, depth)
+    elif op in ('&', '|'):
+        flat, todo = [], list(reversed(args))
+        while todo:
+            arg = todo.pop()
+            if arg.op == op and arg.args:
+                todo.extend(reversed(arg.args))
+            else:
+                flat.append(_sentence_source(arg, index, depth))
+        if not flat:
+            return 'True' if op == '&' else 'False'
+        joiner = ' and ' if op == '&' else ' or '
+        return '(%s)' % joiner.join(flat)
+    elif op in ('>>', '<<', '<=>', '^') and len(args) == 2:
+        p, q = [_sentence_source(arg, index, depth) for arg in args]
+        template = {'>>': '(not %s or %s)', '<<': '(%s or not %s)',
+                    '<=>': '(%s == %s)', '^': '(%s != %s)'}[op]
+        return template % (p, q)
+    raise ValueError("illegal operator in logic expression %s" % e)
+
 #______________________________________________________________________________
 
 ## Convert to Conjunctive Normal Form (CNF)
 
-def to_cnf(s):
+def to_cnf(s, method='distribute'):
     """Convert a propositional logical sentence s to conjunctive normal form.
     That is, of the form ((A | ~B | ...) & (B | C | ...) & ...) [p. 215]
+    With method='tseitin' the result is only equisatisfiable with s: see
+    tseitin_cnf.
     >>> to_cnf("~(B|C)")
     (~B & ~C)
     >>> to_cnf("B <=> (P1|P2)")
@@ -389,14 +994,148 @@ def to_cnf(s):
     ((b | a | d) & (c | a | d))
     >>> to_cnf("A & (B | (D & E))")
     (A & (D | B) & (E | B))
+    Conversions are kept in a bounded cache (to_cnf.cache), so telling,
+    retracting and asking about the same sentences converts them once.
     """
     if isinstance(s, str): s = expr(s)
-    s = eliminate_implications(s) # Steps 1, 2 from p. 215
-    s = move_not_inwards(s) # Step 3
-    return distribute_and_over_or(s) # Step 4
+    key = (s, method)
+    result = to_cnf.cache.get(key)
+    if result is None:
+        if method == 'tseitin':
+            result = tseitin_cnf(s)
+        elif method == 'distribute':
+            result = eliminate_implications(s) # Steps 1, 2 from p. 215
+            result = move_not_inwards(result) # Step 3
+            result = distribute_and_over_or(result) # Step 4
+        else:
+            raise ValueError("unknown to_cnf method %r" % (method,))
+        to_cnf.cache[key] = result
+    return result
+
+to_cnf.cache = LRUCache(1024)
+
+#______________________________________________________________________________
+# Tseitin (definitional) CNF: every compound subsentence gets a fresh symbol
+# defined to be equivalent to it, so the CNF grows linearly with the input.
+
+TSEITIN_PREFIX = 'Tseitin_'
+
+## Each subsentence is always given the same symbol, so converting a sentence
+## twice gives the same clauses (PropKB.retract relies on this).  The symbol
+## is named after a digest of the subsentence's structure, so no table of
+## names has to be kept (or shared between threads).
+
+def _tseitin_digest(e, digests):
+    "A hex digest of the structure of e; digests memoizes subsentences."
+    digest = digests.get(e)
+    if digest is None:
+        if not e.args:
+            text = '%s:%s' % (type(e.op).__name__, e.op)
+        else:
+            text = '%s(%s)' % (e.op, ','.join([_tseitin_digest(arg, digests)
+                                               for arg in e.args]))
+        digest = digests[e] = hashlib.sha1(text).hexdigest()[:20]
+    return digest
+
+def tseitin_cnf(s):
+    """Convert s to CNF by naming its compound subsentences with auxiliary
+    symbols (see is_tseitin_symbol).  The result is satisfiable exactly
+    when s is, and its models are the models of s, extended with the
+    values of the auxiliary symbols; use strip_tseitin to drop them.
+    Top-level conjuncts that are already clauses are kept as they are.
+    >>> len(conjuncts(tseitin_cnf(expr('(A & B) | (C & D)'))))
+    7
+    """
+    clauses = []
+    literal = _tseitin_encoder(clauses)
+    top = [NaryExpr('|', *map(literal, _flatten('|', [conjunct])))
+           for conjunct in _flatten('&', [s])]
+    return NaryExpr('&', *OrderedDict.fromkeys(top + clauses))
+
+def tseitin_literal(s):
+    """A literal that is equivalent to s given the definitions of the
+    auxiliary symbols in it, and the list of those definitions as clauses.
+    Assuming the literal is then the same as assuming s.
+    >>> tseitin_literal(expr('~P'))
+    (~P, [])
+    """
+    clauses = []
+    return _tseitin_encoder(clauses)(s), clauses
+
+def _tseitin_encoder(clauses):
+    """A function that maps a sentence to an equivalent literal, appending
+    the definition of each auxiliary symbol it uses to clauses (once)."""
+    defined = set()
+    digests = {}
+
+    def literal(e):
+        while e.op == '~' and e.args[0].op == '~':
+            e = e.args[0].args[0]
+        if e.op == '~':
+            return negate(literal(e.args[0]))
+        if not e.args or is_prop_symbol(e.op):
+            return e
+        name = Expr(TSEITIN_PREFIX + _tseitin_digest(e, digests))
+        if name not in defined:
+            defined.add(name)
+            define(name, e)
+        return name
+
+    def define(x, e):
+        op, args = e.op, e.args
+        if op in ('>>', '<<') and len(args) == 2:
+            a, b = args if op == '>>' else args[::-1]
+            op, args = '|', [Expr('~', a), b]
+        if op in ('<=>', '^') and len(args) == 2:
+            a, b = map(literal, args)
+            if op == '^': b = negate(b)
+            clauses.extend([Expr('|', ~x, negate(a), b),
+                            Expr('|', ~x, a, negate(b)),
+                            Expr('|', x, a, b),
+                            Expr('|', x, negate(a), negate(b))])
+            return
+        lits = map(literal, _flatten(op, args))
+        if op == '&':
+            clauses.extend([Expr('|', ~x, l) for l in lits])
+            clauses.append(Expr('|', x, *map(negate, lits)))
+        elif op == '|':
+            clauses.append(Expr('|', ~x, *lits))
+            clauses.extend([Expr('|', x, negate(l)) for l in lits])
+        else:
+            raise ValueError("illegal operator in logic expression %s" % e)
+
+    return literal
+
+def _flatten(op, args):
+    "The args of nested op nodes, flattened into one list."
+    flat, todo = [], list(reversed(args))
+    while todo:
+        arg = todo.pop()
+        if arg.op == op and arg.args:
+            todo.extend(reversed(arg.args))
+        else:
+            flat.append(arg)
+    return flat
+
+def negate(literal):
+    "The complement of a literal: ~~P is simplified to P."
+    if literal.op == '~':
+        return literal.args[0]
+    return Expr('~', literal)
+
+def is_tseitin_symbol(s):
+    "Is s an auxiliary symbol introduced by tseitin_cnf?"
+    return (isinstance(s, Expr) and not s.args and
+            isinstance(s.op, str) and s.op.startswith(TSEITIN_PREFIX))
+
+def strip_tseitin(model):
+    "A copy of model (a dict, or False) without the auxiliary symbols."
+    if not model:
+        return model
+    return dict([(k, v) for k, v in model.items() if not is_tseitin_symbol(k)])
 
 def eliminate_implications(s):
-    """ Change >>, <<, and <=> into &, |, and ~. That is, return an Expr
+    """ Change >>, <<, <=> and ^ into &, |, and ~. That is, return an Expr
         that is equivalent to s, but has only &, |, and ~ as logical operators.
     """
     if not s.args or is_symbol(s.op): return s     ## (Atoms are unchanged.)
@@ -408,6 +1147,8 @@ def eliminate_implications(s):
         return (a | ~b)
     elif s.op == '<=>':
         return (a | ~b) & (b | ~a)
+    elif s.op == '^':
+        return (a | b) & (~a | ~b)
     else:
         return Expr(s.op, *args)
 
@@ -457,8 +1198,10 @@ def NaryExpr(op, *args):
     nested instances of the same op up to the top level.
     """
     arglist = []
-    for arg in args:
-        if arg.op == op: arglist.extend(arg.args)
+    stack = list(reversed(args))
+    while stack:    ## promote nested instances at any depth, in order
+        arg = stack.pop()
+        if arg.op == op: stack.extend(reversed(arg.args))
         else: arglist.append(arg)
     if len(args) == 1:
         return args[0]
@@ -483,21 +1226,135 @@ def disjuncts(s):
 
 #______________________________________________________________________________
 
-def pl_resolution(KB, alpha):
-    "Propositional Logic Resolution: say if alpha follows from KB. [Fig. 7.12]"
-    clauses = KB._clauses + conjuncts(to_cnf(~alpha))
-    new = set()
-    while True:
-        n = len(clauses)
-        pairs = [(clauses[i], clauses[j])
-                 for i in range(n) for j in range(i+1, n)]
-        for (ci, cj) in pairs:
-            resolvents = pl_resolve(ci, cj)
-            if FALSE in resolvents: return True
-            new = new.union(set(resolvents))
-        if new.issubset(set(clauses)): return False
-        for c in new:
-            if c not in clauses: clauses.append(c)
+def pl_resolution(KB, alpha, preprocess=False):
+    """Propositional Logic Resolution: say if alpha follows from KB. [Fig. 7.12]
+    This is a given-clause loop with the clauses of ~alpha as the set of
+    support.  Each step takes the smallest clause left in the set,
+    resolves it against the clauses already processed, and adds the
+    resolvents to the set.  Partners are found through an index on
+    their complementary literal, so no pair is resolved twice.
+    Tautologies are dropped, and so is a resolvent that a kept clause
+    subsumes (forward subsumption).  A resolvent that is kept removes the
+    clauses it subsumes (backward subsumption).  KB clauses are only
+    resolved with each other once the set of support runs out, which keeps
+    the search complete when the KB is inconsistent on its own.
+    With preprocess, the clauses are simplified first (spock.sat.preprocess);
+    that keeps them equisatisfiable, which is all resolution needs, but
+    loses track of which clauses came from alpha, so they all start in the
+    set of support."""
+    usable, support = KB._clauses, list(conjuncts(to_cnf(~alpha)))
+    if preprocess:
+        from spock.sat import ClauseDB
+        from spock.sat.preprocess import preprocess as simplify
+        db = ClauseDB()
+        for clause in usable + support:
+            db.add_expr(clause)
+        pre, db = simplify(db)
+        if pre.unsat:
+            return True
+        usable, support = [], [db.to_expr(i) for i in range(len(db))]
+    return _GivenClause().refute(usable, support)
+
+def _clause_literals(clause):
+    "The literals of clause as a frozenset, or None if it is always true."
+    lits = set()
+    for lit in disjuncts(clause):
+        if lit.op == 'TRUE':
+            return None
+        if lit.op != 'FALSE':
+            lits.add(lit)
+    return frozenset(lits)
+
+class _GivenClause(object):
+    """The kept clauses of pl_resolution, as frozensets of literals, with
+    an index from each literal to the kept clauses that contain it."""
+
+    def __init__(self):
+        self.clauses = {}       ## id -> clause, for the kept clauses
+        self.occurs = {}        ## literal -> ids of kept clauses with it
+        self.active = set()     ## ids of clauses to resolve the given with
+        self.given = set()      ## ids of clauses that have been given
+        self.passive = []       ## heap of (size, id): the set of support
+        self.count = 0
+
+    def add(self, clause):
+        """Keep clause, unless it is a tautology or subsumed, and return its
+        id (None if it was not kept)."""
+        occurs, clauses = self.occurs, self.clauses
+        for lit in clause:
+            if negate(lit) in clause:
+                return None
+        for lit in clause:
+            for i in occurs.get(lit, ()):
+                if len(clauses[i]) <= len(clause) and clauses[i] <= clause:
+                    return None
+        if clause:
+            rarest = min(clause, key=lambda lit: len(occurs.get(lit, ())))
+            for i in list(occurs.get(rarest, ())):
+                if clause <= clauses[i]:
+                    self.remove(i)
+        self.count += 1
+        i = self.count
+        clauses[i] = clause
+        for lit in clause:
+            occurs.setdefault(lit, set()).add(i)
+        return i
+
+    def remove(self, i):
+        for lit in self.clauses.pop(i):
+            self.occurs[lit].discard(i)
+        self.active.discard(i)
+
+    def push(self, clause):
+        "Add clause to the set of support; is it the empty clause?"
+        if not clause:
+            return True
+        i = self.add(clause)
+        if i is not None:
+            heapq.heappush(self.passive, (len(clause), i))
+        return False
+
+    def refute(self, usable, support):
+        "Do the usable and support clauses resolve to the empty clause?"
+        for c in usable:
+            clause = _clause_literals(c)
+            if clause is not None:
+                if not clause:
+                    return True
+                i = self.add(clause)
+                if i is not None:
+                    self.active.add(i)
+        for c in support:
+            clause = _clause_literals(c)
+            if clause is not None and self.push(clause):
+                return True
+        clauses, occurs, active = self.clauses, self.occurs, self.active
+        while True:
+            if not self.passive:
+                ## the set of support is saturated: let the rest of the
+                ## usable clauses take their turn as the given clause
+                for i in active - self.given:
+                    active.discard(i)
+                    heapq.heappush(self.passive, (len(clauses[i]), i))
+                if not self.passive:
+                    return False
+            size, i = heapq.heappop(self.passive)
+            if i not in clauses:
+                continue        ## removed by backward subsumption
+            given = clauses[i]
+            active.add(i)
+            self.given.add(i)
+            for lit in given:
+                complement = negate(lit)
+                for j in list(occurs.get(complement, ())):
+                    if j not in active or j not in clauses:
+                        continue
+                    resolvent = (given - set([lit])) | \
+                                (clauses[j] - set([complement]))
+                    if self.push(resolvent):
+                        return True
+                if i not in clauses:
+                    break       ## a resolvent subsumed the given clause
 
 def pl_resolve(ci, cj):
     """Return all clauses that can be obtained by resolving clauses ci and cj.
@@ -578,23 +1435,104 @@ for s in "P>>Q   (L&M)>>P   (B&L)>>M   (A&P)>>L   (A&B)>>L   A   B".split():
 
 # DPLL-Satisfiable [Fig. 7.16]
 
-def dpll_satisfiable(s):
+def dpll_satisfiable(s, cnf='distribute', solver='cdcl', preprocess=False,
+                     workers=None, proof=None, stats=None, budget=None):
     """Check satisfiability of a propositional sentence.
     This differs from the book code in two ways: (1) it returns a model
     rather than True when it succeeds; this is more useful. (2) The
     function find_pure_symbol is passed a list of unknown clauses, rather
     than a list of all clauses and the model; this is more efficient.
+    cnf is the to_cnf method; auxiliary symbols never appear in the model.
+    solver='cdcl' (the default) uses the clause-learning solver in
+    spock.sat.cdcl; solver='dpll' uses the book's algorithm below, and
+    solver='portfolio' races several engines (spock.sat.portfolio).
+    With preprocess, the clauses are simplified (spock.sat.preprocess)
+    before the search and the model is extended back afterwards.
+    With workers=N (N > 1), the CDCL search is split into cubes that N
+    processes solve in parallel (spock.sat.cube).
+    proof (a filename or a spock.sat.drat.DRATWriter) records a DRAT proof
+    when the answer is False, for the clauses ClauseDB().tell(s, cnf)
+    makes; it needs the plain CDCL solver.  stats (a SolverStats from
+    spock.sat.stats) collects counters and the time spent in each phase.
+    budget (a spock.budget.Budget) bounds the search, which raises
+    BudgetExceeded when it runs out.  Cube-and-conquer checks its time
+    limit and cancellation while the workers run, and the portfolio gets
+    the time left as its timeout; the work done in those processes is
+    not counted against its other limits.
     >>> ppsubst(dpll_satisfiable(A&~B))
     {A: True, B: False}
     >>> dpll_satisfiable(P&~P)
     False
     """
-    clauses = conjuncts(to_cnf(s))
-    symbols = prop_symbols(s)
-    return dpll(clauses, symbols, {})
-
-def dpll(clauses, symbols, model):
-    "See if the clauses are true in a partial model."
+    if solver not in ('cdcl', 'dpll', 'portfolio'):
+        raise ValueError("unknown dpll_satisfiable solver %r" % (solver,))
+    if proof is not None and (solver != 'cdcl' or preprocess or
+                              workers is not None):
+        raise ValueError("proofs need solver='cdcl', without "
+                         "preprocessing or workers")
+    from spock.sat import cdcl, cube, ClauseDB
+    from spock.sat.stats import phase
+    if solver == 'dpll' and not preprocess:
+        with phase(stats, 'cnf'):
+            clauses = conjuncts(to_cnf(s, cnf))
+        with phase(stats, 'search'):
+            symbols = prop_symbols(Expr('&', *clauses))
+            return strip_tseitin(dpll(clauses, symbols, {}, budget))
+
+    def search(db):
+        if solver == 'dpll':
+            clauses = [db.to_expr(i) for i in range(len(db))]
+            partial = dpll(clauses, prop_symbols(Expr('&', *clauses)), {},
+                           budget)
+            if partial is False:
+                return False
+            return [None] + [partial.get(db.symbols[v])
+                             for v in range(1, db.nvars + 1)]
+        if solver == 'portfolio':
+            from spock.sat.portfolio import Portfolio
+            if budget is not None:
+                budget.check()
+            model = Portfolio().solve(db, budget and budget.remaining())
+            if budget is not None:
+                budget.check()
+            return model
+        if workers is not None:
+            return cube.solve(db, workers, budget=budget)
+        if proof is None:
+            return cdcl.solve(db, stats=stats, budget=budget)
+        from spock.sat.drat import DRATWriter
+        writer = proof if isinstance(proof, DRATWriter) else DRATWriter(proof)
+        try:
+            return cdcl.solve(db, writer, stats, budget)
+        finally:
+            if writer is proof:
+                writer.flush()
+            else:
+                writer.close()
+
+    with phase(stats, 'cnf'):
+        db = ClauseDB()
+        db.tell(s, cnf)
+    pre, clauses = None, db
+    if preprocess:
+        from spock.sat.preprocess import preprocess as simplify
+        with phase(stats, 'preprocess'):
+            pre, clauses = simplify(db)
+        if pre.unsat:
+            return False
+    with phase(stats, 'search'):
+        model = search(clauses)
+    if model is False:
+        return False
+    if pre is not None:
+        model = pre.extend(model)
+    return strip_tseitin(db.model_to_expr(model))
+
+def dpll(clauses, symbols, model, budget=None):
+    """See if the clauses are true in a partial model.  Each call is a
+    node spent from budget, if one is given."""
+    if budget is not None:
+        budget.spend('nodes')
     unknown_clauses = [] ## clauses with an unknown truth value
     for c in clauses:
         val =  pl_true(c, model)
@@ -606,13 +1544,16 @@ def dpll(clauses, symbols, model):
         return model
     P, value = find_pure_symbol(symbols, unknown_clauses)
     if P:
-        return dpll(clauses, removeall(P, symbols), extend(model, P, value))
-    P, value = find_unit_clause(clauses, model)
+        return dpll(clauses, removeall(P, symbols), extend(model, P, value),
+                    budget)
+    P, value = find_unit_clause(unknown_clauses, model)
     if P:
-        return dpll(clauses, removeall(P, symbols), extend(model, P, value))
+        return dpll(clauses, removeall(P, symbols), extend(model, P, value),
+                    budget)
+    symbols = list(symbols)
     P = symbols.pop()
-    return (dpll(clauses, symbols, extend(model, P, True)) or
-            dpll(clauses, symbols, extend(model, P, False)))
+    return (dpll(clauses, symbols, extend(model, P, True), budget) or
+            dpll(clauses, symbols, extend(model, P, False), budget))
 
 def find_pure_symbol(symbols, unknown_clauses):
     """Find a symbol and its value if it appears only as a positive literal
@@ -661,43 +1602,43 @@ def literal_symbol(literal):
 #______________________________________________________________________________
 # Walk-SAT [Fig. 7.17]
 
-def WalkSAT(clauses, p=0.5, max_flips=10000):
-    ## model is a random assignment of true/false to the symbols in clauses
-    ## See ~/aima1e/print1/manual/knowledge+logic-answers.tex ???
-
-    all_symbols = set()
-    for clause in clauses:
-        for sym in prop_symbols(clause):
-            all_symbols.add(sym)
-    model = dict( [ [sym, random.choice([True, False]) ] for sym in all_symbols] )
-
-    for i in range(max_flips):
-        satisfied, unsatisfied = [], []
-        for clause in clauses:
-            if_(pl_true(clause, model), satisfied, unsatisfied).append(clause)
-        if not unsatisfied: ## if model satisfies all the clauses
-            return model
-        clause = random.choice(unsatisfied)
-        if probability(p):
-            tmp = prop_symbols(clause)
-            assert tmp, 'Expected so-called "clause" would have some symbols..'
-            sym = random.choice(tmp)
-        else:
-            ## Flip the symbol in clause that miximizes number of sat. clauses
-            tally = []
-            for sym in all_symbols:
-                tmp_model = model.copy()
-                tmp_model[sym] = not tmp_model[sym]
-                # -1 if we break a clause that was satisified before, 0 for status quo
-                score1 = [ 0 if pl_true(clause, tmp_model) else -1 for clause in satisfied]
-                # +1 if we fix a clause that was satisified before, 0 for status quo
-                score2 = [ 1 if pl_true(clause, tmp_model) else 0 for clause in unsatisfied]
-                rank = sum(score1) + sum(score2)
-                tally.append([rank,sym])
-            tally.sort()
-            rank, sym = tally[-1]
-        model[sym] = not model[sym]
-
+def WalkSAT(clauses, p=0.5, max_flips=10000, cnf='distribute', max_tries=1,
+            noise='fixed', preprocess=False, stats=None, budget=None):
+    """Look for a model of the sentences in clauses by local search, with
+    the incremental WalkSAT in spock.sat.walksat.  Each sentence is
+    converted to clauses with to_cnf(sentence, cnf).  p is the probability
+    of a random walk step (noise='adaptive' tunes it on the fly instead);
+    the search restarts up to max_tries times with max_flips flips each.
+    With preprocess, the search runs on simplified clauses (see
+    spock.sat.preprocess) and its model is extended back afterwards.
+    stats (a SolverStats from spock.sat.stats) collects flips, restarts
+    and the time spent in each phase.  budget (a spock.budget.Budget) is
+    charged a node per flip, and BudgetExceeded ends the search.
+    Returns a model with a value for every symbol, or None."""
+    from spock.sat import ClauseDB
+    from spock.sat.stats import phase
+    from spock.sat.walksat import walksat
+    with phase(stats, 'cnf'):
+        db = ClauseDB()
+        for sentence in clauses:
+            for sym in prop_symbols(sentence):
+                db.var(sym)
+            db.tell(sentence, cnf)
+    pre, simplified = None, db
+    if preprocess:
+        from spock.sat.preprocess import preprocess as simplify
+        with phase(stats, 'preprocess'):
+            pre, simplified = simplify(db)
+        if pre.unsat:
+            return None
+    with phase(stats, 'search'):
+        assignment = walksat(simplified, p, max_flips, max_tries, noise,
+                             stats=stats, budget=budget)
+    if assignment is None:
+        return None
+    if pre is not None:
+        assignment = pre.extend(assignment)
+    return strip_tseitin(db.model_to_expr(assignment))
 
 # PL-Wumpus-Agent [Fig. 7.19]
 def update_position(x, y, orientation, action):
@@ -728,6 +1669,13 @@ def unify(x, y, s):
         return unify_var(y, x, s)
     elif isinstance(x, Expr) and isinstance(y, Expr):
         return unify(x.args, y.args, unify(x.op, y.op, s))
+    elif isinstance(x, (list, tuple)) and isinstance(y, (list, tuple)):
+        ## Args may be lists (Expr) or tuples (FrozenExpr)
+        if len(x) != len(y):
+            return None
+        elif not x:
+            return s
+        return unify(x[1:], y[1:], unify(x[0], y[0], s))
     elif isinstance(x, str) or isinstance(y, str) or not x or not y:
         # orig. return if_(x == y, s, None) but we already know x != y
         return None
@@ -739,7 +1687,7 @@ def unify(x, y, s):
 
 def is_variable(x):
     "A variable is an Expr with no args and a lowercase symbol as the op."
-    return isinstance(x, Expr) and not x.args and is_var_symbol(x.op)
+    return isinstance(x, Expr) and x.variable
 
 def unify_var(var, x, s):
     if var in s:
@@ -762,7 +1710,7 @@ def occur_check(var, x, s):
         # Compare operator and arguments
         return (occur_check(var, x.op, s) or
                 occur_check(var, x.args, s))
-    elif isinstance(x, list) and x != []:
+    elif isinstance(x, (list, tuple)) and len(x):
         # Compare first and rest
         return (occur_check(var, x[0], s) or
                 occur_check(var, x[1:], s))
@@ -899,9 +1847,11 @@ test_kb = FolKB(
 )
 
 
-def fol_bc_ask(KB, goals, theta={}):
+def fol_bc_ask(KB, goals, theta={}, budget=None):
     """A simple backward-chaining algorithm for first-order logic. [Fig. 9.6]
     KB should be an instance of FolKB, and goals a list of literals.
+    budget (a spock.budget.Budget) is charged a node per call and an
+    inference per rule tried.
 
     >>> test_ask('Farmer(x)')
     ['{x: Mac}']
@@ -915,6 +1865,9 @@ def fol_bc_ask(KB, goals, theta={}):
     ['{x: MrsRabbit}', '{x: Pete}']
     """
 
+    if budget is not None:
+        budget.spend('nodes')
+
     if goals == []:
         yield theta
         raise StopIteration()
@@ -922,6 +1875,8 @@ def fol_bc_ask(KB, goals, theta={}):
     q1 = subst(theta, goals[0])
 
     for r in KB._clauses:
+        if budget is not None:
+            budget.spend('inferences')
         sar = standardize_apart(r)
 
         # Split into head and body
@@ -942,7 +1897,8 @@ def fol_bc_ask(KB, goals, theta={}):
             else:
                 new_goals = conjuncts(body) + goals[1:]
 
-            for ans in fol_bc_ask(KB, new_goals, subst_compose(theta1, theta)):
+            for ans in fol_bc_ask(KB, new_goals, subst_compose(theta1, theta),
+                                  budget):
                 yield ans
 
     raise StopIteration()
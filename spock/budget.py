@@ -0,0 +1,141 @@
+""" spock.budget
+
+    Resource limits for the search engines:
+
+        >>> budget = Budget(seconds=2, conflicts=10000)
+        >>> try:
+        ...     dpll_satisfiable(sentence, budget=budget)
+        ... except BudgetExceeded, e:
+        ...     print e.resource, e.stats
+        seconds {'conflicts': 6312, 'nodes': 15873, 'seconds': 2.0004, ...}
+
+    The engines that take a budget (dpll_satisfiable and the book's dpll,
+    WalkSAT, tt_entails, fol_bc_ask and backtracking_search) spend from
+    it as they go:
+
+        conflicts   conflicts of the CDCL solver
+        nodes       decisions (CDCL), recursive calls (dpll, fol_bc_ask,
+                    backtracking_search), flips (WalkSAT) and models
+                    checked (tt_entails)
+        inferences  unit propagations (CDCL), rules tried (fol_bc_ask)
+                    and values tried (backtracking_search)
+
+    Counting is a dict update and a comparison.  The costlier checks, on
+    the clock, on memory and for cancellation, only run once every
+    check_every counts.  cancel() may be called from any thread; the
+    engine stops at its next check.  A budget keeps counting across calls
+    until reset(), so one budget can cover all the work for a request;
+    reset() also clears a cancel().
+
+    When a limit is passed the engine raises BudgetExceeded, whose stats
+    hold what had been spent so far.
+"""
+import os
+import time
+
+class BudgetExceeded(Exception):
+    """Raised when a search runs out of budget.  resource is what ran out
+    ('seconds', 'memory', 'conflicts', 'nodes', 'inferences' or
+    'cancelled'), limit its limit, and stats what had been spent."""
+
+    def __init__(self, resource, limit, stats):
+        if resource == 'cancelled':
+            message = "search cancelled"
+        else:
+            message = "%s budget of %s exceeded" % (resource, limit)
+        Exception.__init__(self, message)
+        self.resource = resource
+        self.limit = limit
+        self.stats = stats
+
+def _memory():
+    "The resident memory of this process in megabytes, or None."
+    try:
+        f = open('/proc/self/statm')
+        try:
+            pages = int(f.read().split()[1])
+        finally:
+            f.close()
+        return pages * os.sysconf('SC_PAGE_SIZE') / float(1 << 20)
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    ## peak rather than current use, in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+class Budget(object):
+    """Limits on wall-clock seconds, resident memory (in megabytes),
+    conflicts, nodes and inferences; None means no limit."""
+
+    resources = ('conflicts', 'nodes', 'inferences')
+
+    def __init__(self, seconds=None, memory=None, conflicts=None, nodes=None,
+                 inferences=None, check_every=1000):
+        self.seconds = seconds
+        self.memory = memory
+        inf = float('inf')
+        self.limits = {'conflicts': inf if conflicts is None else conflicts,
+                       'nodes': inf if nodes is None else nodes,
+                       'inferences': inf if inferences is None else inferences}
+        self.check_every = check_every
+        self.reset()
+
+    def reset(self):
+        "Start counting (and the clock) from zero again, and uncancel."
+        self.cancelled = False
+        self.used = dict((name, 0) for name in self.resources)
+        self.start = time.time()
+        self.countdown = self.check_every
+
+    def cancel(self):
+        "Make the engine using this budget stop at its next check."
+        self.cancelled = True
+
+    def spend(self, resource, amount=1):
+        "Count amount of resource; raise BudgetExceeded past a limit."
+        used = self.used[resource] = self.used[resource] + amount
+        if used > self.limits[resource]:
+            self.exceeded(resource, self.limits[resource])
+        self.countdown -= 1
+        if self.countdown <= 0:
+            self.check()
+
+    def check(self):
+        "Check the clock, memory and cancellation now."
+        self.countdown = self.check_every
+        if self.cancelled:
+            self.exceeded('cancelled', None)
+        if self.seconds is not None and self.elapsed() > self.seconds:
+            self.exceeded('seconds', self.seconds)
+        if self.memory is not None:
+            used = _memory()
+            if used is not None and used > self.memory:
+                self.exceeded('memory', self.memory)
+
+    def remaining(self):
+        "The seconds left, or None if there is no time limit."
+        if self.seconds is None:
+            return None
+        return max(0.0, self.seconds - self.elapsed())
+
+    def elapsed(self):
+        return time.time() - self.start
+
+    def as_dict(self):
+        d = dict(self.used)
+        d['seconds'] = self.elapsed()
+        return d
+
+    def exceeded(self, resource, limit):
+        raise BudgetExceeded(resource, limit, self.as_dict())
+
+    def __repr__(self):
+        parts = ['%s=%s' % (name, getattr(self, name))
+                 for name in ('seconds', 'memory') if getattr(self, name)]
+        parts += ['%s=%s' % (name, self.limits[name])
+                  for name in self.resources
+                  if self.limits[name] != float('inf')]
+        return 'Budget(%s)' % ', '.join(parts)
@@ -3,7 +3,13 @@
 from spock.aima.logic import *
 from spock.aima import CSP, backtracking_search
 
-class InconsistentConstraints(Exception): pass
+class InconsistentConstraints(Exception):
+    """ raised when the constraints have no solution.  core is a
+        minimal list of the (service, dependency) entries to blame
+    """
+    def __init__(self, table, core=None):
+        Exception.__init__(self, table)
+        self.core = core
 
 class BootOrderProblem(object):
     """ solves the "boot order" problem, aka dependency consistency, etc.
@@ -48,6 +54,57 @@ class BootOrderProblem(object):
         """ every service could potentially be booted in any order """
         return dict([ [service, range(len(self.vars))] for service in self.vars])
 
+    def _cycles(self):
+        """ the groups of services that depend on each other, directly
+            or not (strongly connected components with a cycle)
+        """
+        graph = dict([ [s, [d for d in self.table[s] \
+                            if d in self.table and d != s]] for s in self.vars ])
+        reach = {}
+        for s in graph:
+            seen, todo = set(), list(graph[s])
+            while todo:
+                d = todo.pop()
+                if d not in seen:
+                    seen.add(d)
+                    todo.extend(graph[d])
+            reach[s] = seen
+        groups, placed = [], set()
+        for s in graph:
+            if s in reach[s] and s not in placed:
+                group = [t for t in graph if t in reach[s] and s in reach[t]]
+                placed.update(group)
+                groups.append(group)
+        return groups
+
+    def explain(self):
+        """ a minimal list of (service, dependency) entries of the table
+            that cannot all hold, or None if the table is consistent.
+
+            only services that depend on each other can conflict.  for
+            each such group, R(a, b) says a boots before b: each
+            dependency entry d -> s, behind its own selector, gives
+            R(d, s) and carries every R(a, d) over to R(a, s), and no
+            service may boot before itself.
+        """
+        from spock.sat.cores import CoreExtractor
+        for group in self._cycles():
+            index = dict([ [s, i] for i, s in enumerate(group) ])
+            before = lambda i, j: Expr('R%d_%d' % (i, j))
+            extractor = CoreExtractor([~before(i, i)
+                                       for i in range(len(group))])
+            for s in group:
+                for d in self.table[s]:
+                    if d in index and d != s:
+                        i, j = index[d], index[s]
+                        extractor.add((s, d), [before(i, j)] +
+                                      [before(k, i) >> before(k, j)
+                                       for k in range(len(group))])
+            core = extractor.mus()
+            if core is not None:
+                return core
+        return None
+
     def __call__(self):
         """ computes problem solution """
         # compute solution
@@ -55,7 +112,7 @@ class BootOrderProblem(object):
                                self.neighbors, self._boot_order_constraint)
         answer         = self.csp_algorithm(self.csp_problem)
         if answer is None:
-            raise InconsistentConstraints(self.table)
+            raise InconsistentConstraints(self.table, self.explain())
         else:
             # clean up the answer before we return it.  by default
             # it will be a dictionary of {service_name : boot_order},
@@ -22,6 +22,10 @@ class Doctrine(FolKB):
          consider(q, [with-respect-to])::
            yields all solutions as a flattened value,
            with respect to variable specified by  `wrt`
+
+         unsat_core([assumptions])::
+           the told sentences that contradict the assumptions,
+           or None if there is no contradiction.
     """
 
     class DuplicateSentence(ValueError):
@@ -45,6 +49,24 @@ class Doctrine(FolKB):
             for x in results:
                 yield x[wrt]
 
+    def unsat_core(self, assumptions=(), minimal=True):
+        """ a minimal set of told sentences that, together with the
+            assumptions (say the negation of a belief the doctrine
+            must not hold), is inconsistent; None if there is none.
+
+            the sentences are grounded over the constants they and
+            the assumptions mention, so the check is propositional.
+            definite clauses alone are always consistent: without
+            assumptions the answer is None.
+        """
+        from spock.sat.cores import CoreExtractor, constants, ground
+        names = constants(list(self._clauses) + list(assumptions))
+        extractor = CoreExtractor([instance for sentence in assumptions
+                                   for instance in ground(sentence, names)])
+        for sentence in self._clauses:
+            extractor.add(sentence, ground(sentence, names))
+        return extractor.mus() if minimal else extractor.core()
+
 class TemporalDoctrine(defaultdict):
     """ very crude temporal logic: we store multiple subdoctrines for
         every single time that is referenced.
@@ -0,0 +1,17 @@
+""" spock.sat
+
+    Propositional engines that work on integer-encoded clauses instead of
+    Expr trees.  Sentences are converted at the API boundary (see
+    spock.sat.clausedb.ClauseDB), so the inner loops only ever touch ints.
+
+    The functions in spock.aima.logic (dpll_satisfiable, WalkSAT, and
+    friends) keep their Expr-based interfaces and use these modules under
+    the hood.
+"""
+from spock.sat.clausedb import ClauseDB
+from spock.sat.dimacs import read_dimacs, write_dimacs
+from spock.sat.incremental import IncrementalSolver
+from spock.sat.models import iter_models
+from spock.sat.counting import count_models
+from spock.sat.maxsat import MaxSAT, maxsat
+from spock.sat.cores import CoreExtractor, unsat_core
@@ -0,0 +1,182 @@
+""" spock.sat.bitslice
+
+    Evaluate one sentence against many models at once.  Each symbol's
+    values across all the models are packed into a bitset, so a single
+    & or | evaluates a connective for every model in one go.
+
+    Bitsets can be plain python ints (no dependencies, any width), packed
+    numpy uint64 word arrays, or numpy bool arrays.  numpy is optional;
+    only the functions that take numpy input need it.
+
+    Truth values are three-valued like pl_true: every sentence evaluates
+    to a pair of bitsets (true, false), and a model whose bit is set in
+    neither is one where the answer is None.
+"""
+import random
+
+from spock.aima.logic import is_prop_symbol, prop_symbols
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _require_numpy(name):
+    if numpy is None:
+        raise ImportError("spock.sat.bitslice.%s requires numpy" % name)
+
+def evaluate_planes(sentence, planes, ones, zeros=0):
+    """Evaluate sentence over bit-planes.  planes maps each symbol to a
+    (true, false) pair of bitsets; symbols that are missing are unknown in
+    every model.  ones and zeros are the all-set and all-clear bitsets of
+    the right width and type.  Returns the (true, false) pair for sentence.
+    >>> evaluate_planes(expr('A & ~B'), {A: (0b1100, 0b0011), B: (0b1010, 0b0101)}, 0b1111)
+    (4, 11)
+    """
+    memo = {}
+    unknown = (zeros, zeros)
+
+    def walk(e):
+        key = id(e)
+        if key in memo:
+            return memo[key]
+        op, args = e.op, e.args
+        if not args and op == 'TRUE':
+            result = (ones, zeros)
+        elif not args and op == 'FALSE':
+            result = (zeros, ones)
+        elif not args or is_prop_symbol(op):
+            result = planes.get(e, unknown)
+        elif op == '~':
+            t, f = walk(args[0])
+            result = (f, t)
+        elif op in ('&', '|'):
+            flat, todo = [], list(args)
+            while todo:
+                arg = todo.pop()
+                if arg.op == op and arg.args:
+                    todo.extend(arg.args)
+                else:
+                    flat.append(arg)
+            t, f = walk(flat.pop())
+            for arg in flat:
+                t2, f2 = walk(arg)
+                if op == '&':
+                    t, f = t & t2, f | f2
+                else:
+                    t, f = t | t2, f & f2
+            result = (t, f)
+        elif op in ('>>', '<<') and len(args) == 2:
+            (t1, f1), (t2, f2) = walk(args[0]), walk(args[1])
+            if op == '<<':
+                (t1, f1), (t2, f2) = (t2, f2), (t1, f1)
+            result = (f1 | t2, t1 & f2)
+        elif op in ('<=>', '^') and len(args) == 2:
+            (t1, f1), (t2, f2) = walk(args[0]), walk(args[1])
+            same, different = (t1 & t2) | (f1 & f2), (t1 & f2) | (f1 & t2)
+            result = (same, different) if op == '<=>' else (different, same)
+        else:
+            raise ValueError("illegal operator in logic expression %s" % e)
+        memo[key] = result
+        return result
+
+    return walk(sentence)
+
+def evaluate_bitsets(sentence, bitsets, nmodels, known=None):
+    """Evaluate sentence in nmodels models at once.  bitsets maps each
+    symbol to its values as a python int (bit m is the value in model m) or
+    as a numpy uint64 array packed by pack_bits.  known optionally maps
+    symbols to a bitset of the models where that symbol has a value; by
+    default every value is known.  Returns the (true, false) bitsets.
+    """
+    sample = next(iter(bitsets.values()), 0) if bitsets else 0
+    if numpy is not None and isinstance(sample, numpy.ndarray):
+        ones = pack_bits(numpy.ones(nmodels, dtype=bool))
+        zeros = numpy.zeros_like(ones)
+    else:
+        ones, zeros = (1 << nmodels) - 1, 0
+    planes = {}
+    for symbol, bits in bitsets.items():
+        mask = ones if known is None else known.get(symbol, ones) & ones
+        planes[symbol] = (bits & mask, (ones ^ bits) & mask)
+    return evaluate_planes(sentence, planes, ones, zeros)
+
+def evaluate_matrix(sentence, models, symbols, known=None):
+    """Evaluate sentence in every row of models, a numpy bool matrix with
+    one row per model and one column per symbol (in the order given by
+    symbols).  known is an optional bool matrix of the same shape, False
+    where a value is unknown (None).  Returns a pair of bool vectors
+    (true, false); rows where both are False are the ones pl_true would
+    answer None for.
+    """
+    _require_numpy('evaluate_matrix')
+    models = numpy.asarray(models, dtype=bool)
+    ones = numpy.ones(models.shape[0], dtype=bool)
+    zeros = ~ones
+    planes = {}
+    for j, symbol in enumerate(symbols):
+        column = models[:, j]
+        if known is None:
+            planes[symbol] = (column, ~column)
+        else:
+            mask = numpy.asarray(known, dtype=bool)[:, j]
+            planes[symbol] = (column & mask, ~column & mask)
+    return evaluate_planes(sentence, planes, ones, zeros)
+
+def pack_bits(column):
+    """Pack a numpy bool vector into uint64 words, 64 models per word."""
+    _require_numpy('pack_bits')
+    column = numpy.asarray(column, dtype=bool)
+    padded = numpy.zeros(-(-len(column) // 64) * 64, dtype=bool)
+    padded[:len(column)] = column
+    return numpy.packbits(padded).view(numpy.uint64)
+
+def unpack_bits(words, nmodels):
+    "Inverse of pack_bits: a bool vector of the first nmodels bits."
+    _require_numpy('unpack_bits')
+    bits = numpy.unpackbits(numpy.asarray(words, dtype=numpy.uint64)
+                            .view(numpy.uint8))
+    return bits[:nmodels].astype(bool)
+
+def count_bits(bits):
+    "The number of set bits in a python int, uint64 array or bool array."
+    if numpy is not None and isinstance(bits, numpy.ndarray):
+        if bits.dtype == bool:
+            return int(numpy.count_nonzero(bits))
+        return int(numpy.unpackbits(bits.view(numpy.uint8)).sum())
+    return bin(bits).count('1')
+
+def enumeration_bitsets(k):
+    """Bitsets that enumerate all 2**k assignments to k symbols: bit m of
+    the i'th bitset is bit i of m.  So model m gives symbol i the value
+    (m >> i) & 1.
+    >>> [bin(b) for b in enumeration_bitsets(2)]
+    ['0b1010', '0b1100']
+    """
+    width = 1 << k
+    result = []
+    for i in range(k):
+        run = 1 << i
+        pattern, length = ((1 << run) - 1) << run, 2 * run
+        while length < width:
+            pattern |= pattern << length
+            length *= 2
+        result.append(pattern)
+    return result
+
+def sample_model_count(sentence, samples=1 << 16, seed=None):
+    """Estimate the number of models of sentence over its propositional
+    symbols from `samples` uniformly random assignments, evaluated as one
+    batch.  When there are no more assignments than samples, every
+    assignment is enumerated instead and the count is exact.
+    """
+    symbols = prop_symbols(sentence)
+    n = len(symbols)
+    if (1 << n) <= samples:
+        samples = 1 << n
+        bitsets = dict(zip(symbols, enumeration_bitsets(n)))
+    else:
+        rng = random.Random(seed)
+        bitsets = dict([(s, rng.getrandbits(samples)) for s in symbols])
+    true, false = evaluate_bitsets(sentence, bitsets, samples)
+    return count_bits(true) * float(1 << n) / samples
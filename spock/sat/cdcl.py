@@ -0,0 +1,529 @@
+""" spock.sat.cdcl
+
+    A conflict-driven clause-learning SAT solver in the MiniSat mould:
+    two watched literals per clause, first-UIP learning with clause
+    minimization, VSIDS variable activities with phase saving, Luby
+    restarts, and periodic deletion of learnt clauses with a high literal
+    block distance (LBD).
+
+    The solver is incremental: clauses can be added between calls to
+    solve(), learnt clauses are kept, solve() takes assumptions (literals
+    that hold for that call only), and push()/pop() bracket clauses that
+    should be dropped again.  When the assumptions make the clauses
+    unsatisfiable, failed is the subset of them that was needed.
+
+    Given a proof writer (spock.sat.drat.DRATWriter), the solver streams a
+    DRAT proof: every learnt clause, every deleted one, and the empty
+    clause once the clauses are refuted.  Without one, the only cost is a
+    test per learnt clause.
+
+    Given a budget (spock.budget.Budget), the solver spends conflicts,
+    decisions (as nodes) and propagations (as inferences) from it, and
+    solve() raises BudgetExceeded when it runs out, leaving the solver
+    ready for another call.
+
+    Clauses come in as DIMACS-style ints (see spock.sat.clausedb).  Inside
+    the solver, variable v's literals are encoded as 2*v (v true) and
+    2*v + 1 (v false), so the complement of a literal is lit ^ 1 and
+    values can be kept in one list indexed by literal.
+"""
+import heapq
+
+from spock.budget import BudgetExceeded
+
+def luby(i):
+    """The i'th term (from 0) of the Luby sequence 1 1 2 1 1 2 4 1 1 2 ...
+    used to space out restarts."""
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i = i % size
+    return 1 << seq
+
+def _encode(lit):
+    return 2 * lit if lit > 0 else -2 * lit + 1
+
+def _decode(code):
+    return -(code >> 1) if code & 1 else code >> 1
+
+class Solver(object):
+    """A CDCL solver over DIMACS-style int clauses.
+        >>> s = Solver([[1, 2], [-1, 2], [-2, 3]])
+        >>> s.solve()
+        True
+        >>> s.model[2], s.model[3]
+        (True, True)
+        >>> s.solve([-3]), s.failed
+        (False, [-3])
+        >>> s.push(); s.add_clause([-3]); s.solve()
+        False
+        >>> s.pop(); s.solve()
+        True
+    After solve() returns True, model is a list indexed by variable of
+    True/False values (slot 0 is unused).
+    """
+
+    restart_base = 100      ## conflicts in the first restart interval
+    var_decay = 0.95
+    learnt_factor = 1.0 / 3 ## first learnt-clause budget, per input clause
+    min_learnts = 1000
+    learnt_growth = 1.1
+
+    def __init__(self, clauses=(), proof=None, stats=None, budget=None):
+        self.proof = proof
+        self.stats = stats          ## a spock.sat.stats.SolverStats
+        self.budget = budget        ## a spock.budget.Budget
+        self.nvars = 0
+        self.val = [None, None]     ## literal -> True/False/None
+        self.level = [0]            ## variable -> decision level
+        self.reason = [None]        ## variable -> implying clause
+        self.activity = [0.0]
+        self.polarity = [True]      ## variable -> last value (as "negated?")
+        self.seen = [False]
+        self.watches = [[], []]     ## literal -> clauses watching it
+        self.clauses, self.learnts = [], []
+        self.lbd = {}               ## id(learnt clause) -> its LBD
+        self.trail, self.trail_lim = [], []
+        self.qhead = 0
+        self.heap = []
+        self.var_inc = 1.0
+        self.ok = True
+        self.model = None
+        self.failed = []
+        self.scopes = []            ## activation variables of push()
+        self.guards = set()         ## every activation variable ever made
+        self.conflicts = self.decisions = self.propagations = 0
+        self.restarts = self.learned = self.deleted = 0
+        self.max_learnts = 0
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def new_var(self):
+        "Add a variable and return its number."
+        self.nvars += 1
+        v = self.nvars
+        self.val.extend([None, None])
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.polarity.append(True)
+        self.seen.append(False)
+        self.watches.extend([[], []])
+        heapq.heappush(self.heap, (0.0, v))
+        return v
+
+    def reserve(self, n):
+        "Make sure variables 1..n exist."
+        while self.nvars < n:
+            self.new_var()
+
+    def add_clause(self, lits):
+        """Add a clause of DIMACS ints.  Returns False if the clauses are
+        now known to be unsatisfiable.  Inside push() the clause only lasts
+        until the matching pop().  Raises ValueError if the clause mentions
+        one of push()'s activation variables."""
+        lits = list(lits)
+        self._check_guards(lits)
+        return self._add_clause(lits)
+
+    def _check_guards(self, lits):
+        if self.guards and self.guards.intersection(map(abs, lits)):
+            raise ValueError("variables %s are push() activation variables; "
+                             "reserve() the problem's variables before push()"
+                             % sorted(self.guards.intersection(map(abs, lits))))
+
+    def _add_clause(self, lits):
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+        if lits:
+            self.reserve(max(map(abs, lits)))
+        if self.scopes:
+            lits.append(-self.scopes[-1])
+        val = self.val
+        clause = []
+        for lit in lits:
+            code = _encode(lit)
+            if val[code] is True or (code ^ 1) in clause:
+                return True     ## satisfied at the top level, or tautology
+            if val[code] is None and code not in clause:
+                clause.append(code)
+        if not clause:
+            self.refute()
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            if self.propagate() is not None:
+                self.refute()
+        else:
+            self.clauses.append(clause)
+            self.watches[clause[0]].append(clause)
+            self.watches[clause[1]].append(clause)
+        return self.ok
+
+    def push(self):
+        """Open a scope: clauses added from now on are dropped by the
+        matching pop().  They are guarded by a fresh activation variable
+        that solve() assumes true while the scope is open.  That variable
+        is the next free one, so reserve() the problem's variables first:
+        clauses and assumptions that mention it raise ValueError."""
+        guard = self.new_var()
+        self.guards.add(guard)
+        self.scopes.append(guard)
+
+    def pop(self):
+        "Close the innermost scope, dropping the clauses added inside it."
+        scope = self.scopes.pop()
+        self._add_clause([-scope])
+
+    def refute(self):
+        "The clauses are unsatisfiable: note it, and end the proof."
+        self.ok = False
+        if self.proof is not None:
+            self.proof.add([])
+
+    def value(self, lit):
+        "The value of a DIMACS literal in the current assignment."
+        return self.val[_encode(lit)]
+
+    def decision_level(self):
+        return len(self.trail_lim)
+
+    def enqueue(self, code, reason):
+        v = code >> 1
+        self.val[code] = True
+        self.val[code ^ 1] = False
+        self.level[v] = len(self.trail_lim)
+        self.reason[v] = reason
+        self.trail.append(code)
+
+    def cancel_until(self, level):
+        "Undo every assignment made above the given decision level."
+        if len(self.trail_lim) <= level:
+            return
+        val, polarity, reason = self.val, self.polarity, self.reason
+        activity, heap = self.activity, self.heap
+        trail = self.trail
+        for k in xrange(len(trail) - 1, self.trail_lim[level] - 1, -1):
+            code = trail[k]
+            v = code >> 1
+            val[code] = val[code ^ 1] = None
+            reason[v] = None
+            polarity[v] = bool(code & 1)
+            heapq.heappush(heap, (-activity[v], v))
+        del trail[self.trail_lim[level]:]
+        del self.trail_lim[level:]
+        self.qhead = len(trail)
+
+    def propagate(self):
+        """Unit propagation over the watch lists.  Returns a conflicting
+        clause, or None."""
+        val, watches, trail = self.val, self.watches, self.trail
+        level = len(self.trail_lim)
+        levels, reasons = self.level, self.reason
+        while self.qhead < len(trail):
+            false_lit = trail[self.qhead] ^ 1
+            self.qhead += 1
+            self.propagations += 1
+            ws = watches[false_lit]
+            i = j = 0
+            n = len(ws)
+            while i < n:
+                c = ws[i]
+                i += 1
+                if c[0] == false_lit:
+                    c[0], c[1] = c[1], false_lit
+                first = c[0]
+                if val[first] is True:
+                    ws[j] = c
+                    j += 1
+                    continue
+                for k in xrange(2, len(c)):
+                    if val[c[k]] is not False:
+                        c[1], c[k] = c[k], false_lit
+                        watches[c[1]].append(c)
+                        break
+                else:
+                    ws[j] = c
+                    j += 1
+                    if val[first] is False:
+                        while i < n:
+                            ws[j] = ws[i]
+                            j += 1
+                            i += 1
+                        del ws[j:]
+                        self.qhead = len(trail)
+                        return c
+                    v = first >> 1
+                    val[first] = True
+                    val[first ^ 1] = False
+                    levels[v] = level
+                    reasons[v] = c
+                    trail.append(first)
+            del ws[j:]
+        return None
+
+    def bump_var(self, v):
+        activity = self.activity
+        activity[v] += self.var_inc
+        if activity[v] > 1e100:
+            for u in range(1, self.nvars + 1):
+                activity[u] *= 1e-100
+            self.var_inc *= 1e-100
+            self.rebuild_heap()
+        elif self.val[2 * v] is None:
+            heapq.heappush(self.heap, (-activity[v], v))
+
+    def rebuild_heap(self):
+        activity, val = self.activity, self.val
+        self.heap = [(-activity[v], v) for v in range(1, self.nvars + 1)
+                     if val[2 * v] is None]
+        heapq.heapify(self.heap)
+
+    def analyze(self, confl):
+        """First-UIP conflict analysis.  Returns the learnt clause (its
+        asserting literal first, a literal of the backjump level second)
+        and the level to backjump to."""
+        seen, level, reason, trail = self.seen, self.level, self.reason, self.trail
+        current = len(self.trail_lim)
+        learnt = [None]
+        path = 0
+        p = None
+        index = len(trail) - 1
+        while True:
+            for q in (confl if p is None else confl[1:]):
+                v = q >> 1
+                if not seen[v] and level[v] > 0:
+                    seen[v] = True
+                    self.bump_var(v)
+                    if level[v] >= current:
+                        path += 1
+                    else:
+                        learnt.append(q)
+            while not seen[trail[index] >> 1]:
+                index -= 1
+            p = trail[index]
+            index -= 1
+            confl = reason[p >> 1]
+            seen[p >> 1] = False
+            path -= 1
+            if path == 0:
+                break
+        learnt[0] = p ^ 1
+
+        ## drop literals implied by the rest of the clause
+        kept = [learnt[0]]
+        for q in learnt[1:]:
+            r = reason[q >> 1]
+            if r is None or any(not seen[x >> 1] and level[x >> 1] > 0
+                                for x in r[1:]):
+                kept.append(q)
+        for q in learnt[1:]:
+            seen[q >> 1] = False
+        learnt = kept
+
+        if len(learnt) == 1:
+            return learnt, 0
+        best = 1
+        for k in range(2, len(learnt)):
+            if level[learnt[k] >> 1] > level[learnt[best] >> 1]:
+                best = k
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, level[learnt[1] >> 1]
+
+    def learn(self, clause):
+        "Record a learnt clause and assert its first literal."
+        self.learned += 1
+        if self.proof is not None:
+            self.proof.add(clause)
+        if len(clause) == 1:
+            self.enqueue(clause[0], None)
+            return
+        level = self.level
+        self.lbd[id(clause)] = len(set([level[q >> 1] for q in clause]))
+        self.learnts.append(clause)
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+        self.enqueue(clause[0], clause)
+
+    def reduce_learnts(self):
+        """Forget the half of the learnt clauses with the worst LBD, except
+        those that are the reason for a current assignment."""
+        reason, lbd = self.reason, self.lbd
+        locked = set([id(reason[code >> 1]) for code in self.trail
+                      if reason[code >> 1] is not None])
+        ranked = sorted(self.learnts, key=lambda c: (lbd[id(c)], len(c)))
+        half = len(ranked) // 2
+        keep = ranked[:half]
+        for c in ranked[half:]:
+            if id(c) in locked or lbd[id(c)] <= 2:
+                keep.append(c)
+            else:
+                del lbd[id(c)]
+                self.deleted += 1
+                if self.proof is not None:
+                    self.proof.delete(c)
+        self.learnts = keep
+        watches = self.watches = [[] for _ in range(2 * self.nvars + 2)]
+        for c in self.clauses:
+            watches[c[0]].append(c)
+            watches[c[1]].append(c)
+        for c in keep:
+            watches[c[0]].append(c)
+            watches[c[1]].append(c)
+
+    def pick_branch(self):
+        "The unassigned literal with the highest activity, or None."
+        heap, val = self.heap, self.val
+        if len(heap) > 4 * self.nvars + 64:
+            self.rebuild_heap()
+            heap = self.heap
+        while heap:
+            v = heapq.heappop(heap)[1]
+            if val[2 * v] is None:
+                return 2 * v + self.polarity[v]
+        return None
+
+    def analyze_final(self, code):
+        """The assumptions (as codes) that force code, the complement of a
+        failed assumption, plus that assumption itself."""
+        failed = [code ^ 1]
+        if not self.trail_lim:
+            return failed
+        seen, level, reason, trail = self.seen, self.level, self.reason, self.trail
+        seen[code >> 1] = True
+        for k in xrange(len(trail) - 1, self.trail_lim[0] - 1, -1):
+            x = trail[k]
+            v = x >> 1
+            if seen[v]:
+                r = reason[v]
+                if r is None:
+                    if level[v] > 0:
+                        failed.append(x)
+                else:
+                    for q in r[1:]:
+                        if level[q >> 1] > 0:
+                            seen[q >> 1] = True
+                seen[v] = False
+        seen[code >> 1] = False
+        return failed
+
+    def search(self, nconflicts, assumptions=()):
+        """Search until a model is found (True), the clauses are refuted
+        (False), or nconflicts conflicts have happened (None).  The
+        assumptions (codes) are decided first, one per decision level."""
+        conflicts = 0
+        val, budget = self.val, self.budget
+        charged = self.propagations     ## propagations spent from budget
+        while True:
+            confl = self.propagate()
+            if confl is not None:
+                self.conflicts += 1
+                if self.stats is not None:
+                    self.stats.tick(self)
+                if budget is not None:
+                    budget.spend('inferences', self.propagations - charged)
+                    charged = self.propagations
+                    budget.spend('conflicts')
+                conflicts += 1
+                if not self.trail_lim:
+                    return False
+                learnt, back = self.analyze(confl)
+                self.cancel_until(back)
+                self.learn(learnt)
+                self.var_inc /= self.var_decay
+            else:
+                if conflicts >= nconflicts:
+                    self.cancel_until(0)
+                    return None
+                if len(self.learnts) - len(self.trail) >= self.max_learnts:
+                    self.reduce_learnts()
+                    self.max_learnts *= self.learnt_growth
+                code = None
+                while len(self.trail_lim) < len(assumptions):
+                    p = assumptions[len(self.trail_lim)]
+                    if val[p] is True:
+                        self.trail_lim.append(len(self.trail))
+                    elif val[p] is False:
+                        self.failed = self.analyze_final(p ^ 1)
+                        return False
+                    else:
+                        code = p
+                        break
+                if code is None:
+                    code = self.pick_branch()
+                    if code is None:
+                        return True
+                self.decisions += 1
+                if budget is not None:
+                    budget.spend('inferences', self.propagations - charged)
+                    charged = self.propagations
+                    budget.spend('nodes')
+                self.trail_lim.append(len(self.trail))
+                self.enqueue(code, None)
+
+    def solve(self, assumptions=()):
+        """Decide the clauses added so far, with the assumptions (DIMACS
+        literals) taken to be true: True (see model) or False (see failed).
+        Learnt clauses are kept, so clauses can be added and solve() called
+        again."""
+        assumptions = list(assumptions)
+        self._check_guards(assumptions)
+        self.model = None
+        self.failed = []
+        if not self.ok:
+            return False
+        for lit in assumptions:
+            self.reserve(abs(lit))
+        codes = [2 * v for v in self.scopes] + map(_encode, assumptions)
+        self.cancel_until(0)
+        if self.propagate() is not None:
+            self.refute()
+            if self.stats is not None:
+                self.stats.update(self)
+            return False
+        self.max_learnts = max(len(self.clauses) * self.learnt_factor,
+                               self.min_learnts)
+        if self.budget is not None:
+            self.budget.check()
+        restart = 0
+        try:
+            while True:
+                result = self.search(luby(restart) * self.restart_base, codes)
+                if result is not None:
+                    break
+                restart += 1
+                self.restarts += 1
+        except BudgetExceeded:
+            self.cancel_until(0)
+            if self.stats is not None:
+                self.stats.update(self)
+            raise
+        if result:
+            val = self.val
+            self.model = [None] + [val[2 * v] for v in range(1, self.nvars + 1)]
+        elif self.failed:
+            scopes = set(self.scopes)
+            self.failed = [lit for lit in map(_decode, self.failed)
+                           if lit not in scopes]
+        else:
+            self.refute()
+        self.cancel_until(0)
+        if self.stats is not None:
+            self.stats.update(self)
+        return result
+
+def solve(clauses, proof=None, stats=None, budget=None):
+    """Satisfiability of a ClauseDB (or any iterable of DIMACS-int clauses
+    over variables 1..n): a model indexed by variable, or False.  proof is
+    an optional DRAT proof writer, stats an optional SolverStats and
+    budget an optional Budget."""
+    solver = Solver(clauses, proof, stats, budget)
+    nvars = getattr(clauses, 'nvars', 0)
+    solver.reserve(nvars)
+    if solver.solve():
+        return solver.model
+    return False
@@ -0,0 +1,166 @@
+""" spock.sat.clausedb
+
+    Integer-encoded clause storage for the propositional engines.
+"""
+from array import array
+
+from spock.aima.logic import (Expr, TRUE, FALSE, NaryExpr, is_prop_symbol,
+                              conjuncts, disjuncts, to_cnf)
+
+def constant_value(lit):
+    """True or False if lit is TRUE or FALSE under any number of negations
+    (to_cnf leaves ~TRUE and ~FALSE alone), else None."""
+    value = True
+    while lit.op == '~':
+        lit, value = lit.args[0], not value
+    if lit == TRUE:
+        return value
+    if lit == FALSE:
+        return not value
+    return None
+
+class ClauseDB(object):
+    """A propositional clause store in the style of DIMACS: variables are
+    numbered from 1, a literal is +v or -v, and clauses are kept back to
+    back in one flat array('i').  Clause i is lits[offsets[i]:offsets[i+1]].
+
+    Symbols (any Expr that prop_symbols would return) are mapped to
+    variable ids on the way in and back again on the way out, so Exprs only
+    appear at the API boundary:
+
+        >>> db = ClauseDB([expr('A & (B | ~C)')])
+        >>> list(db.clause(1))
+        [2, -3]
+        >>> db.to_expr(1)
+        (B | ~C)
+    """
+
+    def __init__(self, sentences=()):
+        self.symbols = [None]  ## variable id -> symbol; id 0 is unused
+        self.ids = {}          ## symbol -> variable id
+        self.lits = array('i')
+        self.offsets = array('i', [0])
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        lits, offsets = self.lits, self.offsets
+        for i in range(len(offsets) - 1):
+            yield lits[offsets[i]:offsets[i + 1]]
+
+    @property
+    def nvars(self):
+        return len(self.symbols) - 1
+
+    def clause(self, i):
+        "The literals of clause i, as an array('i')."
+        return self.lits[self.offsets[i]:self.offsets[i + 1]]
+
+    def var(self, symbol):
+        "The variable id for symbol, allocating a new one if needed."
+        v = self.ids.get(symbol)
+        if v is None:
+            v = self.ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return v
+
+    def literal(self, lit):
+        "Encode a literal Expr such as P or ~P as a signed int."
+        if lit.op == '~':
+            return -self.literal(lit.args[0])
+        if not is_prop_symbol(lit.op):
+            raise ValueError("not a propositional literal: %s" % lit)
+        return self.var(lit)
+
+    def to_literal(self, lit):
+        "Decode a signed int into a literal Expr."
+        if lit < 0:
+            return Expr('~', self.symbols[-lit])
+        return self.symbols[lit]
+
+    def add_clause(self, literals):
+        """Add a clause given as ints and return its index.  Repeated
+        literals are dropped; variables must already exist."""
+        seen = set()
+        lits = self.lits
+        for lit in literals:
+            if lit not in seen:
+                seen.add(lit)
+                lits.append(lit)
+        self.offsets.append(len(lits))
+        return len(self.offsets) - 2
+
+    def add_clauses(self, clauses):
+        """Add clauses given as sequences of ints, as add_clause does, and
+        return the index of the first one."""
+        first = len(self)
+        for clause in clauses:
+            self.add_clause(clause)
+        return first
+
+    def add_expr(self, clause):
+        """Add a clause given as a disjunction of literal Exprs and return
+        its index, or None if the clause is trivially true (it contains
+        TRUE or ~FALSE, or a literal and its negation)."""
+        ints = []
+        for lit in disjuncts(clause):
+            value = constant_value(lit)
+            if value is True:
+                return None
+            if value is None:
+                ints.append(self.literal(lit))
+        if set(ints).intersection([-lit for lit in ints]):
+            return None
+        return self.add_clause(ints)
+
+    def tell(self, sentence, method='distribute'):
+        """Convert sentence to CNF (with the to_cnf method given), add its
+        clauses, and return the list of indices they were stored at."""
+        added = []
+        for clause in conjuncts(to_cnf(sentence, method)):
+            i = self.add_expr(clause)
+            if i is not None:
+                added.append(i)
+        return added
+
+    def to_expr(self, i):
+        "Clause i as a disjunction of literal Exprs."
+        return NaryExpr('|', *[self.to_literal(lit) for lit in self.clause(i)])
+
+    def sentences(self):
+        "All clauses as a list of Exprs."
+        return [self.to_expr(i) for i in range(len(self))]
+
+    def model_to_expr(self, assignment):
+        """Decode an assignment into a model keyed by symbol.  The assignment
+        is indexed by variable id (slot 0 is ignored), or is a dict of
+        {variable id: value}; unassigned (None) variables are left out."""
+        if isinstance(assignment, dict):
+            items = assignment.iteritems()
+        else:
+            items = enumerate(assignment)
+        symbols = self.symbols
+        return dict([(symbols[v], value) for v, value in items
+                     if v and value is not None])
+
+    def model_from_expr(self, model):
+        """Encode a {symbol: value} model as a list indexed by variable id;
+        symbols the model does not mention are None."""
+        return [None] + [model.get(symbol) for symbol in self.symbols[1:]]
+
+    def evaluate(self, i, assignment):
+        """Truth value of clause i under an assignment indexed by variable
+        id: True, False, or None if it is not decided yet."""
+        lits = self.lits
+        result = False
+        for k in range(self.offsets[i], self.offsets[i + 1]):
+            lit = lits[k]
+            value = assignment[lit if lit > 0 else -lit]
+            if value is None:
+                result = None
+            elif value == (lit > 0):
+                return True
+        return result
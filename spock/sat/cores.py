@@ -0,0 +1,123 @@
+""" spock.sat.cores
+
+    Explain why a set of sentences has no model: an unsatisfiable core (a
+    subset that is already inconsistent) and a minimal unsatisfiable subset
+    (MUS: a core in which every member is needed).
+
+        >>> x = CoreExtractor()
+        >>> for s in map(expr, ['A', 'A ==> B', 'C', '~B', 'B | C']):
+        ...     x.add(s)
+        >>> x.mus()
+        [A, (A >> B), ~B]
+
+    Each item is told to one IncrementalSolver under its own selector (a
+    guard), and a solve() that assumes all the selectors fails on some of
+    them: those are the core.  The MUS is found by deletion: each member
+    of the core is dropped in turn, and put back for good if what is left
+    becomes satisfiable.  When it stays unsatisfiable, the solver's new
+    failed set is a core of what is left, so every member outside it is
+    dropped at once (clause-set refinement).  That usually takes far fewer
+    calls than there are items, and the solver keeps what it learns from
+    one call to the next.
+
+    The hard sentences are always in force and never part of an answer.
+    Items can be anything (a told sentence, a dependency entry); the
+    answers are lists of items, in the order they were added.
+"""
+import itertools
+
+from spock.aima.logic import Expr, is_variable, subst, variables
+from spock.sat.incremental import IncrementalSolver
+
+class CoreExtractor(object):
+    """Items, each a group of sentences behind its own selector, on top
+    of hard sentences."""
+
+    def __init__(self, hard=(), cnf='tseitin'):
+        self.solver = IncrementalSolver(hard, cnf)
+        self.items = []
+        self.guards = []
+        self.calls = 0
+
+    def add(self, item, sentences=None):
+        """Add item, standing for sentences (by default, item itself is
+        the one sentence)."""
+        if sentences is None:
+            sentences = [item]
+        guard = self.solver.new_guard()
+        for sentence in sentences:
+            self.solver.tell(sentence, guard)
+        self.items.append(item)
+        self.guards.append(guard)
+
+    def _failed(self, guards):
+        "The subset of guards to blame if they are unsatisfiable, or None."
+        self.calls += 1
+        if self.solver.solve((), guards) is not False:
+            return None
+        blamed = set(self.solver.engine.failed)
+        return [guard for guard in guards if guard in blamed]
+
+    def _items(self, guards):
+        chosen = set(guards)
+        return [item for item, guard in zip(self.items, self.guards)
+                if guard in chosen]
+
+    def core(self):
+        """Some inconsistent subset of the items (empty if the hard
+        sentences are inconsistent on their own), or None if there is a
+        model."""
+        core = self._failed(self.guards)
+        if core is None:
+            return None
+        return self._items(core)
+
+    def mus(self):
+        "A minimal inconsistent subset of the items, or None."
+        core = self._failed(self.guards)
+        if core is None:
+            return None
+        needed = []
+        while core:
+            candidate = core.pop()
+            failed = self._failed(needed + core)
+            if failed is None:
+                needed.append(candidate)
+            else:
+                keep = set(failed)
+                core = [guard for guard in core if guard in keep]
+        return self._items(needed)
+
+def unsat_core(soft, hard=(), minimal=True, cnf='tseitin'):
+    """A subset of the sentences in soft that is inconsistent with the
+    hard sentences (a minimal one, unless minimal is False), or None if
+    they are all consistent together."""
+    extractor = CoreExtractor(hard, cnf)
+    for sentence in soft:
+        extractor.add(sentence)
+    return extractor.mus() if minimal else extractor.core()
+
+def constants(sentences):
+    "The constants used as arguments in the atoms of sentences."
+    found = set()
+    todo = list(sentences)
+    while todo:
+        s = todo.pop()
+        if not isinstance(s, Expr):
+            continue
+        if s.op in ('~', '&', '|', '>>', '<<', '<=>', '^'):
+            todo.extend(s.args)
+            continue
+        for arg in s.args:
+            if isinstance(arg, Expr) and not arg.args and not is_variable(arg):
+                found.add(arg)
+    return found
+
+def ground(sentence, constants):
+    "Every instance of sentence with its variables replaced by constants."
+    names = sorted(variables(sentence), key=str)
+    if not names:
+        return [sentence]
+    constants = sorted(constants, key=str)
+    return [subst(dict(zip(names, values)), sentence)
+            for values in itertools.product(constants, repeat=len(names))]
@@ -0,0 +1,170 @@
+""" spock.sat.counting
+
+    Exact (weighted) model counting, for knowledge bases far too big to
+    enumerate with tt_check_all:
+
+        >>> count_models(expr('A | B'))
+        3
+        >>> count_models(expr('A | B'), {A: 0.5, ~A: 0.5, B: 0.1, ~B: 0.9})
+        0.55
+
+    The counter is a DPLL search over DIMACS-int clauses, in the style of
+    Cachet and sharpSAT.  After unit propagation the remaining clauses are
+    split into connected components (clauses that share no variable), each
+    component is counted on its own and the counts multiplied.  Component
+    counts are cached under the component's canonical clause set (a
+    frozenset of frozensets, so the same clauses in any order hit the same
+    entry), and a variable that drops out of every clause counts both of
+    its values.
+
+    With weights, each model counts the product of the weights of its
+    literals instead of 1; literals without a weight weigh 1.  Tseitin
+    variables are fully defined by their clauses, so they neither change
+    the count nor need a weight.
+"""
+from spock.aima.logic import Expr, prop_symbols
+from spock.sat.clausedb import ClauseDB
+
+class ModelCounter(object):
+    """Counts models of clauses (lists of DIMACS ints).  weights maps
+    DIMACS literals to weights; the cache is kept between calls to count(),
+    so counting several related clause sets reuses shared components."""
+
+    def __init__(self, weights=None):
+        self.weights = weights or {}
+        self.cache = {}
+        self.hits = self.decisions = 0
+
+    def weight(self, lit):
+        return self.weights.get(lit, 1)
+
+    def free(self, v):
+        "The weight of a variable that no clause constrains."
+        return self.weight(v) + self.weight(-v)
+
+    def count(self, clauses, variables):
+        """The weighted count of the assignments to variables (an iterable of
+        variable numbers, which must include every variable of the clauses)
+        that satisfy the clauses."""
+        clauses = set(frozenset(c) for c in clauses)
+        if any(not c for c in clauses):
+            return 0
+        clauses = frozenset(c for c in clauses
+                            if not any(-lit in c for lit in c))
+        return self._count(clauses, frozenset(variables))
+
+    def _count(self, clauses, variables):
+        "Count clauses over variables, by components."
+        total = 1
+        constrained = set()
+        for component in self.components(clauses):
+            constrained.update(abs(lit) for c in component for lit in c)
+            total *= self._component(component)
+            if not total:
+                return 0
+        for v in variables:
+            if v not in constrained:
+                total *= self.free(v)
+        return total
+
+    def _component(self, clauses):
+        "The count of one connected component, over exactly its variables."
+        result = self.cache.get(clauses)
+        if result is not None:
+            self.hits += 1
+            return result
+        variables = set(abs(lit) for c in clauses for lit in c)
+        v = self.pick(clauses)
+        self.decisions += 1
+        result = 0
+        for lit in (v, -v):
+            assigned, rest = self.propagate(clauses, lit)
+            if assigned is None:
+                continue
+            weight = 1
+            for x in assigned:
+                weight *= self.weight(x)
+            result += weight * self._count(
+                rest, variables.difference(abs(x) for x in assigned))
+        self.cache[clauses] = result
+        return result
+
+    def pick(self, clauses):
+        "Branch on the variable that occurs most often, preferring short clauses."
+        score = {}
+        for c in clauses:
+            bonus = 1.0 / len(c)
+            for lit in c:
+                v = abs(lit)
+                score[v] = score.get(v, 0) + 1 + bonus
+        return max(score, key=score.get)
+
+    def propagate(self, clauses, lit):
+        """Make lit true and propagate units.  Returns the literals made true
+        and the remaining clauses, or (None, None) on a conflict."""
+        occurs = {}
+        for c in clauses:
+            for x in c:
+                occurs.setdefault(x, []).append(c)
+        assigned = set([lit])
+        queue = [lit]
+        while queue:
+            for c in occurs.get(-queue.pop(), ()):
+                if not c.isdisjoint(assigned):
+                    continue
+                free = [x for x in c if -x not in assigned]
+                if not free:
+                    return None, None
+                if len(free) == 1:
+                    assigned.add(free[0])
+                    queue.append(free[0])
+        falsified = set(-x for x in assigned)
+        return assigned, frozenset(c - falsified for c in clauses
+                                   if c.isdisjoint(assigned))
+
+    def components(self, clauses):
+        "Split clauses into sets that share no variables."
+        occurs = {}
+        for c in clauses:
+            for lit in c:
+                occurs.setdefault(abs(lit), []).append(c)
+        seen = set()
+        for c in clauses:
+            if c in seen:
+                continue
+            seen.add(c)
+            component, todo, done = [c], [c], set()
+            while todo:
+                for lit in todo.pop():
+                    v = abs(lit)
+                    if v in done:
+                        continue
+                    done.add(v)
+                    for d in occurs[v]:
+                        if d not in seen:
+                            seen.add(d)
+                            component.append(d)
+                            todo.append(d)
+            yield frozenset(component)
+
+def count_models(sentences, weights=None, symbols=(), cnf='tseitin'):
+    """The number of models of sentences (a sentence, a list of them, or a
+    PropKB) over their symbols and any extra symbols given, or their total
+    weight if weights (a dict from literals such as A and ~A to numbers)
+    is given."""
+    if isinstance(sentences, Expr):
+        sentences = [sentences]
+    else:
+        sentences = getattr(sentences, '_clauses', sentences)
+    db = ClauseDB()
+    for symbol in symbols:
+        db.var(symbol)
+    for s in sentences:
+        for symbol in prop_symbols(s):
+            db.var(symbol)
+        db.tell(s, cnf)
+    ints = {}
+    for lit, weight in (weights or {}).items():
+        ints[db.literal(lit)] = weight
+    counter = ModelCounter(ints)
+    return counter.count(db, range(1, db.nvars + 1))
@@ -0,0 +1,193 @@
+""" spock.sat.cube
+
+    Cube-and-conquer: a lookahead pass splits the formula into cubes
+    (conjunctions of decision literals), and a multiprocessing pool of CDCL
+    solvers conquers them independently.  The first cube found
+    satisfiable ends the search and the pool is terminated; the formula is
+    unsatisfiable when every cube is.
+
+    The lookahead picks each splitting variable by propagating both of its
+    literals and scoring how much each one implies (the product of the two
+    counts, as in march), which tends to give balanced cubes.  A literal
+    whose propagation fails prunes its half of the tree right away.
+
+    Workers get the clauses once, as the two flat int arrays of a ClauseDB,
+    when the pool starts, and keep one incremental solver each: a cube is
+    just a list of assumptions, so what a worker learns on one cube helps
+    it with the next.
+"""
+import math
+import multiprocessing
+import time
+from array import array
+
+from spock.sat import cdcl
+
+class Lookahead(object):
+    """Unit propagation over int clauses, for choosing cubes."""
+
+    candidates = 16     ## variables to look ahead on at each split
+
+    def __init__(self, clauses, nvars):
+        self.clauses = [list(c) for c in clauses]
+        self.nvars = nvars
+        self.occurs = {}
+        for i, clause in enumerate(self.clauses):
+            for lit in clause:
+                self.occurs.setdefault(lit, []).append(i)
+
+    def propagate(self, implied, lits):
+        """The literals implied by implied (a set of literals) and lits
+        together, or None if they lead to a conflict."""
+        implied = set(implied)
+        queue = []
+        for lit in lits:
+            if -lit in implied:
+                return None
+            if lit not in implied:
+                implied.add(lit)
+                queue.append(lit)
+        clauses, occurs = self.clauses, self.occurs
+        while queue:
+            for i in occurs.get(-queue.pop(), ()):
+                free = None
+                count = 0
+                for x in clauses[i]:
+                    if x in implied:
+                        count = -1
+                        break
+                    if -x not in implied:
+                        count += 1
+                        free = x
+                if count == 0:
+                    return None
+                if count == 1:
+                    implied.add(free)
+                    queue.append(free)
+        return implied
+
+    def choose(self, implied):
+        """The variable to split on under implied, or None if there are no
+        open clauses left."""
+        score = {}
+        for clause in self.clauses:
+            if any(x in implied for x in clause):
+                continue
+            for x in clause:
+                if -x not in implied:
+                    score[abs(x)] = score.get(abs(x), 0) + 1
+        if not score:
+            return None
+        candidates = sorted(score, key=score.get, reverse=True)
+        best, chosen = None, None
+        for v in candidates[:self.candidates]:
+            positive = self.propagate(implied, [v])
+            negative = self.propagate(implied, [-v])
+            if positive is None or negative is None:
+                return v    ## a failed literal: one branch is free
+            h = (len(positive) - len(implied), len(negative) - len(implied))
+            h = h[0] * h[1] + h[0] + h[1]
+            if best is None or h > best:
+                best, chosen = h, v
+        return chosen
+
+    def cubes(self, depth):
+        "Split into at most 2**depth cubes, dropping refuted ones."
+        result = []
+        root = self.propagate(set(), [])
+        if root is None:
+            return result
+        todo = [(root, [], depth)]
+        while todo:
+            implied, cube, d = todo.pop()
+            v = self.choose(implied) if d else None
+            if v is None:
+                result.append(cube)
+                continue
+            for lit in (-v, v):
+                below = self.propagate(implied, [lit])
+                if below is not None:
+                    todo.append((below, cube + [lit], d - 1))
+        return result
+
+## the worker's solver, built once per process by _start_worker
+_solver = None
+
+def _start_worker(lits, offsets, nvars):
+    global _solver
+    _solver = cdcl.Solver(lits[offsets[i]:offsets[i + 1]]
+                          for i in range(len(offsets) - 1))
+    _solver.reserve(nvars)
+
+def _conquer(cube):
+    if _solver.solve(cube):
+        return _solver.model
+    return False
+
+def _flatten(clauses):
+    "The (lits, offsets) arrays of a ClauseDB, or of a list of clauses."
+    if hasattr(clauses, 'offsets'):
+        return clauses.lits, clauses.offsets
+    lits, offsets = array('i'), array('i', [0])
+    for clause in clauses:
+        lits.extend(clause)
+        offsets.append(len(lits))
+    return lits, offsets
+
+## seconds between budget checks while waiting for the workers
+poll_interval = 0.05
+
+def solve(clauses, workers=None, depth=None, budget=None):
+    """Satisfiability of a ClauseDB (or a list of DIMACS-int clauses) by
+    cube-and-conquer on a pool of workers processes (by default one per
+    CPU): a model indexed by variable, or False.  depth bounds the cubes
+    at 2**depth; the default gives each worker about eight.
+    budget (a spock.budget.Budget) is checked for its time limit and for
+    cancellation while the workers run, and the pool is terminated when
+    it raises BudgetExceeded; its counters only cover the sequential
+    solver (workers=1), since the workers' searches run elsewhere."""
+    lits, offsets = _flatten(clauses)
+    nvars = getattr(clauses, 'nvars', None)
+    if nvars is None:
+        nvars = max([0] + [abs(lit) for lit in lits])
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers <= 1:
+        return cdcl.solve(clauses, budget=budget)
+    if depth is None:
+        depth = int(math.ceil(math.log(workers, 2))) + 3
+    lookahead = Lookahead([lits[offsets[i]:offsets[i + 1]]
+                           for i in range(len(offsets) - 1)], nvars)
+    if [] in lookahead.clauses:
+        return False
+    cubes = lookahead.cubes(depth)
+    if not cubes:
+        return False
+    if budget is not None:
+        budget.check()
+    pool = multiprocessing.Pool(workers, _start_worker, (lits, offsets, nvars))
+    try:
+        results = pool.imap_unordered(_conquer, cubes)
+        for i in range(len(cubes)):
+            while True:
+                try:
+                    model = results.next(budget and poll_interval)
+                    break
+                except multiprocessing.TimeoutError:
+                    budget.check()
+            if model is not False:
+                return model
+        return False
+    finally:
+        pool.terminate()
+        pool.join()
+
+def benchmark(clauses, workers=(1, 2, 4), depth=None):
+    """Time the sequential solver (workers=1) against cube-and-conquer with
+    each number of workers.  Returns [(workers, seconds, satisfiable)]."""
+    results = []
+    for n in workers:
+        start = time.time()
+        model = solve(clauses, n, depth)
+        results.append((n, time.time() - start, model is not False))
+    return results
@@ -0,0 +1,125 @@
+""" spock.sat.dimacs
+
+    Read and write the DIMACS CNF format used by SAT competitions and most
+    other solvers:
+
+        c an optional comment
+        p cnf <variables> <clauses>
+        1 -2 0
+        2 3 -1 0
+
+    Files whose name ends in .gz (or that start with the gzip magic number)
+    are compressed and decompressed on the fly.  The reader streams clauses
+    into a ClauseDB in chunks, so even very large instances never turn into
+    one enormous Expr.
+
+    DIMACS only knows numbered variables.  The writer records the symbol
+    for each variable in comment lines of the form `c var <number> <name>`,
+    and the reader uses them when they are present; other variables are
+    named V1, V2, ...
+"""
+import gzip
+
+from spock.aima.logic import Expr, expr
+from spock.sat.clausedb import ClauseDB
+
+GZIP_MAGIC = '\x1f\x8b'
+
+def _open(source, mode):
+    "Open a filename (compressed if it ends in .gz) or pass a file through."
+    if not isinstance(source, basestring):
+        return source, False
+    if source.endswith('.gz'):
+        return gzip.open(source, mode), True
+    if 'r' in mode:
+        f = open(source, 'rb')
+        magic = f.read(2)
+        f.close()
+        if magic == GZIP_MAGIC:
+            return gzip.open(source, mode), True
+    return open(source, mode), True
+
+def _symbol(name):
+    "The symbol written as name, or a plain atom if it does not parse."
+    try:
+        return expr(name)
+    except SyntaxError:
+        return Expr(name)
+
+def read_dimacs(source, db=None, chunk_size=4096, name='V%d'):
+    """Read a DIMACS CNF file (a filename or an open file) into a ClauseDB
+    and return it.  Clauses are added to db if it is given, in which case
+    the file's variables are mapped onto db's symbols by name.  Clauses are
+    handed to the store chunk_size at a time.  Variables without a
+    `c var` comment are given the symbol name % number.
+    """
+    if db is None:
+        db = ClauseDB()
+    f, close = _open(source, 'rb')
+    names = {}
+    var = [0]   ## DIMACS variable number -> db variable id
+
+    def translate(lit):
+        v = lit if lit > 0 else -lit
+        while v >= len(var):
+            n = len(var)
+            var.append(db.var(names.get(n) or Expr(name % n)))
+        return var[v] if lit > 0 else -var[v]
+
+    try:
+        chunk, clause = [], []
+        for line in f:
+            if line[:1] == '%':
+                break   ## SATLIB's end-of-clauses marker
+            if line[:1] == 'c':
+                words = line.split(None, 3)
+                if len(words) == 4 and words[1] == 'var':
+                    names[int(words[2])] = _symbol(words[3].strip())
+                continue
+            if line[:1] == 'p':
+                words = line.split()
+                if len(words) != 4 or words[1] != 'cnf':
+                    raise ValueError("bad DIMACS problem line: %r" % line)
+                translate(int(words[2]))
+                continue
+            for lit in map(int, line.split()):
+                if lit:
+                    clause.append(translate(lit))
+                else:
+                    chunk.append(clause)
+                    clause = []
+                    if len(chunk) >= chunk_size:
+                        db.add_clauses(chunk)
+                        chunk = []
+        if clause:
+            chunk.append(clause)
+        db.add_clauses(chunk)
+    finally:
+        if close:
+            f.close()
+    return db
+
+def write_dimacs(clauses, target, comments=True):
+    """Write clauses in DIMACS CNF to target (a filename or an open file).
+    clauses is a ClauseDB, a PropKB (its clauses are written), or a list
+    of sentences.  With comments, a `c var` line names the symbol behind
+    each variable so read_dimacs can restore them.  Returns the ClauseDB
+    that was written.
+    """
+    if not isinstance(clauses, ClauseDB):
+        db = ClauseDB()
+        for sentence in getattr(clauses, '_clauses', clauses):
+            db.tell(sentence)
+        clauses = db
+    f, close = _open(target, 'wb')
+    try:
+        if comments:
+            for v in range(1, clauses.nvars + 1):
+                f.write('c var %d %s\n' % (v, clauses.symbols[v]))
+        f.write('p cnf %d %d\n' % (clauses.nvars, len(clauses)))
+        for clause in clauses:
+            f.write(' '.join(map(str, clause)) + ' 0\n')
+    finally:
+        if close:
+            f.close()
+    return clauses
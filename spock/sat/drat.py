@@ -0,0 +1,360 @@
+""" spock.sat.drat
+
+    DRAT proofs of unsatisfiability: a writer the CDCL solver streams its
+    learnt and deleted clauses to, and a checker for the result.
+
+        >>> db = ClauseDB([expr('(A | B) & (A | ~B) & (~A | B) & (~A | ~B)')])
+        >>> solver = cdcl.Solver(db, proof=DRATWriter('/tmp/proof.drat'))
+        >>> solver.solve(); solver.proof.close()
+        False
+        >>> check_drat(db, '/tmp/proof.drat')
+        True
+
+    A proof is a sequence of lemmas (added clauses) and deletions.  Each
+    lemma must be RUP (unit propagation on the clauses so far, plus the
+    negation of the lemma, gives a conflict) or RAT on its first literal,
+    and the proof ends with the empty clause.  The text format writes one
+    clause per line ending in 0, with deletions prefixed by "d".  The
+    binary format writes 'a' or 'd' and then each literal l as a
+    variable-length integer 2*|l| + (l < 0), ending in 0.  That is exactly
+    the solver's internal literal code, so binary output needs no
+    translation and is about half the size of text.
+
+    The checker works forward (every lemma is checked when it is added) or
+    backward, as drat-trim does.  Backward first replays the whole proof,
+    then walks it in reverse and checks only the lemmas that the final
+    conflict (and the lemmas already checked) actually depend on.  Like
+    drat-trim, it ignores deletions of unit clauses.
+"""
+
+class DRATWriter(object):
+    """Buffered proof output to a filename or an open file.  The solver
+    calls add() and delete() with clauses of literal codes (2*v for v,
+    2*v + 1 for ~v).  Call close() (or flush()) when done."""
+
+    def __init__(self, target, binary=False, buffer_size=1 << 16):
+        if isinstance(target, basestring):
+            self.file, self.owned = open(target, 'wb'), True
+        else:
+            self.file, self.owned = target, False
+        self.binary = binary
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.size = 0
+        self.lemmas = self.deletions = 0
+
+    def _write(self, chunk):
+        self.buffer.append(chunk)
+        self.size += len(chunk)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def _encode(self, tag, clause):
+        if self.binary:
+            out = bytearray(tag)
+            for code in clause:
+                while code > 127:
+                    out.append(code & 127 | 128)
+                    code >>= 7
+                out.append(code)
+            out.append(0)
+            return str(out)
+        lits = ' '.join([str(code >> 1) if not code & 1 else '-%d' % (code >> 1)
+                         for code in clause])
+        prefix = 'd ' if tag == 'd' else ''
+        return '%s%s%s0\n' % (prefix, lits, ' ' if lits else '')
+
+    def add(self, clause):
+        self.lemmas += 1
+        self._write(self._encode('a', clause))
+
+    def delete(self, clause):
+        self.deletions += 1
+        self._write(self._encode('d', clause))
+
+    def flush(self):
+        self.file.write(''.join(self.buffer))
+        self.file.flush()
+        self.buffer, self.size = [], 0
+
+    def close(self):
+        self.flush()
+        if self.owned:
+            self.file.close()
+
+def read_proof(source, binary=None):
+    """The steps of a DRAT proof in a file (a filename or an open file) as
+    a list of (tag, clause) pairs, tag 'a' or 'd' and clause a tuple of
+    DIMACS ints.  binary=None guesses the format from the content."""
+    if hasattr(source, 'read'):
+        data = source.read()
+    else:
+        f = open(source, 'rb')
+        try:
+            data = f.read()
+        finally:
+            f.close()
+    if binary is None:
+        binary = any(ord(c) > 127 or (c < ' ' and c not in '\n\r\t')
+                     for c in data[:512])
+    steps = []
+    if binary:
+        data = bytearray(data)
+        i, n = 0, len(data)
+        while i < n:
+            tag = chr(data[i])
+            i += 1
+            if tag not in 'ad':
+                raise ValueError("bad binary DRAT step at byte %d" % (i - 1))
+            clause = []
+            while True:
+                code, shift = 0, 0
+                while True:
+                    byte = data[i]
+                    i += 1
+                    code |= (byte & 127) << shift
+                    shift += 7
+                    if not byte & 128:
+                        break
+                if code == 0:
+                    break
+                clause.append(-(code >> 1) if code & 1 else code >> 1)
+            steps.append((tag, tuple(clause)))
+        return steps
+    for line in data.splitlines():
+        words = line.split()
+        if not words or words[0] == 'c':
+            continue
+        tag = 'a'
+        if words[0] == 'd':
+            tag, words = 'd', words[1:]
+        lits = map(int, words)
+        if not lits or lits[-1] != 0:
+            raise ValueError("DRAT line does not end in 0: %r" % line)
+        steps.append((tag, tuple(lits[:-1])))
+    return steps
+
+class DRATChecker(object):
+    """Checks DRAT proofs against a formula (a ClauseDB or a list of
+    DIMACS-int clauses) with watched-literal unit propagation."""
+
+    def __init__(self, clauses):
+        self.clauses = []       ## id -> list of literals (watched first)
+        self.active = []
+        self.marked = []
+        self.watches = {}
+        self.ids = {}           ## sorted literal tuple -> ids of copies
+        self.units = []         ## ids of unit clauses (active or not)
+        self.empty = False
+        self.original = 0
+        for clause in clauses:
+            self.add(clause)
+        self.original = len(self.clauses)
+
+    def add(self, lits):
+        clause = []
+        for lit in lits:
+            if lit not in clause:
+                clause.append(lit)
+        i = len(self.clauses)
+        self.clauses.append(clause)
+        self.active.append(True)
+        self.marked.append(False)
+        self.ids.setdefault(tuple(sorted(clause)), []).append(i)
+        self._watch(i)
+        return i
+
+    def _watch(self, i):
+        clause = self.clauses[i]
+        if len(clause) == 1:
+            self.units.append(i)
+        elif not clause:
+            self.empty = True
+        for lit in clause[:2]:
+            self.watches.setdefault(lit, []).append(i)
+
+    def find(self, lits):
+        "The id of an active clause with exactly lits, or None."
+        for i in self.ids.get(tuple(sorted(set(lits))), ()):
+            if self.active[i]:
+                return i
+        return None
+
+    def propagate(self, assumed):
+        """Unit-propagate the active clauses with the assumed literals true.
+        Returns the id of a conflicting clause (-1 if the assumptions
+        contradict each other), or None; reason and trail are left set."""
+        value = self.value = {}
+        reason = self.reason = {}
+        trail = self.trail = []
+        clauses, active, watches = self.clauses, self.active, self.watches
+
+        def assign(lit, why):
+            value[abs(lit)] = lit > 0
+            reason[abs(lit)] = why
+            trail.append(lit)
+
+        for lit in assumed:
+            current = value.get(abs(lit))
+            if current is None:
+                assign(lit, None)
+            elif current != (lit > 0):
+                self.conflict_lit = lit
+                return -1
+        for i in self.units:
+            if active[i]:
+                lit = clauses[i][0]
+                current = value.get(abs(lit))
+                if current is None:
+                    assign(lit, i)
+                elif current != (lit > 0):
+                    return i
+        head = 0
+        while head < len(trail):
+            false = -trail[head]
+            head += 1
+            ws = watches.get(false)
+            if not ws:
+                continue
+            j = 0
+            k = 0
+            while k < len(ws):
+                i = ws[k]
+                k += 1
+                clause = clauses[i]
+                if not active[i] or len(clause) < 2 or \
+                        false not in (clause[0], clause[1]):
+                    continue    ## a stale watch: drop it
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                if value.get(abs(first)) == (first > 0):
+                    ws[j] = i
+                    j += 1
+                    continue
+                for m in range(2, len(clause)):
+                    lit = clause[m]
+                    if value.get(abs(lit)) != (lit < 0):
+                        clause[1], clause[m] = lit, false
+                        watches.setdefault(lit, []).append(i)
+                        break
+                else:
+                    ws[j] = i
+                    j += 1
+                    if value.get(abs(first)) is None:
+                        assign(first, i)
+                    else:
+                        ws[j:] = ws[k:]
+                        return i
+            del ws[j:]
+        return None
+
+    def mark(self, conflict):
+        "Mark the clauses the last conflict depends on."
+        todo = []
+        if conflict == -1:
+            todo.append(abs(self.conflict_lit))
+        else:
+            self.marked[conflict] = True
+            todo.extend(abs(lit) for lit in self.clauses[conflict])
+        seen = set()
+        reason, clauses, marked = self.reason, self.clauses, self.marked
+        while todo:
+            v = todo.pop()
+            if v in seen:
+                continue
+            seen.add(v)
+            i = reason.get(v)
+            if i is not None:
+                marked[i] = True
+                todo.extend(abs(lit) for lit in clauses[i])
+
+    def rup(self, lemma, mark=False):
+        conflict = self.propagate([-lit for lit in lemma])
+        if conflict is None:
+            return False
+        if mark:
+            self.mark(conflict)
+        return True
+
+    def rat(self, lemma, mark=False):
+        "Is lemma a resolution asymmetric tautology on its first literal?"
+        if not lemma:
+            return False
+        pivot = lemma[0]
+        for i, clause in enumerate(self.clauses):
+            if self.active[i] and -pivot in clause:
+                resolvent = list(lemma) + [lit for lit in clause
+                                           if lit != -pivot]
+                if any(-lit in resolvent for lit in resolvent):
+                    continue
+                if not self.rup(resolvent, mark):
+                    return False
+                if mark:
+                    self.marked[i] = True
+        return True
+
+    def check(self, proof, backward=True, binary=None):
+        """Is proof (see read_proof) a valid refutation of the formula?
+        After a successful backward check, core lists the ids of the
+        original clauses the refutation used."""
+        steps = proof if isinstance(proof, list) else read_proof(proof, binary)
+        self.core = []
+        if self.empty:
+            return True
+        if not backward:
+            for tag, lemma in steps:
+                if tag == 'd':
+                    self._delete(lemma)
+                    continue
+                if not (self.rup(lemma) or self.rat(lemma)):
+                    return False
+                self.add(lemma)
+                if not lemma:
+                    return True
+            return self.empty or self.propagate([]) is not None
+        ## replay everything, then check what the final conflict needs
+        done = []   ## (tag, clause id) in order
+        for tag, lemma in steps:
+            if tag == 'd':
+                i = self._delete(lemma)
+                if i is not None:
+                    done.append(('d', i))
+                continue
+            i = self.add(lemma)
+            done.append(('a', i))
+            if not lemma:
+                break
+        if self.empty:
+            last = done.pop()   ## the empty clause itself
+            self.active[last[1]] = False
+        conflict = self.propagate([])
+        if conflict is None:
+            return False
+        self.mark(conflict)
+        for tag, i in reversed(done):
+            if tag == 'd':
+                self.active[i] = True
+                self._watch(i)
+                continue
+            self.active[i] = False
+            if self.marked[i]:
+                lemma = self.clauses[i]
+                if not (self.rup(lemma, True) or self.rat(lemma, True)):
+                    return False
+        self.core = [i for i in range(self.original) if self.marked[i]]
+        return True
+
+    def _delete(self, lemma):
+        if len(set(lemma)) == 1:
+            return None     ## unit deletions are ignored
+        i = self.find(lemma)
+        if i is not None:
+            self.active[i] = False
+        return i
+
+def check_drat(clauses, proof, backward=True, binary=None):
+    """Check a DRAT proof (a filename, an open file or a list of steps)
+    that clauses (a ClauseDB or a list of DIMACS clauses) are
+    unsatisfiable."""
+    return DRATChecker(clauses).check(proof, backward, binary)
@@ -0,0 +1,118 @@
+""" spock.sat.incremental
+
+    An Expr-level front end to the incremental CDCL solver, for asking many
+    related questions of one set of sentences without starting over:
+
+        >>> solver = IncrementalSolver([expr('A ==> B'), expr('B ==> C')])
+        >>> solver.entails(expr('A ==> C'))
+        True
+        >>> solver.push(); solver.tell(expr('A & ~C')); solver.solve()
+        False
+        >>> solver.pop(); solver.solve([expr('A')])
+        {A: True, B: True, C: True}
+
+    Learnt clauses survive from one call to the next.  Assumptions may be
+    any sentences: compound ones are named with a Tseitin literal whose
+    definition is added to the solver for good (definitions do not change
+    what the other sentences mean), and the literal is assumed.
+"""
+from spock.aima.logic import (Expr, conjuncts, disjuncts, to_cnf,
+                              tseitin_literal, is_tseitin_symbol)
+from spock.sat.cdcl import Solver
+from spock.sat.clausedb import ClauseDB, constant_value
+
+class IncrementalSolver(object):
+    """Sentences told to this solver stay until the scope they were told
+    in is popped.  Guards give finer control: a clause told with a guard
+    only holds in the solve() calls that pass the guard in guards, and
+    release(guard) drops it for good."""
+
+    def __init__(self, sentences=(), cnf='tseitin'):
+        self.cnf = cnf
+        self.db = ClauseDB()    ## the symbol <-> variable mapping
+        self.engine = Solver()
+        self.definitions = set()
+        self.failed = []
+        self.scopes = []        ## guards of the open push() scopes
+        self._guards = 0
+        self._false = None
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def _add(self, clause, guards=()):
+        ints = []
+        for lit in disjuncts(clause):
+            value = constant_value(lit)
+            if value is True:
+                return
+            if value is None:
+                ints.append(self.db.literal(lit))
+        self.engine.add_clause(ints + [-guard for guard in guards])
+
+    def tell(self, sentence, guard=None):
+        "Add the clauses of sentence, guarded by guard if one is given."
+        guards = self.scopes[-1:]
+        if guard is not None:
+            guards.append(guard)
+        for clause in conjuncts(to_cnf(sentence, self.cnf)):
+            self._add(clause, guards)
+
+    def new_guard(self):
+        "A new guard (a variable number) for tell() and solve()."
+        self._guards += 1
+        return self.db.var(('guard', self._guards))
+
+    def release(self, guard):
+        "Drop the clauses told with guard, for good."
+        self.engine.add_clause([-guard])
+
+    def push(self):
+        "Open a scope for the sentences told until the matching pop()."
+        self.scopes.append(self.new_guard())
+
+    def pop(self):
+        "Forget the sentences told since the matching push()."
+        self.release(self.scopes.pop())
+
+    def assume(self, sentence):
+        "The DIMACS literal to assume for sentence."
+        literal, definitions = tseitin_literal(sentence)
+        for clause in definitions:
+            if clause not in self.definitions:
+                self.definitions.add(clause)
+                self._add(clause)
+        sign = 1
+        while literal.op == '~':
+            literal, sign = literal.args[0], -sign
+        if literal.op not in ('TRUE', 'FALSE'):
+            return sign * self.db.literal(literal)
+        if self._false is None:
+            self._false = self.db.var(('false',))
+            self.engine.add_clause([-self._false])
+        return sign * (-self._false if literal.op == 'TRUE' else self._false)
+
+    def solve(self, assumptions=(), guards=()):
+        """Look for a model of the told sentences in which every assumption
+        (a sentence) holds, with the clauses of the given guards active.
+        Returns the model (without auxiliary symbols) or False; after
+        False, failed lists the assumptions that were to blame."""
+        lits = [self.assume(sentence) for sentence in assumptions]
+        self.failed = []
+        self.engine.reserve(self.db.nvars)
+        if self.engine.solve(self.scopes + list(guards) + lits):
+            return self.model()
+        blamed = set(self.engine.failed)
+        self.failed = [sentence for sentence, lit in zip(assumptions, lits)
+                       if lit in blamed]
+        return False
+
+    def model(self):
+        "The last model found, keyed by the told sentences' symbols."
+        values, symbols = self.engine.model, self.db.symbols
+        return dict([(symbols[v], values[v]) for v in range(1, len(symbols))
+                     if isinstance(symbols[v], Expr)
+                     and not is_tseitin_symbol(symbols[v])])
+
+    def entails(self, sentence, guards=()):
+        "Do the told sentences entail sentence?"
+        return self.solve([Expr('~', sentence)], guards) is False
@@ -0,0 +1,149 @@
+""" spock.sat.maxsat
+
+    Weighted partial MaxSAT: find a model of the hard sentences that
+    minimizes the total weight of the soft sentences it falsifies.
+
+        >>> m = MaxSAT([expr('A ==> B')])
+        >>> m.add_soft(expr('A'), 3); m.add_soft(expr('~B'), 1)
+        >>> ppsubst(m.solve()[0]), m.cost
+        ({A: True, B: True}, 1)
+
+    Each soft sentence is told to an IncrementalSolver under its own guard
+    b, so b implies the sentence and ~b marks it as given up.  The search
+    is linear SAT-UNSAT: every model found gives an upper bound k on the
+    cost, and the next call asks for a model of cost below k, until there
+    is none.  The bound is a pseudo-Boolean constraint on the ~b literals,
+    encoded once as a generalized totalizer (Joshi et al. 2015): a tree of
+    nodes whose outputs o_s mean "the violated weight below this node is
+    at least s".  Sums are capped at the first cost found, so the encoding
+    never has more outputs per node than there are distinct sums below
+    it; for unit weights that is the plain totalizer.  Tightening the bound
+    to k only adds the clauses ~o_s for s >= k (guarded, so they go away
+    when solve() returns), and the solver keeps what it has learnt from
+    one bound to the next.  More sentences can be added between calls.
+    The totalizer is kept for later calls too, behind a guard of its own;
+    it is only released and rebuilt when soft sentences have been added
+    or a bound goes past its cap.
+"""
+from spock.aima.logic import pl_true
+from spock.sat.incremental import IncrementalSolver
+
+class MaxSAT(object):
+    """Hard sentences must hold; soft sentences (each with a positive
+    weight) should.  After solve(), model and cost hold the best solution
+    found (model is False if the hard sentences are unsatisfiable)."""
+
+    def __init__(self, hard=(), soft=(), cnf='tseitin'):
+        self.solver = IncrementalSolver(hard, cnf)
+        self.soft = []          ## (sentence, weight, guard)
+        self.model = self.cost = None
+        self.calls = 0
+        self.outputs = None     ## the totalizer's {sum: variable}
+        self.encoding = None    ## (guard, number of soft sentences, cap)
+        for sentence, weight in soft:
+            self.add_soft(sentence, weight)
+
+    def add_hard(self, sentence):
+        self.solver.tell(sentence)
+
+    def add_soft(self, sentence, weight=1):
+        if weight <= 0:
+            raise ValueError("soft sentences need a positive weight: %r"
+                             % (weight,))
+        guard = self.solver.new_guard()
+        self.solver.tell(sentence, guard)
+        self.soft.append((sentence, weight, guard))
+
+    def violated(self, model):
+        "The total weight of the soft sentences model falsifies."
+        return sum(weight for sentence, weight, guard in self.soft
+                   if not pl_true(sentence, model))
+
+    def _solve(self, guards=()):
+        self.calls += 1
+        guards = [self.scope] + list(guards)
+        if self.encoding is not None:
+            guards.append(self.encoding[0])
+        return self.solver.solve(guards=guards)
+
+    def solve(self, callback=None):
+        """Find an optimal model and return (model, cost); (False, None) if
+        the hard sentences have no model.  callback(model, cost), if
+        given, is called with each improving solution as it is found, so
+        an interrupted search still leaves its best answer behind."""
+        self.model = self.cost = None
+        self.scope = self.solver.new_guard()    ## guards this call's bounds
+        try:
+            return self._search(callback)
+        finally:
+            self.solver.release(self.scope)
+
+    def _search(self, callback):
+        guards = [guard for sentence, weight, guard in self.soft]
+        model = self._solve(guards)
+        if model is False:
+            model = self._solve()
+            if model is False:
+                self.model = False
+                return False, None
+        while True:
+            cost = self.violated(model)
+            self.model, self.cost = model, cost
+            if callback is not None:
+                callback(model, cost)
+            if cost == 0:
+                break
+            self.bound(cost)
+            model = self._solve()
+            if model is False:
+                break
+        return self.model, self.cost
+
+    def bound(self, k):
+        """Allow only models whose violated weight is below k, until solve()
+        returns."""
+        if (self.encoding is None or self.encoding[1] != len(self.soft)
+                or self.encoding[2] < k):
+            if self.encoding is not None:
+                self.solver.release(self.encoding[0])
+            guard = self.solver.new_guard()
+            self.outputs = self.totalizer(k, guard)
+            self.encoding = (guard, len(self.soft), k)
+        engine = self.solver.engine
+        for s, lit in self.outputs.items():
+            if s >= k:
+                engine.add_clause([-lit, -self.scope])
+
+    def totalizer(self, cap, guard):
+        """Encode the violated weight as a generalized totalizer with sums
+        capped at cap, its clauses guarded by guard, and return the root's
+        outputs {sum: variable}."""
+        engine, output = self.solver.engine, self.solver.new_guard
+        nodes = [{min(weight, cap): -guard}
+                 for sentence, weight, guard in self.soft]
+        while len(nodes) > 1:
+            merged = []
+            for i in range(0, len(nodes) - 1, 2):
+                left, right = nodes[i], nodes[i + 1]
+                sums = {}
+                for a, la in left.items() + [(0, None)]:
+                    for b, lb in right.items() + [(0, None)]:
+                        s = min(a + b, cap)
+                        if s == 0:
+                            continue
+                        if s not in sums:
+                            sums[s] = output()
+                        engine.add_clause([-lit for lit in (la, lb)
+                                           if lit is not None]
+                                          + [sums[s], -guard])
+                merged.append(sums)
+            if len(nodes) % 2:
+                merged.append(nodes[-1])
+            nodes = merged
+        engine.reserve(self.solver.db.nvars)
+        return nodes[0] if nodes else {}
+
+def maxsat(hard, soft, callback=None, cnf='tseitin'):
+    """Solve a weighted partial MaxSAT problem: hard is a list of sentences,
+    soft a list of (sentence, weight) pairs.  Returns (model, cost)."""
+    return MaxSAT(hard, soft, cnf).solve(callback)
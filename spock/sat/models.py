@@ -0,0 +1,48 @@
+""" spock.sat.models
+
+    Enumerate the models of a propositional sentence lazily, with the CDCL
+    solver and blocking clauses:
+
+        >>> for model in iter_models(expr('A | B')):
+        ...     ppsubst(model)
+        {A: True, B: False}
+        {A: False, B: True}
+        {A: True, B: True}
+
+    (the order depends on the solver's heuristics).  After each model, a
+    clause ruling out its projection is added and the solver, with all it
+    has learnt so far, is asked again.  Only the blocking clauses are kept,
+    never the models themselves.
+"""
+from spock.aima.logic import Expr, prop_symbols, is_tseitin_symbol
+from spock.sat.cdcl import Solver
+from spock.sat.clausedb import ClauseDB
+
+def iter_models(sentence, limit=None, project=None, cnf='tseitin'):
+    """Generate the models of sentence (or of a list of sentences), each a
+    dict {symbol: value}, until there are no more or limit have been
+    generated.  With project (a list of symbols), models are restricted to
+    those symbols and each restriction is generated once; symbols that do
+    not occur in the sentence take both values.  By default every symbol of
+    the sentence is projected onto.  cnf is the to_cnf method.
+    """
+    sentences = [sentence] if isinstance(sentence, Expr) else list(sentence)
+    if project is None:
+        project = []
+        for s in sentences:
+            project.extend(sym for sym in prop_symbols(s)
+                           if not is_tseitin_symbol(sym) and sym not in project)
+    db = ClauseDB()
+    variables = [db.var(symbol) for symbol in project]
+    for s in sentences:
+        db.tell(s, cnf)
+    solver = Solver(db)
+    solver.reserve(db.nvars)
+    count = 0
+    while limit is None or count < limit:
+        if not solver.solve():
+            return
+        values = solver.model
+        yield dict((symbol, values[v]) for symbol, v in zip(project, variables))
+        count += 1
+        solver.add_clause([-v if values[v] else v for v in variables])
@@ -0,0 +1,173 @@
+""" spock.sat.portfolio
+
+    Race several propositional engines on the same clauses, each in its own
+    process, and take the first definitive answer:
+
+        >>> p = Portfolio(timeout=10)
+        >>> p.solve(ClauseDB([expr('(A | B) & ~A')]))
+        [None, False, True]
+        >>> p.timings
+        [('cdcl', 0.01, 'sat'), ('walksat seed=1', 0.01, 'killed'), ...]
+
+    A model or False from any engine settles the question and the other
+    processes are terminated.  WalkSAT can only ever say "satisfiable", so
+    when it gives up its process just ends.  If nothing definitive arrives
+    within the wall-clock timeout, solve() returns None.  An engine that
+    crashes sends its traceback back instead of an answer; if no engine
+    answers definitively, solve() raises EngineError with it.
+
+    Every solve() records how long each engine ran and how it ended in
+    timings; history accumulates the wins per engine over the life of the
+    Portfolio, to help pick which engines should run by default.
+"""
+import multiprocessing
+import Queue
+import time
+import traceback
+
+from spock.aima.logic import Expr
+from spock.sat import cdcl
+from spock.sat.clausedb import ClauseDB
+from spock.sat.walksat import walksat
+
+def _cdcl(db, **options):
+    solver = cdcl.Solver(db)
+    for name, value in options.items():
+        setattr(solver, name, value)
+    solver.reserve(db.nvars)
+    return solver.model if solver.solve() else False
+
+def _walksat(db, seed=None, p=0.5, max_flips=100000, max_tries=1000,
+             noise='fixed'):
+    return walksat(db, p, max_flips, max_tries, noise, seed)
+
+def _dpll(db):
+    from spock.aima.logic import dpll, prop_symbols
+    clauses = [db.to_expr(i) for i in range(len(db))]
+    model = dpll(clauses, prop_symbols(Expr('&', *clauses)), {})
+    if model is False:
+        return False
+    return [None] + [model.get(db.symbols[v], False)
+                     for v in range(1, db.nvars + 1)]
+
+## engine name -> function(db, **options) returning a model, False or None
+ENGINES = {'cdcl': _cdcl, 'walksat': _walksat, 'dpll': _dpll}
+
+class EngineError(RuntimeError):
+    """Raised by Portfolio.solve when an engine crashed and no engine gave
+    a definitive answer.  errors lists (engine label, traceback text)."""
+
+    def __init__(self, errors):
+        RuntimeError.__init__(self, '\n'.join(['engine %s failed:\n%s' % error
+                                               for error in errors]))
+        self.errors = errors
+
+def _race(index, engine, options, db, results):
+    start = time.time()
+    answer = error = None
+    try:
+        answer = ENGINES[engine](db, **options)
+    except Exception:
+        error = traceback.format_exc()
+    results.put((index, answer, time.time() - start, error))
+
+def _label(engine, options):
+    return ' '.join([engine] + ['%s=%s' % item for item in sorted(options.items())])
+
+class Portfolio(object):
+    """Runs engines, a list of (engine name, options) pairs, in parallel.
+    The default mixes CDCL (complete), the book's DPLL (complete, good on
+    small structured problems) and two differently seeded WalkSATs (fast
+    on satisfiable random problems)."""
+
+    engines = [('cdcl', {}),
+               ('walksat', {'seed': 1}),
+               ('walksat', {'seed': 2, 'noise': 'adaptive'}),
+               ('dpll', {})]
+
+    def __init__(self, engines=None, timeout=None):
+        if engines is not None:
+            self.engines = list(engines)
+        for engine, options in self.engines:
+            if engine not in ENGINES:
+                raise ValueError("unknown portfolio engine %r" % (engine,))
+        self.timeout = timeout
+        self.timings = []   ## (label, seconds, outcome) from the last solve
+        self.history = {}   ## label -> [wins, total seconds to win]
+        self.winner = None
+
+    def solve(self, clauses, timeout=None):
+        """A model (indexed by variable) of a ClauseDB or a list of DIMACS
+        clauses, False if there is none, or None if no engine could tell
+        within timeout seconds (the Portfolio's timeout by default).
+        Raises EngineError if an engine crashed and none could tell."""
+        if not isinstance(clauses, ClauseDB):
+            db = ClauseDB()
+            for clause in clauses:
+                for lit in clause:
+                    while db.nvars < abs(lit):
+                        db.var(Expr('V%d' % (db.nvars + 1)))
+            db.add_clauses(clauses)
+            clauses = db
+        if timeout is None:
+            timeout = self.timeout
+        results = multiprocessing.Queue()
+        labels = [_label(engine, options) for engine, options in self.engines]
+        processes = [multiprocessing.Process(target=_race,
+                                             args=(i, engine, options,
+                                                   clauses, results))
+                     for i, (engine, options) in enumerate(self.engines)]
+        start = time.time()
+        outcomes = dict((i, None) for i in range(len(processes)))
+        answer = None
+        errors = []
+        self.winner = None
+        try:
+            for process in processes:
+                process.daemon = True
+                process.start()
+            pending = len(processes)
+            while pending:
+                wait = None
+                if timeout is not None:
+                    wait = max(0, timeout - (time.time() - start))
+                try:
+                    index, result, seconds, error = results.get(timeout=wait)
+                except Queue.Empty:
+                    break
+                pending -= 1
+                if error is not None:
+                    errors.append((labels[index], error))
+                outcome = ('error' if error is not None else
+                           'sat' if result else
+                           'unsat' if result is False else 'unknown')
+                outcomes[index] = (seconds, outcome)
+                if result is not None:
+                    answer, self.winner = result, labels[index]
+                    wins = self.history.setdefault(labels[index], [0, 0.0])
+                    wins[0] += 1
+                    wins[1] += seconds
+                    break
+        finally:
+            elapsed = time.time() - start
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+        self.timings = [(labels[i], outcomes[i][0], outcomes[i][1])
+                        if outcomes[i] else (labels[i], elapsed, 'killed')
+                        for i in range(len(processes))]
+        if answer is None and errors:
+            raise EngineError(errors)
+        return answer
+
+def portfolio_satisfiable(s, cnf='distribute', engines=None, timeout=None):
+    """Check satisfiability of a sentence with a Portfolio: a model,
+    False, or None if no engine answered within timeout seconds."""
+    from spock.aima.logic import strip_tseitin
+    db = ClauseDB()
+    db.tell(s, cnf)
+    model = Portfolio(engines, timeout).solve(db)
+    if not model:
+        return model
+    return strip_tseitin(db.model_to_expr(model))
@@ -0,0 +1,377 @@
+""" spock.sat.preprocess
+
+    Simplify a CNF before it goes to a solver.  to_cnf (distribution in
+    particular) produces duplicate, tautological and subsumed clauses, and
+    many variables can be resolved away or shown equivalent cheaply.  The
+    Preprocessor works on DIMACS-style int clauses with occurrence lists:
+
+        units              top-level unit propagation
+        equivalences       literals in one strongly connected component of
+                           the binary implication graph are replaced by a
+                           representative
+        probing            failed-literal probing: if propagating l leads
+                           to a conflict, ~l holds; literals implied by
+                           both v and ~v hold too
+        subsumption        drop clauses that contain another clause, and
+                           strengthen clauses by self-subsuming resolution
+        elimination        bounded variable elimination: replace the
+                           clauses of v by their resolvents when that does
+                           not grow the formula
+
+    The result is equisatisfiable with the input.  extend() turns a model of
+    the simplified clauses back into a model of the original ones.
+    Variables that are frozen (say, ones a caller will assume or project
+    onto) are never eliminated or substituted away.
+"""
+
+class Preprocessor(object):
+    """Simplify clauses (lists of DIMACS ints over variables 1..nvars):
+        >>> pre = Preprocessor([[1, 2], [-1, 2], [-2, 3, 4], [-2, 3]])
+        >>> pre.run()
+        []
+        >>> pre.extend([None, False, False, False, False])
+        [None, False, True, True, False]
+    After run(), unsat is True if the clauses were refuted outright.
+    """
+
+    max_rounds = 5
+    max_resolvent = 20       ## longest resolvent elimination may add
+    max_elimination = 400    ## skip variables with more pairs than this
+    max_probes = 2000
+
+    def __init__(self, clauses, nvars=None, frozen=()):
+        self.clauses = []    ## index -> frozenset of literals, None if gone
+        self.occurs = {}     ## literal -> set of clause indices
+        self.index = {}      ## frozenset -> clause index, to drop repeats
+        self.fixed = {}      ## variable -> value, from units
+        self.removed = set() ## variables eliminated or substituted
+        self.stack = []      ## reconstruction steps, in order
+        self.frozen = set(abs(v) for v in frozen)
+        self.units = []
+        self.unsat = False
+        self.nvars = 0
+        for clause in clauses:
+            self.add_clause(clause)
+        if nvars is not None:
+            self.nvars = max(self.nvars, nvars)
+
+    ## Clause store
+
+    def add_clause(self, lits):
+        "Add a clause, simplified by the units found so far."
+        fixed = self.fixed
+        clause = set()
+        for lit in lits:
+            v = abs(lit)
+            self.nvars = max(self.nvars, v)
+            if v in fixed:
+                if fixed[v] == (lit > 0):
+                    return
+                continue
+            if -lit in clause:
+                return
+            clause.add(lit)
+        clause = frozenset(clause)
+        if not clause:
+            self.unsat = True
+            return
+        if clause in self.index:
+            return
+        if len(clause) == 1:
+            self.units.extend(clause)
+        i = len(self.clauses)
+        self.clauses.append(clause)
+        self.index[clause] = i
+        occurs = self.occurs
+        for lit in clause:
+            occurs.setdefault(lit, set()).add(i)
+
+    def remove_clause(self, i):
+        clause = self.clauses[i]
+        for lit in clause:
+            self.occurs[lit].discard(i)
+        del self.index[clause]
+        self.clauses[i] = None
+
+    def occ(self, lit):
+        return self.occurs.get(lit, ())
+
+    def live(self):
+        "Indices of the clauses still present."
+        return [i for i, c in enumerate(self.clauses) if c is not None]
+
+    ## Units
+
+    def assign(self, lit):
+        "Make lit true for good, simplifying the clauses it occurs in."
+        v = abs(lit)
+        if v in self.fixed:
+            if self.fixed[v] != (lit > 0):
+                self.unsat = True
+            return
+        self.fixed[v] = lit > 0
+        for i in list(self.occ(lit)):
+            self.remove_clause(i)
+        for i in list(self.occ(-lit)):
+            clause = self.clauses[i]
+            self.remove_clause(i)
+            self.add_clause(clause - set([-lit]))
+
+    def propagate_units(self):
+        while self.units and not self.unsat:
+            self.assign(self.units.pop())
+
+    ## Equivalent literals
+
+    def substitute_equivalences(self):
+        """Find the strongly connected components of the binary implication
+        graph (Tarjan's algorithm, iteratively) and replace each literal by
+        its component's representative."""
+        graph = {}
+        for c in self.clauses:
+            if c is not None and len(c) == 2:
+                a, b = c
+                graph.setdefault(-a, []).append(b)
+                graph.setdefault(-b, []).append(a)
+        index, low, on_stack, stack, components = {}, {}, set(), [], []
+        counter = [0]
+        for root in list(graph):
+            if root in index:
+                continue
+            work = [(root, iter(graph.get(root, ())))]
+            index[root] = low[root] = counter[0]
+            counter[0] += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = counter[0]
+                        counter[0] += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(graph.get(child, ()))))
+                        break
+                    elif child in on_stack:
+                        low[node] = min(low[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            lit = stack.pop()
+                            on_stack.discard(lit)
+                            component.append(lit)
+                            if lit == node:
+                                break
+                        if len(component) > 1:
+                            components.append(component)
+        replace, done = {}, set()
+        for component in components:
+            members = set(component)
+            if any(-lit in members for lit in component):
+                self.unsat = True
+                return False
+            if abs(component[0]) in done:
+                continue    ## the mirror image of a component already done
+            done.update(abs(lit) for lit in component)
+            frozen = [lit for lit in component if abs(lit) in self.frozen]
+            rep = min(frozen or component, key=abs)
+            for lit in component:
+                v = abs(lit)
+                if lit == rep or v in self.frozen or v in replace:
+                    continue
+                target = rep if lit > 0 else -rep
+                replace[v] = target
+                self.stack.append(('equiv', v, target))
+        if not replace:
+            return False
+        for v, target in replace.items():
+            self.removed.add(v)
+            for lit in (v, -v):
+                for i in list(self.occ(lit)):
+                    clause = self.clauses[i]
+                    self.remove_clause(i)
+                    self.add_clause([self._substitute(x, replace)
+                                     for x in clause])
+        return True
+
+    def _substitute(self, lit, replace):
+        target = replace.get(abs(lit))
+        while target is not None and abs(target) in replace:
+            target = replace[abs(target)] * (1 if target > 0 else -1)
+        if target is None:
+            return lit
+        return target if lit > 0 else -target
+
+    ## Failed literals
+
+    def probe(self, lit):
+        """Unit-propagate lit over the clauses: the set of literals it
+        implies, or None if it leads to a conflict."""
+        implied = set([lit])
+        queue = [lit]
+        clauses = self.clauses
+        while queue:
+            for i in self.occ(-queue.pop()):
+                free = None
+                count = 0
+                for x in clauses[i]:
+                    if x in implied:
+                        count = -1
+                        break
+                    if -x not in implied:
+                        count += 1
+                        free = x
+                if count == 0:
+                    return None
+                if count == 1:
+                    implied.add(free)
+                    queue.append(free)
+        return implied
+
+    def probe_failed_literals(self):
+        changed = False
+        variables = sorted(set(abs(lit) for lit, occ in self.occurs.items()
+                               if occ), key=lambda v: -len(self.occ(v)) -
+                           len(self.occ(-v)))
+        for v in variables[:self.max_probes]:
+            if v in self.fixed or self.unsat:
+                continue
+            positive = self.probe(v)
+            negative = self.probe(-v)
+            if positive is None and negative is None:
+                self.unsat = True
+                return True
+            if positive is None or negative is None:
+                self.units.append(-v if positive is None else v)
+            else:
+                self.units.extend(positive & negative)
+            if self.units:
+                changed = True
+                self.propagate_units()
+        return changed
+
+    ## Subsumption
+
+    def subsume(self):
+        """Remove subsumed clauses and strengthen clauses by self-subsuming
+        resolution, using the occurrence lists to find candidates."""
+        changed = False
+        clauses = self.clauses
+        for i in sorted(self.live(), key=lambda i: len(clauses[i])):
+            c = clauses[i]
+            if c is None:
+                continue
+            best = min(c, key=lambda lit: len(self.occ(lit)))
+            for j in list(self.occ(best)):
+                d = clauses[j]
+                if j != i and len(d) >= len(c) and c <= d:
+                    self.remove_clause(j)
+                    changed = True
+            for lit in c:
+                rest = c - set([lit])
+                for j in list(self.occ(-lit)):
+                    d = clauses[j]
+                    if d is not None and len(d) >= len(c) and rest <= d:
+                        self.remove_clause(j)
+                        self.add_clause(d - set([-lit]))
+                        changed = True
+                if clauses[i] is None:
+                    break
+        return changed
+
+    ## Variable elimination
+
+    def eliminate(self):
+        """Bounded variable elimination: resolve a variable away when its
+        resolvents are no more numerous than the clauses they replace."""
+        changed = False
+        occ = self.occ
+        candidates = sorted(set(abs(lit) for lit, o in self.occurs.items() if o),
+                            key=lambda v: len(occ(v)) * len(occ(-v)))
+        for v in candidates:
+            if v in self.frozen or v in self.fixed or self.unsat:
+                continue
+            pos, neg = list(occ(v)), list(occ(-v))
+            if not pos and not neg:
+                continue
+            if len(pos) * len(neg) > self.max_elimination:
+                continue
+            resolvents = set()
+            for i in pos:
+                for j in neg:
+                    r = (self.clauses[i] - set([v])) | (self.clauses[j] - set([-v]))
+                    if not any(-x in r for x in r):
+                        resolvents.add(r)
+            if (len(resolvents) > len(pos) + len(neg) or
+                any(len(r) > self.max_resolvent for r in resolvents)):
+                continue
+            self.stack.append(('elim', v, [self.clauses[i] for i in pos + neg]))
+            self.removed.add(v)
+            for i in pos + neg:
+                self.remove_clause(i)
+            for r in resolvents:
+                self.add_clause(r)
+            self.propagate_units()
+            changed = True
+        return changed
+
+    ## Driver
+
+    def run(self, units=True, equivalences=True, probing=True,
+            subsumption=True, elimination=True):
+        """Simplify until nothing changes (or max_rounds), and return the
+        remaining clauses as sorted lists of ints; [[]] if unsatisfiable."""
+        for round in range(self.max_rounds):
+            self.propagate_units()
+            changed = False
+            if equivalences and not self.unsat:
+                changed |= self.substitute_equivalences()
+                self.propagate_units()
+            if probing and not self.unsat:
+                changed |= self.probe_failed_literals()
+            if subsumption and not self.unsat:
+                changed |= self.subsume()
+                self.propagate_units()
+            if elimination and not self.unsat:
+                changed |= self.eliminate()
+            if self.unsat or not changed:
+                break
+        if self.unsat:
+            return [[]]
+        return [sorted(c, key=abs) for c in self.clauses if c is not None]
+
+    def extend(self, model):
+        """Extend a model of the simplified clauses (a list indexed by
+        variable) to a model of the original clauses."""
+        model = list(model) + [None] * (self.nvars + 1 - len(model))
+        model = [bool(value) for value in model]
+        model[0] = None
+        for v, value in self.fixed.items():
+            model[v] = value
+        true = lambda lit: model[abs(lit)] == (lit > 0)
+        for step in reversed(self.stack):
+            if step[0] == 'equiv':
+                v, target = step[1], step[2]
+                model[v] = true(target)
+            else:
+                v, clauses = step[1], step[2]
+                model[v] = any(not any(true(x) for x in c if x != v)
+                               for c in clauses if v in c)
+        return model
+
+def preprocess(db, frozen=()):
+    """Simplify the clauses of a ClauseDB.  Returns the Preprocessor (for
+    unsat and extend) and a new ClauseDB holding the simplified clauses
+    over the same variables, so a model of it can be decoded as usual."""
+    from spock.sat.clausedb import ClauseDB
+    pre = Preprocessor(db, db.nvars, frozen)
+    simplified = ClauseDB()
+    simplified.symbols, simplified.ids = list(db.symbols), dict(db.ids)
+    simplified.add_clauses(pre.run())
+    return pre, simplified
@@ -0,0 +1,87 @@
+""" spock.sat.stats
+
+    Opt-in statistics for the propositional engines:
+
+        >>> stats = SolverStats()
+        >>> dpll_satisfiable(sentence, stats=stats)
+        >>> stats
+        SolverStats(conflicts=812, decisions=1990, propagations=48210, ...,
+                    cnf=0.021s, search=0.533s)
+
+    The engines already keep their own counters (decisions, propagations,
+    conflicts and restarts in the CDCL solver, flips and restarts in
+    WalkSAT).  A SolverStats only reads them when asked to, so turning
+    stats on costs almost nothing and leaving them off costs one test per
+    conflict or flip.  A callback, if given, is called with the stats every
+    `every` events (conflicts or flips), for exporting progress while a
+    long search is still running.
+"""
+import time
+from contextlib import contextmanager
+
+class SolverStats(object):
+    """Counters and per-phase timings for one or more solver calls."""
+
+    counters = ('decisions', 'propagations', 'conflicts', 'flips',
+                'restarts', 'learned', 'deleted')
+
+    def __init__(self, callback=None, every=1000):
+        for name in self.counters:
+            setattr(self, name, 0)
+        self.times = {}         ## phase name -> seconds
+        self.callback = callback
+        self.every = every
+        self.pending = 0        ## events since the last callback
+        self._engine = None     ## the engine last read, and its counters
+        self._seen = {}
+
+    def update(self, engine):
+        "Add what engine's counters have done since they were last read."
+        if engine is not self._engine:
+            self._engine, self._seen = engine, {}
+        seen = self._seen
+        for name in self.counters:
+            value = getattr(engine, name, None)
+            if value is not None:
+                setattr(self, name,
+                        getattr(self, name) + value - seen.get(name, 0))
+                seen[name] = value
+
+    def tick(self, engine):
+        "Count an event, and every `every` of them call the callback."
+        self.pending += 1
+        if self.pending >= self.every:
+            self.pending = 0
+            self.update(engine)
+            if self.callback is not None:
+                self.callback(self)
+
+    @contextmanager
+    def phase(self, name):
+        "Time the body of a with statement as the named phase."
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.time() - start
+
+    def as_dict(self):
+        d = dict((name, getattr(self, name)) for name in self.counters)
+        d.update(('%s_seconds' % name, t) for name, t in self.times.items())
+        return d
+
+    def __repr__(self):
+        parts = ['%s=%d' % (name, getattr(self, name))
+                 for name in self.counters if getattr(self, name)]
+        parts += ['%s=%.3fs' % item for item in sorted(self.times.items())]
+        return 'SolverStats(%s)' % ', '.join(parts)
+
+@contextmanager
+def _untimed():
+    yield
+
+def phase(stats, name):
+    "stats.phase(name), or a context that does nothing if stats is None."
+    if stats is None:
+        return _untimed()
+    return stats.phase(name)
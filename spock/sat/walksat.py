@@ -0,0 +1,186 @@
+""" spock.sat.walksat
+
+    WalkSAT local search over integer-encoded clauses (see
+    spock.sat.clausedb).  Nothing is re-evaluated from scratch after a
+    flip: every clause keeps a count of its true literals, every variable
+    keeps its make count (unsatisfied clauses a flip would fix) and break
+    count (satisfied clauses a flip would break), and the unsatisfied
+    clauses are kept in a list with O(1) removal.  A flip only touches the
+    clauses the flipped variable occurs in.
+
+    Noise strategies:
+
+        'fixed'     a random walk step with probability p, as in the book
+        'adaptive'  Hoos' adaptive noise: p starts at 0, rises while the
+                    search stagnates and falls back when it improves
+
+    A budget (spock.budget.Budget) is charged one node per flip.
+"""
+import random
+
+class WalkSAT(object):
+    """The search state for one set of clauses (lists of DIMACS ints over
+    variables 1..nvars).  Call run() to search; assignment is then a list
+    of True/False indexed by variable (slot 0 is unused).
+    """
+
+    adaptive_theta = 1.0 / 6 ## stagnation window, as a fraction of clauses
+    adaptive_phi = 0.2
+
+    def __init__(self, clauses, nvars=None, rng=random, stats=None,
+                 budget=None):
+        self.clauses = [list(clause) for clause in clauses]
+        if nvars is None:
+            nvars = max([0] + [abs(lit) for clause in self.clauses
+                               for lit in clause])
+        self.nvars = nvars
+        self.rng = rng
+        occurs = self.occurs = [[] for code in range(2 * nvars + 2)]
+        for i, clause in enumerate(self.clauses):
+            for lit in clause:
+                occurs[2 * lit if lit > 0 else -2 * lit + 1].append(i)
+        self.flips = self.restarts = 0
+        self.stats = stats      ## a spock.sat.stats.SolverStats
+        self.budget = budget    ## a spock.budget.Budget
+
+    def randomize(self):
+        "Start again from a random assignment."
+        rng, clauses = self.rng, self.clauses
+        value = self.assignment = [None] + [rng.random() < 0.5
+                                            for v in range(self.nvars)]
+        self.numtrue = numtrue = [0] * len(clauses)
+        self.truesum = truesum = [0] * len(clauses)  ## sum of true variables
+        self.make = make = [0] * (self.nvars + 1)
+        self.breaks = breaks = [0] * (self.nvars + 1)
+        self.unsat, self.where = [], [None] * len(clauses)
+        for i, clause in enumerate(clauses):
+            for lit in clause:
+                v = abs(lit)
+                if value[v] == (lit > 0):
+                    numtrue[i] += 1
+                    truesum[i] += v
+            if numtrue[i] == 0:
+                self._add_unsat(i)
+                for lit in clause:
+                    make[abs(lit)] += 1
+            elif numtrue[i] == 1:
+                breaks[truesum[i]] += 1
+
+    def _add_unsat(self, i):
+        self.where[i] = len(self.unsat)
+        self.unsat.append(i)
+
+    def _remove_unsat(self, i):
+        unsat, where = self.unsat, self.where
+        last = unsat.pop()
+        if last != i:
+            unsat[where[i]] = last
+            where[last] = where[i]
+        where[i] = None
+
+    def flip(self, v):
+        "Flip variable v, updating the counts of the clauses it occurs in."
+        value, clauses = self.assignment, self.clauses
+        numtrue, truesum = self.numtrue, self.truesum
+        make, breaks = self.make, self.breaks
+        was_true = 2 * v if value[v] else 2 * v + 1
+        value[v] = not value[v]
+        self.flips += 1
+        for i in self.occurs[was_true]:
+            numtrue[i] -= 1
+            truesum[i] -= v
+            if numtrue[i] == 0:
+                self._add_unsat(i)
+                breaks[v] -= 1
+                for lit in clauses[i]:
+                    make[abs(lit)] += 1
+            elif numtrue[i] == 1:
+                breaks[truesum[i]] += 1
+        for i in self.occurs[was_true ^ 1]:
+            numtrue[i] += 1
+            truesum[i] += v
+            if numtrue[i] == 1:
+                self._remove_unsat(i)
+                breaks[v] += 1
+                for lit in clauses[i]:
+                    make[abs(lit)] -= 1
+            elif numtrue[i] == 2:
+                breaks[truesum[i] - v] -= 1
+
+    def pick(self, clause, p):
+        """The variable of clause to flip: one that breaks nothing if there
+        is one, a random one with probability p, and otherwise the one with
+        the best make - break score (ties broken at random)."""
+        rng, make, breaks = self.rng, self.make, self.breaks
+        candidates = [abs(lit) for lit in clause]
+        free = [v for v in candidates if breaks[v] == 0]
+        if free:
+            return rng.choice(free)
+        if rng.random() < p:
+            return rng.choice(candidates)
+        best, chosen = None, []
+        for v in candidates:
+            score = make[v] - breaks[v]
+            if best is None or score > best:
+                best, chosen = score, [v]
+            elif score == best:
+                chosen.append(v)
+        return rng.choice(chosen)
+
+    def run(self, p=0.5, max_flips=10000, max_tries=1, noise='fixed'):
+        """Search for a satisfying assignment, restarting from a new random
+        assignment up to max_tries times with max_flips flips each.
+        Returns the assignment, or None if none was found."""
+        if noise not in ('fixed', 'adaptive'):
+            raise ValueError("unknown WalkSAT noise strategy %r" % (noise,))
+        if [] in self.clauses:
+            return None
+        try:
+            return self._run(p, max_flips, max_tries, noise)
+        finally:
+            if self.stats is not None:
+                self.stats.update(self)
+
+    def _run(self, p, max_flips, max_tries, noise):
+        rng, clauses, stats = self.rng, self.clauses, self.stats
+        budget = self.budget
+        window = max(1, int(self.adaptive_theta * len(clauses)))
+        phi = self.adaptive_phi
+        for attempt in range(max_tries):
+            if attempt:
+                self.restarts += 1
+            self.randomize()
+            unsat = self.unsat
+            if noise == 'adaptive':
+                p = 0.0
+            ## the number of unsatisfied clauses when p last changed
+            last_count, last_change = len(unsat), 0
+            for step in range(max_flips):
+                if not unsat:
+                    return self.assignment
+                self.flip(self.pick(clauses[rng.choice(unsat)], p))
+                if stats is not None:
+                    stats.tick(self)
+                if budget is not None:
+                    budget.spend('nodes')
+                if noise == 'adaptive':
+                    if len(unsat) < last_count:
+                        p -= p * phi / 2
+                    elif step - last_change > window:
+                        p += (1 - p) * phi
+                    else:
+                        continue
+                    last_count, last_change = len(unsat), step
+            if not unsat:
+                return self.assignment
+        return None
+
+def walksat(clauses, p=0.5, max_flips=10000, max_tries=1, noise='fixed',
+            seed=None, stats=None, budget=None):
+    """Run WalkSAT on a ClauseDB (or a list of DIMACS-int clauses) and
+    return an assignment indexed by variable, or None.  stats is an
+    optional SolverStats, budget an optional Budget."""
+    rng = random if seed is None else random.Random(seed)
+    search = WalkSAT(clauses, getattr(clauses, 'nvars', None), rng, stats,
+                     budget)
+    return search.run(p, max_flips, max_tries, noise)
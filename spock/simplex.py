@@ -41,6 +41,11 @@ class Expression(Expr):
             from spock.aima.logic import WalkSAT
             return WalkSAT([self])
 
+    def models(self, limit=None, project=None):
+        """ every model, one at a time (see spock.sat.models.iter_models) """
+        from spock.sat.models import iter_models
+        return iter_models(self, limit, project)
+
     @property
     def simple(self):
         # TODO: use is_literal() instead?
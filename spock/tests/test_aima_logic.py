@@ -1,5 +1,6 @@
 """ spcok.tests.test_aima_logic
 """
+import random
 from unittest2 import TestCase
 
 from spock.aima.logic import dpll_satisfiable
@@ -7,8 +8,13 @@ from spock.aima.logic import (conjuncts, disjuncts, prop_symbols,
                               PropKB,to_cnf,expr,is_positive,literals,
                               tt_entails,tt_true,eliminate_implications,
                               move_not_inwards,distribute_and_over_or,
-                              is_literal, is_definite_clause,variables)
+                              is_literal, is_definite_clause,variables,
+                              Expr, interning, FrozenExpr, freeze,
+                              is_variable, unify, pl_true,
+                              compile_sentence, WalkSAT, is_tseitin_symbol,
+                              pl_resolution)
 from spock import symbol, predicate
+from spock.aima.logic import A, B, C
 _ = symbol
 
 class FailingTests(object):
@@ -57,6 +63,205 @@ class TestLogic(FailingTests, TestCase):
     def test_tt_true(self):
         self.assertTrue(tt_true(expr("(P >> Q) <=> (~P | Q)")),
                         True)
+        self.assertFalse(tt_true(expr("A & ~A")))
+        self.assertFalse(tt_true(expr("A | B")))
+
+    def test_tt_entails_methods(self):
+        chain = [Expr('S%d' % i) for i in range(16)]
+        kb = Expr('&', chain[0], *[a >> b for a, b in zip(chain, chain[1:])])
+        cases = [(kb, chain[-1], True), (kb, ~chain[-1], False),
+                 (expr('A ^ B'), expr('A | B'), True),
+                 (expr('A ^ B'), expr('A & B'), False)]
+        for method in ('auto', 'bitslice', 'sat', 'enumerate'):
+            for kb, alpha, answer in cases:
+                self.assertEqual(tt_entails(kb, alpha, method), answer)
+        self.assertRaises(ValueError, tt_entails, kb, kb, 'magic')
+        ## a model with no symbols is {}, which is still a model
+        for method in ('bitslice', 'sat', 'enumerate'):
+            self.assertEqual(tt_entails(expr('TRUE'), expr('FALSE'), method),
+                             False)
+            self.assertEqual(tt_entails(expr('TRUE'), expr('TRUE'), method),
+                             True)
+
+    def test_pl_resolution(self):
+        rng = random.Random(5)
+        symbols = [Expr('R%d' % i) for i in range(6)]
+        literal = lambda: rng.choice([lambda s: s, lambda s: ~s])(
+            rng.choice(symbols))
+        for trial in range(40):
+            kb = PropKB()
+            for i in range(rng.randint(1, 8)):
+                kb.tell(Expr('|', *[literal() for j in range(rng.randint(1, 3))]))
+            alpha = Expr('|', literal(), literal())
+            self.assertEqual(pl_resolution(kb, alpha),
+                             tt_entails(Expr('&', *kb._clauses), alpha))
+        ## an inconsistent KB entails anything
+        self.assertTrue(pl_resolution(PropKB(expr('A & ~A')), expr('B')))
+        self.assertTrue(pl_resolution(PropKB(expr('A & B')), expr('A | TRUE')))
+
+    def test_pl_resolution_chain(self):
+        chain = [Expr('S%d' % i) for i in range(200)]
+        kb = PropKB(Expr('&', chain[0],
+                         *[a >> b for a, b in zip(chain, chain[1:])]))
+        kb.tell(expr('Noise1 | Noise2') & expr('~Noise1 | Noise3'))
+        self.assertTrue(pl_resolution(kb, chain[-1]))
+        self.assertFalse(pl_resolution(kb, expr('Noise3')))
+
+    def test_negated_constants(self):
+        for cnf in ('distribute', 'tseitin'):
+            self.assertEqual(dpll_satisfiable(expr('A | ~TRUE'), cnf=cnf),
+                             {A: True})
+            self.assertFalse(dpll_satisfiable(expr('~TRUE'), cnf=cnf))
+            self.assertEqual(dpll_satisfiable(expr('~FALSE & A'), cnf=cnf),
+                             {A: True})
+        self.assertTrue(tt_entails(expr('A | ~A'), expr('TRUE'), 'sat'))
+        self.assertFalse(tt_entails(expr('A'), expr('~TRUE'), 'sat'))
+
+    def test_tseitin_names(self):
+        from spock.aima.logic import tseitin_cnf
+        s = expr('(A & B) | (C & D)')
+        self.assertEqual(tseitin_cnf(s), tseitin_cnf(expr('(A & B) | (C & D)')))
+        names = lambda e: set(sym for sym in prop_symbols(tseitin_cnf(e))
+                              if is_tseitin_symbol(sym))
+        self.assertEqual(len(names(s)), 2)
+        ## (A & B) is named the same wherever it appears; (C & E) is not (C & D)
+        other = names(expr('(A & B) | (C & E)'))
+        self.assertEqual(len(names(s) & other), 1)
+
+    def test_to_cnf_tseitin(self):
+        terms = [Expr('&', Expr('X%d' % i), Expr('Y%d' % i)) for i in range(20)]
+        sentence = Expr('|', *terms)
+        cnf = to_cnf(sentence, 'tseitin')
+        self.assertEqual(len(conjuncts(cnf)), 61)
+        self.assertEqual(cnf, to_cnf(sentence, 'tseitin'))
+        self.assertEqual(to_cnf(expr('A & (B | ~C)'), 'tseitin'),
+                         expr('A & (B | ~C)'))
+        self.assertRaises(ValueError, to_cnf, sentence, 'magic')
+        model = dpll_satisfiable(sentence & ~Expr('X0'), cnf='tseitin')
+        self.assertFalse([s for s in model if is_tseitin_symbol(s)])
+        self.assertTrue(pl_true(sentence, model))
+        self.assertFalse(dpll_satisfiable(expr('(A ^ B) & (A <=> B)'),
+                                          cnf='tseitin'))
+        model = WalkSAT([expr('(A & B) | (C & ~A)')], cnf='tseitin')
+        self.assertEqual(set(model), set([A, B, C]))
+
+    def test_propkb_tseitin(self):
+        kb = PropKB(cnf='tseitin')
+        kb.tell(expr('(A & B) | (C & D)'))
+        kb.tell(expr('~(B & C) & ~(D & A)'))
+        self.assertEqual(kb.ask(expr('(A & B) ^ (C & D)')), {})
+        self.assertEqual(kb.ask(expr('A')), False)
+        kb.retract(expr('~(B & C) & ~(D & A)'))
+        kb.retract(expr('(A & B) | (C & D)'))
+        self.assertEqual(kb._clauses, [])
+
+    def test_propkb_backbone(self):
+        D, E = expr('D'), expr('E')
+        kb = PropKB()
+        self.assertEqual(kb.backbone(), {})
+        kb.tell(expr('(A ==> B) & (B ==> C) & A & (D | E) & ~(F & G)'))
+        self.assertEqual(kb.backbone(), {A: True, B: True, C: True})
+        self.assertEqual(kb.backbone([A, D]), {A: True})
+        kb.tell(expr('~D'))
+        backbone = kb.backbone()
+        self.assertEqual(backbone, {A: True, B: True, C: True,
+                                    D: False, E: True})
+        self.assertTrue(kb.backbone() is not backbone)
+        kb.retract(expr('A'))
+        self.assertEqual(kb.backbone(), {D: False, E: True})
+        kb.tell(expr('~C & A'))
+        self.assertEqual(kb.backbone(), False)
+
+    def test_propkb_backbone_matches_entailment(self):
+        rng = random.Random(3)
+        symbols = [Expr('P%d' % i) for i in range(8)]
+        for trial in range(20):
+            kb = PropKB(cnf='tseitin')
+            for i in range(6):
+                a, b = rng.sample(symbols, 2)
+                kb.tell(expr('%s %s %s%s' % (a, rng.choice(['|', '==>', '<=>']),
+                                             rng.choice(['', '~']), b)))
+            backbone = kb.backbone()
+            if backbone is False:
+                continue
+            for sym in symbols:
+                for value, lit in ((True, sym), (False, Expr('~', sym))):
+                    entailed = kb.ask(lit) is not False
+                    self.assertEqual(backbone.get(sym) == value, entailed)
+
+    def test_pl_true(self):
+        self.assertEqual(pl_true(expr('P'), {}), None)
+        self.assertEqual(pl_true(expr('P | Q'), {_.P: True}), True)
+        self.assertEqual(pl_true(expr('P | ~P'), {}), None)
+        self.assertEqual(pl_true(expr('TRUE'), {}), True)
+        self.assertEqual(pl_true(expr('P ==> Q'), {_.P: False}), True)
+        self.assertEqual(pl_true(expr('P ==> Q'), {_.P: True}), None)
+        self.assertEqual(pl_true(expr('P & Q'), {'P': True, 'Q': True}), True)
+
+    def test_compile_sentence(self):
+        sentences = ['(A ==> B) & (C <=> ~A)', 'A =/= (B | F(x))',
+                     'A <== B | TRUE', '~(A & B & C) | FALSE']
+        values = [True, False, None]
+        for text in sentences:
+            sentence = expr(text)
+            compiled = compile_sentence(sentence)
+            for a in values:
+                for b in values:
+                    model = {_.A: a, _.B: b, _.C: not a, _.F(_.x): b}
+                    self.assertEqual(compiled(model), pl_true(sentence, model))
+                    row = [model[s] for s in compiled.symbols]
+                    self.assertEqual(compiled(row), pl_true(sentence, model))
+        self.assertTrue(compile_sentence(sentence) is compiled)
+
+    def test_dpll_satisfiable(self):
+        self.assertEqual(dpll_satisfiable(_.A & ~_.B), {_.A: True, _.B: False})
+        self.assertEqual(dpll_satisfiable(_.A & ~_.A), False)
+
+    def test_expr_precedence(self):
+        self.assertEqual(expr('P & Q ==> R & S'),
+                         (_.P & _.Q) >> (_.R & _.S))
+        self.assertEqual(expr('A ==> B ==> C'), _.A >> (_.B >> _.C))
+        self.assertEqual(expr('A | B <=> ~C & D'),
+                         (_.A | _.B) % (~_.C & _.D))
+        self.assertEqual(expr('P & Q | ~R(x, F(x))'),
+                         (_.P & _.Q) | ~_.R(_.x, _.F(_.x)))
+        self.assertEqual(expr('A =/= B <== C'), (_.A ^ _.B) << _.C)
+        self.assertEqual(expr('Q(1, 2.5)').args, [Expr(1), Expr(2.5)])
+
+    def test_expr_syntax_errors(self):
+        for text in ['P &', '(P', 'P Q', 'P $ Q', '1(x)', '__import__("os")']:
+            self.assertRaises(SyntaxError, expr, text)
+
+    def test_expr_cache(self):
+        text = 'Cached1 & ~Cached2'
+        misses = expr.cache.misses
+        first, second = expr(text), expr(text)
+        self.assertEqual(expr.cache.misses, misses + 1)
+        self.assertEqual(first, second)
+        self.assertFalse(first is second)
+        first.args.append(Expr('Cached3'))
+        first.args[0].op = 'Changed'
+        self.assertEqual(expr(text), _.Cached1 & ~_.Cached2)
+
+    def test_to_cnf_cache(self):
+        sentence = expr('(Cnf1 & Cnf2) | (Cnf3 & Cnf4)')
+        before = to_cnf.cache.info()
+        kb = PropKB()
+        for i in range(3):
+            kb.tell(sentence)
+            kb.retract(sentence)
+        after = to_cnf.cache.info()
+        self.assertEqual(after['misses'], before['misses'] + 1)
+        self.assertEqual(after['hits'], before['hits'] + 5)
+        self.assertTrue(to_cnf(sentence) is to_cnf(sentence))
+        self.assertFalse(to_cnf(sentence) is to_cnf(sentence, 'tseitin'))
+
+    def test_to_cnf_nested_disjunctions(self):
+        cnf = to_cnf(expr('A ^ B ^ C ^ D'))
+        for clause in conjuncts(cnf):
+            for lit in disjuncts(clause):
+                self.assertTrue(is_literal(lit))
+        self.assertEqual(tt_entails(cnf, expr('A ^ B ^ C ^ D')), True)
 
     def test_is_definite_clause(self):
         self.assertEqual(
@@ -186,3 +391,52 @@ False
 
 
 """
+
+class TestInterning(TestCase):
+    def test_equal_exprs_are_shared(self):
+        with interning():
+            self.assertTrue(expr('P & Q') is expr('P & Q'))
+            self.assertTrue((Expr('A') | Expr('B')) is expr('A | B'))
+            self.assertTrue(expr('F(x) | P').args[0] is expr('F(x)'))
+        self.assertFalse(expr('P & Q') is expr('P & Q'))
+
+    def test_equality_and_hash_are_structural(self):
+        plain = expr('(A | B) & ~C')
+        with interning():
+            shared = expr('(A | B) & ~C')
+            self.assertEqual(shared, plain)
+            self.assertEqual(hash(shared), hash(plain))
+            self.assertNotEqual(shared, expr('(A | B) & C'))
+            self.assertEqual(len(set([shared, expr('(A | B) & ~C')])), 1)
+            self.assertEqual(symbol.A, Expr('A'))
+
+class TestFrozenExpr(TestCase):
+    def setUp(self):
+        self.sentence = expr('(A | B) & ~F(x, C)')
+        self.frozen = freeze(self.sentence)
+
+    def test_equal_to_plain_expr(self):
+        self.assertEqual(self.frozen, self.sentence)
+        self.assertEqual(self.sentence, self.frozen)
+        self.assertEqual(hash(self.frozen), hash(self.sentence))
+        self.assertEqual(to_cnf(self.frozen), to_cnf(self.sentence))
+
+    def test_metadata(self):
+        negated = self.frozen.args[1]
+        self.assertEqual(self.frozen.arity, 2)
+        self.assertFalse(self.frozen.literal)
+        self.assertTrue(negated.literal)
+        self.assertTrue(is_variable(negated.args[0].args[0]))
+        self.assertEqual(self.frozen.symbols,
+                         frozenset(prop_symbols(self.sentence)))
+        self.assertTrue(negated.symbols is negated.args[0].symbols)
+
+    def test_immutable(self):
+        self.assertRaises(AttributeError, setattr, self.frozen, 'op', '|')
+        self.assertRaises(AttributeError, setattr, self.frozen, 'alfa', 1)
+        self.assertTrue(isinstance(self.frozen.args, tuple))
+        self.assertTrue(isinstance(self.frozen.args[0], FrozenExpr))
+
+    def test_unify(self):
+        self.assertEqual(unify(freeze('F(x, B)'), expr('F(A, y)'), {}),
+                         {_.x: _.A, _.y: _.B})
@@ -0,0 +1,113 @@
+""" spock.tests.test_budget
+"""
+import threading
+import time
+import unittest2 as unittest
+
+from spock.aima.logic import (expr, Expr, dpll_satisfiable, WalkSAT,
+                              tt_entails, fol_bc_ask, FolKB)
+from spock.aima.csp import backtracking_search, australia
+from spock.budget import Budget, BudgetExceeded
+from spock.sat import cdcl
+from spock.tests.test_constraints import Zebra
+
+def pigeonhole(pigeons, holes):
+    var = lambda i, j: i * holes + j + 1
+    clauses = [[var(i, j) for j in range(holes)] for i in range(pigeons)]
+    for j in range(holes):
+        for a in range(pigeons):
+            for b in range(a + 1, pigeons):
+                clauses.append([-var(a, j), -var(b, j)])
+    return clauses
+
+def sentence(clauses):
+    lit = lambda l: Expr('P%d' % l) if l > 0 else Expr('~', Expr('P%d' % -l))
+    return Expr('&', *[Expr('|', *map(lit, c)) for c in clauses])
+
+class BudgetTest(unittest.TestCase):
+
+    def test_conflicts(self):
+        budget = Budget(conflicts=50)
+        with self.assertRaises(BudgetExceeded) as caught:
+            dpll_satisfiable(sentence(pigeonhole(7, 6)), budget=budget)
+        e = caught.exception
+        self.assertEqual((e.resource, e.limit), ('conflicts', 50))
+        self.assertEqual(e.stats['conflicts'], 51)
+        self.assertTrue(e.stats['nodes'] > 0 and e.stats['inferences'] > 0)
+
+    def test_solver_survives(self):
+        solver = cdcl.Solver(pigeonhole(6, 5), budget=Budget(conflicts=10))
+        self.assertRaises(BudgetExceeded, solver.solve)
+        solver.budget = None
+        self.assertFalse(solver.solve())
+        solver = cdcl.Solver([[1, 2], [-1, 2]], budget=Budget(conflicts=10))
+        self.assertTrue(solver.solve())
+
+    def test_nodes(self):
+        unsat = sentence(pigeonhole(5, 4))
+        for run in [lambda b: dpll_satisfiable(unsat, solver='dpll', budget=b),
+                    lambda b: WalkSAT([unsat], max_flips=10 ** 6, budget=b),
+                    lambda b: tt_entails(unsat, expr('P1'), 'enumerate', b)]:
+            with self.assertRaises(BudgetExceeded) as caught:
+                run(Budget(nodes=100))
+            self.assertEqual(caught.exception.resource, 'nodes')
+        self.assertTrue(tt_entails(expr('A & B'), expr('A'), budget=Budget(nodes=4)))
+        self.assertRaises(BudgetExceeded, tt_entails, expr('A & B'), expr('A'),
+                          'bitslice', Budget(nodes=3))
+
+    def test_fol_bc_ask(self):
+        kb = FolKB(map(expr, ['Parent(p, c) ==> Child(c, p)',
+                              'Child(c, p) ==> Parent(p, c)']))
+        answers = fol_bc_ask(kb, [expr('Child(x, Mac)')], {},
+                             Budget(inferences=30))
+        with self.assertRaises(BudgetExceeded) as caught:
+            for answer in answers:
+                pass
+        self.assertEqual(caught.exception.resource, 'inferences')
+
+    def test_backtracking_search(self):
+        with self.assertRaises(BudgetExceeded) as caught:
+            backtracking_search(Zebra(), budget=Budget(nodes=20))
+        self.assertEqual(caught.exception.stats['nodes'], 21)
+        self.assertTrue(backtracking_search(australia, budget=Budget(nodes=20)))
+
+    def test_seconds_and_memory(self):
+        budget = Budget(seconds=0.2, check_every=10)
+        start = time.time()
+        with self.assertRaises(BudgetExceeded) as caught:
+            cdcl.solve(pigeonhole(9, 8), budget=budget)
+        self.assertEqual(caught.exception.resource, 'seconds')
+        self.assertTrue(time.time() - start < 2)
+        with self.assertRaises(BudgetExceeded) as caught:
+            cdcl.solve(pigeonhole(9, 8), budget=Budget(memory=1))
+        self.assertEqual(caught.exception.resource, 'memory')
+
+    def test_cube_and_conquer_time_limit(self):
+        start = time.time()
+        with self.assertRaises(BudgetExceeded) as caught:
+            dpll_satisfiable(sentence(pigeonhole(10, 9)), workers=2,
+                             budget=Budget(seconds=1))
+        self.assertEqual(caught.exception.resource, 'seconds')
+        self.assertTrue(time.time() - start < 5)
+
+    def test_cancel_from_another_thread(self):
+        budget = Budget(check_every=10)
+        timer = threading.Timer(0.2, budget.cancel)
+        timer.start()
+        try:
+            with self.assertRaises(BudgetExceeded) as caught:
+                cdcl.solve(pigeonhole(10, 9), budget=budget)
+        finally:
+            timer.cancel()
+        self.assertEqual(caught.exception.resource, 'cancelled')
+
+    def test_reset_clears_cancel(self):
+        budget = Budget(check_every=1)
+        budget.cancel()
+        self.assertRaises(BudgetExceeded, budget.check)
+        budget.reset()
+        budget.check()
+        self.assertTrue(cdcl.solve([[1, 2], [-1, 2], [-2, 3]], budget=budget))
+
+if __name__ == '__main__':
+    unittest.main()
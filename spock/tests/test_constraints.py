@@ -15,6 +15,20 @@ class TestConstraints(unittest.TestCase):
         self.assertRaises(BootOrderProblem.InconsistentConstraints,
                           BootOrderProblem({1:[2], 2:[1]}),)
 
+    def test_explain_boot_order_problem(self):
+        # 1 -> 2 -> 3 -> 1 is a cycle; 4 and 5 only depend on it.
+        problem = BootOrderProblem({1:[2], 2:[3], 3:[1, 4], 4:[], 5:[1]})
+        self.assertEqual(set(problem.explain()),
+                         set([(1, 2), (2, 3), (3, 1)]))
+        self.assertEqual(BootOrderProblem({1:[2], 2:[], 3:[3]}).explain(),
+                         None)
+        try:
+            BootOrderProblem({1:[2], 2:[1]})()
+        except BootOrderProblem.InconsistentConstraints, e:
+            self.assertEqual(set(e.core), set([(1, 2), (2, 1)]))
+        else:
+            self.fail("should have raised InconsistentConstraints")
+
 class TestAIMA(unittest.TestCase):
     ZEBRA_SOLUTION = {'Blue': 2, 'Chesterfields': 2, 'Coffee': 5,
                       'Dog': 4, 'Englishman': 3, 'Fox': 1,
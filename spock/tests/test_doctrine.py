@@ -43,6 +43,14 @@ class DoctrineTests(Common):
         names = set([z.op for z in all_solutions ])
         self.assertEqual(set('Pete Flopsie'.split()), names)
 
+    def test_unsat_core(self):
+        self.kb0.tell(is_rabbit(symbol.Flopsie))
+        self.assertEqual(self.kb0.unsat_core(), None)
+        core = self.kb0.unsat_core([~does_hate(Mac, Pete)])
+        self.assertEqual(set(map(str, core)),
+                         set(map(str, RABBIT_LOGIC)))
+        self.assertEqual(self.kb0.unsat_core([~is_wife(Pete, Mac)]), None)
+
 class TemporalDoctrineTests(Common):
     def setUp(self):
         super(TemporalDoctrineTests, self).setUp()
@@ -0,0 +1,69 @@
+""" spock.tests.test_sat_bitslice
+"""
+import itertools
+import unittest2 as unittest
+
+from spock.aima.logic import expr, Expr, pl_true
+from spock.sat import bitslice
+from spock.sat.bitslice import (evaluate_bitsets, evaluate_matrix,
+                                enumeration_bitsets, sample_model_count,
+                                pack_bits, unpack_bits, count_bits)
+
+A, B, C = Expr('A'), Expr('B'), Expr('C')
+SENTENCES = ['(A ==> B) & (C <=> ~A)', 'A =/= (B | C)', 'A <== B | TRUE',
+             '~(A & B & C) | FALSE']
+
+def all_models(symbols):
+    "Every assignment of True/False/None to symbols, as dicts."
+    for values in itertools.product([True, False, None], repeat=len(symbols)):
+        yield dict(zip(symbols, values))
+
+class BitsliceTests(unittest.TestCase):
+    def test_int_bitsets_agree_with_pl_true(self):
+        models = list(all_models([A, B, C]))
+        bitsets, known = {}, {}
+        for symbol in [A, B, C]:
+            bitsets[symbol] = sum([1 << m for m, model in enumerate(models)
+                                   if model[symbol]])
+            known[symbol] = sum([1 << m for m, model in enumerate(models)
+                                 if model[symbol] is not None])
+        for text in SENTENCES:
+            sentence = expr(text)
+            true, false = evaluate_bitsets(sentence, bitsets, len(models), known)
+            for m, model in enumerate(models):
+                value = None
+                if true >> m & 1: value = True
+                if false >> m & 1: value = False
+                self.assertEqual(value, pl_true(sentence, model))
+
+    def test_enumeration_bitsets(self):
+        self.assertEqual(enumeration_bitsets(2), [0b1010, 0b1100])
+        self.assertEqual(sample_model_count(expr('A | B')), 3.0)
+        self.assertEqual(sample_model_count(expr('A & ~A')), 0.0)
+        estimate = sample_model_count(
+            expr(' | '.join(['S%d' % i for i in range(20)])), seed=0)
+        self.assertTrue(abs(estimate - (2 ** 20 - 1)) < 2 ** 20 * 0.01)
+
+    @unittest.skipIf(bitslice.numpy is None, 'numpy is not installed')
+    def test_numpy_inputs(self):
+        numpy = bitslice.numpy
+        models = list(all_models([A, B, C]))
+        matrix = numpy.array([[bool(m[s]) for s in (A, B, C)] for m in models])
+        known = numpy.array([[m[s] is not None for s in (A, B, C)]
+                             for m in models])
+        for text in SENTENCES:
+            sentence = expr(text)
+            true, false = evaluate_matrix(sentence, matrix, [A, B, C], known)
+            expected = [pl_true(sentence, m) for m in models]
+            self.assertEqual(list(true), [v is True for v in expected])
+            self.assertEqual(list(false), [v is False for v in expected])
+            packed = dict([(s, pack_bits(matrix[:, j]))
+                           for j, s in enumerate([A, B, C])])
+            packed_known = dict([(s, pack_bits(known[:, j]))
+                                 for j, s in enumerate([A, B, C])])
+            true, false = evaluate_bitsets(sentence, packed, len(models),
+                                           packed_known)
+            self.assertEqual(list(unpack_bits(true, len(models))),
+                             [v is True for v in expected])
+            self.assertEqual(count_bits(false),
+                             len([v for v in expected if v is False]))
@@ -0,0 +1,111 @@
+""" spock.tests.test_sat_cdcl
+"""
+import itertools
+import random
+import unittest2 as unittest
+
+from spock.aima.logic import expr, dpll_satisfiable, pl_true
+from spock.sat.cdcl import Solver, luby, solve
+
+def brute_force(nvars, clauses):
+    for values in itertools.product([False, True], repeat=nvars):
+        if all(any(values[abs(lit) - 1] == (lit > 0) for lit in clause)
+               for clause in clauses):
+            return True
+    return False
+
+def pigeonhole(pigeons, holes):
+    var = lambda p, h: p * holes + h + 1
+    clauses = [[var(p, h) for h in range(holes)] for p in range(pigeons)]
+    for h in range(holes):
+        for p, q in itertools.combinations(range(pigeons), 2):
+            clauses.append([-var(p, h), -var(q, h)])
+    return clauses
+
+class CDCLTests(unittest.TestCase):
+    def test_luby(self):
+        self.assertEqual([luby(i) for i in range(15)],
+                         [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8])
+
+    def test_random_against_brute_force(self):
+        rng = random.Random(11)
+        for trial in range(200):
+            nvars = rng.randint(1, 8)
+            clauses = [[rng.choice([-1, 1]) * rng.randint(1, nvars)
+                        for k in range(rng.randint(1, 3))]
+                       for c in range(rng.randint(1, 40))]
+            solver = Solver(clauses)
+            result = solver.solve()
+            self.assertEqual(result, brute_force(nvars, clauses))
+            if result:
+                model = solver.model
+                for clause in clauses:
+                    self.assertTrue(any(model[abs(lit)] == (lit > 0)
+                                        for lit in clause))
+
+    def test_learning_and_deletion(self):
+        solver = Solver(pigeonhole(7, 6))
+        solver.min_learnts = 20
+        self.assertFalse(solver.solve())
+        self.assertTrue(solver.conflicts > 100)
+        self.assertTrue(len(solver.learnts) < solver.conflicts / 2)
+        self.assertTrue(solver.restarts > 0)
+        self.assertTrue(solve(pigeonhole(6, 6)))
+
+    def test_incremental_clauses(self):
+        solver = Solver([[1, 2], [-1, 2]])
+        self.assertTrue(solver.solve())
+        self.assertEqual(solver.model[2], True)
+        solver.add_clause([-2, 3])
+        self.assertTrue(solver.solve())
+        self.assertEqual(solver.model[3], True)
+        self.assertFalse(solver.add_clause([-3]))
+        self.assertFalse(solver.solve())
+
+    def test_assumptions(self):
+        solver = Solver([[-1, 2], [-2, 3], [-4, -3]])
+        self.assertTrue(solver.solve([1]))
+        self.assertEqual(solver.model[1:], [True, True, True, False])
+        self.assertFalse(solver.solve([5, 1, 4]))
+        self.assertEqual(sorted(solver.failed), [1, 4])
+        self.assertFalse(solver.solve([3, -3]))
+        self.assertEqual(sorted(solver.failed), [-3, 3])
+        self.assertTrue(solver.solve([4]))
+        self.assertTrue(solver.ok)
+
+    def test_push_pop(self):
+        solver = Solver([[1, 2]])
+        solver.reserve(3)
+        solver.push()
+        solver.add_clause([-1])
+        solver.push()
+        solver.add_clause([-2])
+        self.assertFalse(solver.solve())
+        self.assertEqual(solver.failed, [])
+        solver.pop()
+        self.assertTrue(solver.solve())
+        self.assertEqual(solver.model[1:3], [False, True])
+        solver.pop()
+        self.assertTrue(solver.solve([1, 3]))
+        self.assertEqual(solver.scopes, [])
+
+    def test_push_guards_do_not_alias(self):
+        solver = Solver([[1, 2]])
+        solver.push()
+        guard = solver.scopes[-1]
+        self.assertRaises(ValueError, solver.add_clause, [-1, guard])
+        self.assertRaises(ValueError, solver.solve, [-guard])
+        solver.pop()
+        self.assertRaises(ValueError, solver.add_clause, [guard])
+        solver.add_clause([guard + 1])
+        self.assertTrue(solver.solve([guard + 1]))
+
+    def test_dpll_satisfiable_dispatch(self):
+        sentence = expr('(A | B) & (~A | C) & (~B | C) & (~C | D)')
+        for solver in ('cdcl', 'dpll'):
+            model = dpll_satisfiable(sentence, solver=solver)
+            self.assertTrue(pl_true(sentence, model))
+            self.assertFalse(dpll_satisfiable(sentence & ~expr('D'),
+                                              solver=solver))
+        self.assertRaises(ValueError, dpll_satisfiable, sentence,
+                          solver='magic')
@@ -0,0 +1,45 @@
+""" spock.tests.test_sat_clausedb
+"""
+import unittest2 as unittest
+from spock.aima.logic import expr, Expr
+from spock.sat import ClauseDB
+
+class ClauseDBTests(unittest.TestCase):
+    def setUp(self):
+        self.db = ClauseDB([expr('A & (B | ~C)'), expr('C ==> F(x)')])
+
+    def test_encoding(self):
+        self.assertEqual(len(self.db), 3)
+        self.assertEqual(self.db.nvars, 4)
+        self.assertEqual([list(c) for c in self.db], [[1], [2, -3], [4, -3]])
+        self.assertEqual(self.db.symbols[4], expr('F(x)'))
+
+    def test_round_trip(self):
+        self.assertEqual(self.db.sentences(),
+                         [expr('A'), expr('B | ~C'), expr('F(x) | ~C')])
+        model = {Expr('A'): True, Expr('C'): False}
+        assignment = self.db.model_from_expr(model)
+        self.assertEqual(assignment, [None, True, None, False, None])
+        self.assertEqual(self.db.model_to_expr(assignment), model)
+
+    def test_evaluate(self):
+        assignment = [None, True, None, True, None]
+        self.assertEqual(self.db.evaluate(0, assignment), True)
+        self.assertEqual(self.db.evaluate(1, assignment), None)
+        assignment[2] = False
+        self.assertEqual(self.db.evaluate(1, assignment), False)
+
+    def test_trivial_clauses(self):
+        db = ClauseDB()
+        self.assertEqual(db.tell(expr('(P | ~P) & (Q | TRUE) & (R | FALSE)')),
+                         [0])
+        self.assertEqual(list(db.clause(0)), [db.var(Expr('R'))])
+        self.assertRaises(ValueError, db.add_expr, expr('P & Q'))
+
+    def test_negated_constants(self):
+        db = ClauseDB()
+        self.assertEqual(db.add_expr(expr('P | ~FALSE')), None)
+        i = db.add_expr(Expr('|', expr('P'), expr('~TRUE'),
+                             Expr('~', expr('~FALSE'))))
+        self.assertEqual(list(db.clause(i)), [db.var(Expr('P'))])
+        self.assertEqual(list(db.clause(db.add_expr(expr('~TRUE')))), [])
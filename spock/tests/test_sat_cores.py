@@ -0,0 +1,83 @@
+""" spock.tests.test_sat_cores
+"""
+import random
+import unittest2 as unittest
+
+from spock.aima.logic import expr, Expr, dpll_satisfiable, PropKB
+from spock.sat import CoreExtractor, unsat_core
+from spock.sat.cores import constants, ground
+
+def random_clauses(nvars, nclauses, seed):
+    rng = random.Random(seed)
+    symbols = [Expr('P%d' % i) for i in range(nvars)]
+    return [Expr('|', *[rng.choice([s, Expr('~', s)])
+                        for s in rng.sample(symbols, 2)])
+            for i in range(nclauses)]
+
+def satisfiable(sentences):
+    return bool(dpll_satisfiable(Expr('&', *sentences)))
+
+class CoresTest(unittest.TestCase):
+
+    def test_core_and_mus(self):
+        x = CoreExtractor()
+        for s in map(expr, ['A', 'A ==> B', 'C', '~B', 'B | C']):
+            x.add(s)
+        self.assertEqual(x.mus(), map(expr, ['A', 'A ==> B', '~B']))
+        self.assertFalse(expr('C') in x.core())
+
+    def test_consistent(self):
+        self.assertEqual(unsat_core(map(expr, ['A', 'A ==> B'])), None)
+        self.assertEqual(CoreExtractor().core(), None)
+
+    def test_hard_sentences(self):
+        soft = map(expr, ['A', 'B', 'C'])
+        self.assertEqual(unsat_core(soft, [expr('~A | ~C')]),
+                         map(expr, ['A', 'C']))
+        self.assertEqual(unsat_core(soft, [expr('FALSE')]), [])
+
+    def test_groups(self):
+        x = CoreExtractor()
+        x.add('first', map(expr, ['A', 'B']))
+        x.add('second', [expr('C')])
+        x.add('third', [expr('~A | ~C')])
+        self.assertEqual(x.mus(), ['first', 'second', 'third'])
+
+    def test_mus_is_minimal(self):
+        for seed in range(30):
+            clauses = random_clauses(6, 24, seed)
+            x = CoreExtractor()
+            for c in clauses:
+                x.add(c)
+            mus = x.mus()
+            if mus is None:
+                self.assertTrue(satisfiable(clauses))
+                continue
+            self.assertFalse(satisfiable(mus))
+            for c in mus:
+                self.assertTrue(satisfiable([d for d in mus if d is not c]))
+            self.assertTrue(x.calls <= len(mus) + len(clauses))
+
+    def test_propkb(self):
+        kb = PropKB()
+        self.assertEqual(kb.unsat_core(), None)
+        kb.tell(expr('A & D'))
+        kb.tell(expr('A ==> B'))
+        kb.tell(expr('C'))
+        kb.tell(expr('B ==> ~A'))
+        self.assertEqual(kb.unsat_core(),
+                         map(expr, ['A & D', 'A ==> B', 'B ==> ~A']))
+        kb.retract(expr('A ==> B'))
+        self.assertEqual(kb.unsat_core(), None)
+
+    def test_ground(self):
+        s = expr('Rabbit(r) & Farmer(f) ==> Hates(f, r)')
+        names = constants([s, expr('Farmer(Mac)'), expr('Rabbit(Pete)')])
+        self.assertEqual(names, set([expr('Mac'), expr('Pete')]))
+        instances = ground(s, names)
+        self.assertEqual(len(instances), 4)
+        self.assertTrue(expr('Rabbit(Pete) & Farmer(Mac) ==> Hates(Mac, Pete)')
+                        in instances)
+
+if __name__ == '__main__':
+    unittest.main()
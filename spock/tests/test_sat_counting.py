@@ -0,0 +1,77 @@
+""" spock.tests.test_sat_counting
+"""
+import itertools
+import random
+import unittest2 as unittest
+
+from spock.aima.logic import expr, PropKB, A, B, C
+from spock.sat.counting import ModelCounter, count_models
+
+def brute_force(clauses, nvars, weights={}):
+    total = 0
+    for values in itertools.product([False, True], repeat=nvars):
+        if all(any(values[abs(lit) - 1] == (lit > 0) for lit in clause)
+               for clause in clauses):
+            weight = 1
+            for v, value in enumerate(values):
+                weight *= weights.get(v + 1 if value else -v - 1, 1)
+            total += weight
+    return total
+
+class ModelCounterTests(unittest.TestCase):
+    def test_random_against_brute_force(self):
+        rng = random.Random(5)
+        for trial in range(300):
+            nvars = rng.randint(1, 9)
+            clauses = [[rng.choice([-1, 1]) * rng.randint(1, nvars)
+                        for j in range(rng.randint(1, 3))]
+                       for i in range(rng.randint(0, 25))]
+            self.assertEqual(ModelCounter().count(clauses, range(1, nvars + 1)),
+                             brute_force(clauses, nvars))
+
+    def test_weighted(self):
+        rng = random.Random(6)
+        for trial in range(100):
+            nvars = rng.randint(1, 7)
+            clauses = [[rng.choice([-1, 1]) * rng.randint(1, nvars)
+                        for j in range(rng.randint(1, 3))]
+                       for i in range(rng.randint(0, 12))]
+            weights = dict((lit, rng.randint(1, 5))
+                           for v in range(1, nvars + 1) for lit in (v, -v))
+            counter = ModelCounter(weights)
+            self.assertEqual(counter.count(clauses, range(1, nvars + 1)),
+                             brute_force(clauses, nvars, weights))
+
+    def test_component_cache(self):
+        ## 40 copies of the same structure over different variables
+        counter = ModelCounter()
+        clauses = []
+        for i in range(40):
+            x, y, z = 3 * i + 1, 3 * i + 2, 3 * i + 3
+            clauses.extend([[x, y], [-y, z]])
+        self.assertEqual(counter.count(clauses, range(1, 121)), 4 ** 40)
+
+    def test_sentences(self):
+        self.assertEqual(count_models(expr('A | B')), 3)
+        self.assertEqual(count_models(expr('A ^ B ^ C ^ D')), 8)
+        self.assertEqual(count_models(expr('A & ~A')), 0)
+        self.assertEqual(count_models(expr('A'), symbols=[B, C]), 4)
+        for cnf in ('tseitin', 'distribute'):
+            self.assertEqual(
+                count_models(expr('(A <=> ~B) & (C | D | E) & ~(A & E)'),
+                             cnf=cnf), 10)
+        weights = {A: 0.5, ~A: 0.5, B: 0.25, ~B: 0.75}
+        self.assertAlmostEqual(count_models(expr('A | B'), weights), 0.625)
+
+    def test_kb_with_hundreds_of_symbols(self):
+        kb = PropKB()
+        for i in range(150):
+            kb.tell(expr('(X%d | Y%d) & (Y%d ==> Z%d)' % (i, i, i, i)))
+        self.assertEqual(count_models(kb), 4 ** 150)
+        kb = PropKB()
+        for i in range(200):
+            kb.tell(expr('X%d ==> X%d' % (i, i + 1)))
+        self.assertEqual(count_models(kb), 202)
+
+if __name__ == '__main__':
+    unittest.main()
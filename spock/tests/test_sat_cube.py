@@ -0,0 +1,57 @@
+""" spock.tests.test_sat_cube
+"""
+import itertools
+import random
+import unittest2 as unittest
+
+from spock.aima.logic import expr, pl_true, dpll_satisfiable
+from spock.sat import cdcl
+from spock.sat.cube import Lookahead, solve, benchmark
+
+def random_3sat(nvars, nclauses, seed):
+    rng = random.Random(seed)
+    return [[rng.choice([-1, 1]) * v for v in rng.sample(range(1, nvars + 1), 3)]
+            for i in range(nclauses)]
+
+def satisfies(model, clauses):
+    return all(any(model[abs(lit)] == (lit > 0) for lit in clause)
+               for clause in clauses)
+
+class CubeTests(unittest.TestCase):
+    def test_cubes_cover_every_model(self):
+        clauses = random_3sat(10, 35, 0)
+        cubes = Lookahead(clauses, 10).cubes(3)
+        self.assertTrue(1 < len(cubes) <= 8)
+        for values in itertools.product([False, True], repeat=10):
+            model = (None,) + values
+            if satisfies(model, clauses):
+                covering = [cube for cube in cubes
+                            if all(model[abs(lit)] == (lit > 0) for lit in cube)]
+                self.assertEqual(len(covering), 1)
+
+    def test_agrees_with_sequential(self):
+        for seed in range(12):
+            clauses = random_3sat(30, 128, seed)
+            model = solve(clauses, workers=2)
+            self.assertEqual(model is False, cdcl.solve(clauses) is False)
+            if model is not False:
+                self.assertTrue(satisfies(model, clauses))
+
+    def test_trivial_cases(self):
+        self.assertEqual(solve([[1], [-1]], workers=2), False)
+        self.assertEqual(solve([[]], workers=2), False)
+        self.assertTrue(solve([[1, 2]], workers=2)[1:] != [False, False])
+
+    def test_dpll_satisfiable_workers(self):
+        s = expr('(A | B | C) & (~A | ~B) & (~B | ~C) & (~A | ~C) & (D ^ A)')
+        model = dpll_satisfiable(s, workers=2)
+        self.assertTrue(pl_true(s, model))
+        self.assertEqual(dpll_satisfiable(expr('A & ~A'), workers=2), False)
+
+    def test_benchmark(self):
+        results = benchmark(random_3sat(20, 80, 3), workers=(1, 2))
+        self.assertEqual([n for n, seconds, sat in results], [1, 2])
+        self.assertEqual(len(set(sat for n, seconds, sat in results)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
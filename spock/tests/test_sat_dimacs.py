@@ -0,0 +1,56 @@
+""" spock.tests.test_sat_dimacs
+"""
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+import unittest2 as unittest
+
+from spock.aima.logic import expr, Expr, PropKB
+from spock.sat import ClauseDB, read_dimacs, write_dimacs
+
+class DimacsTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_read(self):
+        text = ('c a comment\n'
+                'p cnf 3 3\n'
+                '1 -2 0\n'
+                '2 3\n'
+                ' -1 0 3 0\n'
+                '%\n'
+                '0\n')
+        db = read_dimacs(StringIO(text), chunk_size=2)
+        self.assertEqual([list(c) for c in db], [[1, -2], [2, 3, -1], [3]])
+        self.assertEqual(db.symbols[1:], [Expr('V1'), Expr('V2'), Expr('V3')])
+
+    def test_round_trip(self):
+        kb = PropKB(expr('(A | ~B) & (B | F(x)) & ~A'))
+        out = StringIO()
+        write_dimacs(kb, out)
+        self.assertEqual(out.getvalue(),
+                         'c var 1 A\nc var 2 B\nc var 3 F(x)\n'
+                         'p cnf 3 3\n1 -2 0\n2 3 0\n-1 0\n')
+        db = read_dimacs(StringIO(out.getvalue()))
+        self.assertEqual(db.sentences(), kb._clauses)
+
+    def test_read_into_existing_db(self):
+        db = ClauseDB([expr('C | B')])
+        read_dimacs(StringIO('c var 1 B\np cnf 2 1\n1 2 0\n'), db)
+        self.assertEqual(db.sentences(), [expr('C | B'), expr('B | V2')])
+
+    def test_gzip(self):
+        db = ClauseDB([expr('(A ==> B) & (B ==> C)')])
+        for name in ('kb.cnf.gz', 'kb.cnf'):
+            path = os.path.join(self.tmp, name)
+            write_dimacs(db, path)
+            self.assertEqual(read_dimacs(path).sentences(), db.sentences())
+        os.rename(os.path.join(self.tmp, 'kb.cnf.gz'),
+                  os.path.join(self.tmp, 'compressed'))
+        self.assertEqual(
+            read_dimacs(os.path.join(self.tmp, 'compressed')).sentences(),
+            db.sentences())
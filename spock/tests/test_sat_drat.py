@@ -0,0 +1,102 @@
+""" spock.tests.test_sat_drat
+"""
+import os
+import random
+import shutil
+import tempfile
+import StringIO
+import unittest2 as unittest
+
+from spock.aima.logic import expr, dpll_satisfiable
+from spock.sat import cdcl, ClauseDB
+from spock.sat.drat import DRATWriter, DRATChecker, check_drat, read_proof
+
+def random_3sat(nvars, nclauses, seed):
+    rng = random.Random(seed)
+    return [[rng.choice([-1, 1]) * v for v in rng.sample(range(1, nvars + 1), 3)]
+            for i in range(nclauses)]
+
+def pigeonhole(pigeons, holes):
+    var = lambda i, j: i * holes + j + 1
+    clauses = [[var(i, j) for j in range(holes)] for i in range(pigeons)]
+    for j in range(holes):
+        for a in range(pigeons):
+            for b in range(a + 1, pigeons):
+                clauses.append([-var(a, j), -var(b, j)])
+    return clauses
+
+def prove(clauses, binary=False):
+    out = StringIO.StringIO()
+    writer = DRATWriter(out, binary)
+    result = cdcl.Solver(clauses, proof=writer).solve()
+    writer.flush()
+    out.seek(0)
+    return result, out
+
+class DRATTests(unittest.TestCase):
+    def test_formats(self):
+        for binary in (False, True):
+            out = StringIO.StringIO()
+            writer = DRATWriter(out, binary)
+            writer.add([2, 5, 200])
+            writer.delete([2, 5, 200])
+            writer.add([])
+            writer.flush()
+            out.seek(0)
+            self.assertEqual(read_proof(out),
+                             [('a', (1, -2, 100)), ('d', (1, -2, 100)),
+                              ('a', ())])
+        self.assertEqual(out.getvalue()[:4], 'a\x02\x05\xc8')
+
+    def test_solver_proofs_check(self):
+        checked = 0
+        for seed in range(30):
+            clauses = random_3sat(30, 150, seed)
+            for binary in (False, True):
+                result, proof = prove(clauses, binary)
+                if result:
+                    continue
+                checked += 1
+                steps = read_proof(proof)
+                self.assertEqual(steps[-1], ('a', ()))
+                self.assertTrue(check_drat(clauses, steps))
+                self.assertTrue(check_drat(clauses, steps, backward=False))
+        self.assertTrue(checked > 10)
+
+    def test_core(self):
+        clauses = pigeonhole(5, 4) + [[21, 22], [-21, 22]]
+        result, proof = prove(clauses)
+        checker = DRATChecker(clauses)
+        self.assertTrue(checker.check(proof))
+        self.assertTrue(len(checker.core) <= len(clauses) - 2)
+
+    def test_rejects_bad_proofs(self):
+        clauses = pigeonhole(5, 4)
+        self.assertFalse(check_drat(clauses, [('a', ())]))
+        self.assertFalse(check_drat(clauses, [('a', (1,)), ('a', ())],
+                                    backward=False))
+        self.assertFalse(check_drat([[1, 2]], [('a', ())]))
+        self.assertTrue(check_drat([[1], [-1]], [('a', ())]))
+
+    def test_rat(self):
+        ## (x) is RAT on x for a formula where x only occurs positively
+        clauses = [[1, 2], [-2, 3], [-3, -2], [2, 4], [2, -4]]
+        self.assertTrue(check_drat(clauses, [('a', (5, 1)), ('a', (2,)),
+                                             ('a', ())], backward=False))
+
+    def test_dpll_satisfiable_proof(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, 'proof.drat')
+            s = expr('(A | B) & (A | ~B) & (~A | B) & (~A | ~B | C) & ~C')
+            self.assertEqual(dpll_satisfiable(s, proof=path), False)
+            db = ClauseDB()
+            db.tell(s)
+            self.assertTrue(check_drat(db, path))
+        finally:
+            shutil.rmtree(tmp)
+        self.assertRaises(ValueError, dpll_satisfiable, s, preprocess=True,
+                          proof=StringIO.StringIO())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+""" spock.tests.test_sat_incremental
+"""
+import unittest2 as unittest
+
+from spock.aima.logic import expr, Expr, PropKB
+from spock.sat import IncrementalSolver
+
+class IncrementalSolverTests(unittest.TestCase):
+    def setUp(self):
+        self.solver = IncrementalSolver([expr('A ==> B'), expr('B ==> C')])
+
+    def test_entails(self):
+        self.assertTrue(self.solver.entails(expr('A ==> C')))
+        self.assertFalse(self.solver.entails(expr('C ==> A')))
+        self.assertTrue(self.solver.entails(expr('(A & D) ==> (C & D)')))
+        self.assertFalse(self.solver.entails(expr('FALSE')))
+        self.assertTrue(self.solver.entails(expr('TRUE')))
+
+    def test_assumptions_and_failed(self):
+        model = self.solver.solve([expr('A'), expr('D | E')])
+        self.assertEqual((model[Expr('A')], model[Expr('C')]), (True, True))
+        self.assertFalse(self.solver.solve([expr('D'), expr('A'), expr('~C')]))
+        self.assertEqual(self.solver.failed, [expr('A'), expr('~C')])
+
+    def test_scopes_and_guards(self):
+        solver = self.solver
+        solver.push()
+        solver.tell(expr('A & ~C'))
+        self.assertFalse(solver.solve())
+        solver.pop()
+        guard = solver.new_guard()
+        solver.tell(expr('C ==> D'), guard)
+        self.assertFalse(solver.entails(expr('A ==> D')))
+        self.assertTrue(solver.entails(expr('A ==> D'), [guard]))
+        solver.release(guard)
+        self.assertFalse(solver.solve([expr('A'), expr('~D')], [guard]))
+        self.assertTrue(solver.solve([expr('A'), expr('~D')]))
+
+    def test_propkb_reuses_solver(self):
+        kb = PropKB(expr('A ==> B'))
+        self.assertEqual(kb.ask(expr('~B ==> ~A')), {})
+        solver = kb._solver
+        kb.tell(expr('B ==> C'))
+        self.assertEqual(kb.ask(expr('A ==> C')), {})
+        kb.retract(expr('B ==> C'))
+        self.assertEqual(kb.ask(expr('A ==> C')), False)
+        kb.tell(expr('B ==> C'))
+        self.assertEqual(kb.ask(expr('A ==> C')), {})
+        self.assertTrue(kb._solver is solver)
@@ -0,0 +1,77 @@
+""" spock.tests.test_sat_maxsat
+"""
+import itertools
+import random
+import unittest2 as unittest
+
+from spock.aima.logic import Expr, NaryExpr, expr, pl_true, A, B
+from spock.sat.maxsat import MaxSAT, maxsat
+
+def brute_force(hard, soft, symbols):
+    best = None
+    for values in itertools.product([False, True], repeat=len(symbols)):
+        model = dict(zip(symbols, values))
+        if all(pl_true(s, model) for s in hard):
+            cost = sum(w for s, w in soft if not pl_true(s, model))
+            if best is None or cost < best:
+                best = cost
+    return best
+
+class MaxSATTests(unittest.TestCase):
+    def test_small(self):
+        m = MaxSAT([expr('A ==> B')])
+        m.add_soft(expr('A'), 3)
+        m.add_soft(expr('~B'), 1)
+        model, cost = m.solve()
+        self.assertEqual(cost, 1)
+        self.assertEqual((model[A], model[B]), (True, True))
+
+    def test_random_against_brute_force(self):
+        rng = random.Random(2)
+        symbols = [Expr('S%d' % i) for i in range(6)]
+        def clause():
+            return NaryExpr('|', *[rng.choice(symbols) if rng.random() < 0.5
+                                   else ~rng.choice(symbols)
+                                   for i in range(rng.randint(1, 3))])
+        for trial in range(150):
+            hard = [clause() for i in range(rng.randint(0, 6))]
+            soft = [(clause(), rng.randint(1, 5))
+                    for i in range(rng.randint(0, 10))]
+            costs = []
+            model, cost = maxsat(hard, soft, lambda m, c: costs.append(c))
+            self.assertEqual(cost, brute_force(hard, soft, symbols))
+            if model is not False:
+                for sym in symbols:
+                    model.setdefault(sym, False)
+                self.assertTrue(all(pl_true(s, model) for s in hard))
+                self.assertEqual(costs, sorted(set(costs), reverse=True))
+                self.assertEqual(costs[-1], cost)
+
+    def test_unsatisfiable_hard(self):
+        self.assertEqual(maxsat([expr('A & ~A')], [(B, 1)]), (False, None))
+
+    def test_incremental(self):
+        m = MaxSAT([expr('A | B')], [(expr('~A'), 2), (expr('~B'), 1)])
+        self.assertEqual(m.solve()[1], 1)
+        m.add_soft(A, 5)
+        self.assertEqual(m.solve()[1], 2)
+        m.add_hard(expr('~A'))
+        self.assertEqual(m.solve()[1], 6)
+
+    def test_totalizer_is_reused(self):
+        m = MaxSAT([expr('A | B'), expr('B | C')],
+                   [(expr('~A'), 1), (expr('~B'), 2), (expr('~C'), 1)])
+        self.assertEqual(m.solve()[1], 2)
+        encoding, nvars = m.encoding, m.solver.db.nvars
+        self.assertEqual(m.solve()[1], 2)
+        self.assertEqual(m.encoding, encoding)
+        self.assertEqual(m.solver.db.nvars, nvars + 1)  ## the call's scope
+        m.add_soft(B, 4)
+        self.assertEqual(m.solve()[1], 3)
+        self.assertNotEqual(m.encoding, encoding)
+
+    def test_rejects_bad_weights(self):
+        self.assertRaises(ValueError, MaxSAT().add_soft, A, 0)
+
+if __name__ == '__main__':
+    unittest.main()
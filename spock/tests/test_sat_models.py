@@ -0,0 +1,60 @@
+""" spock.tests.test_sat_models
+"""
+import itertools
+import unittest2 as unittest
+
+from spock.aima.logic import expr, pl_true, prop_symbols
+from spock.sat.models import iter_models
+from spock import symbol
+
+def all_models(sentence, symbols):
+    models = []
+    for values in itertools.product([False, True], repeat=len(symbols)):
+        model = dict(zip(symbols, values))
+        if pl_true(sentence, model):
+            models.append(model)
+    return models
+
+def key(model):
+    return tuple(sorted((str(sym), value) for sym, value in model.items()))
+
+class IterModelsTests(unittest.TestCase):
+    sentences = ['A | B', '(A ==> B) & (B ==> C)', 'A ^ B ^ C ^ D',
+                 '(A <=> ~B) & (C | D | E) & ~(A & E)', 'A & ~A']
+
+    def test_every_model_once(self):
+        for text in self.sentences:
+            s = expr(text)
+            symbols = sorted(prop_symbols(s), key=str)
+            expected = sorted(map(key, all_models(s, symbols)))
+            for cnf in ('tseitin', 'distribute'):
+                found = map(key, iter_models(s, cnf=cnf))
+                self.assertEqual(sorted(found), expected)
+
+    def test_projection(self):
+        s = expr('(A | B) & (C ==> A)')
+        found = sorted(map(key, iter_models(s, project=[expr('A')])))
+        self.assertEqual(found, [(('A', False),), (('A', True),)])
+        ## a symbol the sentence never mentions takes both values
+        found = list(iter_models(expr('A'), project=[expr('A'), expr('Z')]))
+        self.assertEqual(len(found), 2)
+        self.assertEqual(list(iter_models(expr('A'), project=[])), [{}])
+
+    def test_lazy_and_limited(self):
+        s = expr(' & '.join('(X%d | X%d)' % (i, i + 1) for i in range(30)))
+        models = iter_models(s)
+        first = models.next()
+        self.assertTrue(pl_true(s, first))
+        self.assertEqual(len(list(iter_models(s, limit=5))), 5)
+
+    def test_list_of_sentences(self):
+        found = list(iter_models([expr('A | B'), expr('~A')]))
+        self.assertEqual(map(key, found), [(('A', False), ('B', True))])
+
+    def test_expression_models(self):
+        e = symbol.P | symbol.Q
+        self.assertEqual(len(list(e.models())), 3)
+        self.assertEqual(len(list(e.models(limit=2))), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+""" spock.tests.test_sat_portfolio
+"""
+import random
+import unittest2 as unittest
+
+from spock.aima.logic import expr, pl_true, dpll_satisfiable
+from spock.sat import cdcl
+from spock.sat.portfolio import Portfolio, portfolio_satisfiable, EngineError
+
+def random_3sat(nvars, nclauses, seed):
+    rng = random.Random(seed)
+    return [[rng.choice([-1, 1]) * v for v in rng.sample(range(1, nvars + 1), 3)]
+            for i in range(nclauses)]
+
+def satisfies(model, clauses):
+    return all(any(model[abs(lit)] == (lit > 0) for lit in clause)
+               for clause in clauses)
+
+class PortfolioTests(unittest.TestCase):
+    def test_agrees_with_cdcl(self):
+        portfolio = Portfolio(timeout=60)
+        for seed in range(6):
+            clauses = random_3sat(25, 110, seed)
+            model = portfolio.solve(clauses)
+            self.assertEqual(model is False, cdcl.solve(clauses) is False)
+            if model is not False:
+                self.assertTrue(satisfies(model, clauses))
+            self.assertEqual(len(portfolio.timings), len(portfolio.engines))
+            outcomes = [outcome for label, seconds, outcome in portfolio.timings]
+            self.assertTrue('sat' in outcomes or 'unsat' in outcomes)
+            self.assertTrue(portfolio.winner in portfolio.history)
+        self.assertEqual(sum(wins for wins, seconds
+                             in portfolio.history.values()), 6)
+
+    def test_timeout(self):
+        portfolio = Portfolio([('walksat', {'seed': 1})], timeout=0.5)
+        self.assertEqual(portfolio.solve([[1], [-1]]), None)
+        self.assertEqual(portfolio.timings[0][2], 'killed')
+
+    def test_unknown(self):
+        ## a WalkSAT that gives up says nothing definitive
+        portfolio = Portfolio([('walksat', {'max_tries': 1, 'max_flips': 10})])
+        self.assertEqual(portfolio.solve([[1], [-1]]), None)
+        self.assertEqual(portfolio.timings[0][2], 'unknown')
+
+    def test_engine_errors(self):
+        broken = ('walksat', {'noise': 'magic'})
+        with self.assertRaises(EngineError) as caught:
+            Portfolio([broken]).solve([[1, 2]])
+        self.assertEqual(caught.exception.errors[0][0], 'walksat noise=magic')
+        self.assertTrue('ValueError' in caught.exception.errors[0][1])
+        ## a crash does not hide another engine's answer
+        portfolio = Portfolio([broken, ('cdcl', {})])
+        self.assertEqual(portfolio.solve([[1], [-1]]), False)
+
+    def test_bad_engine(self):
+        self.assertRaises(ValueError, Portfolio, [('magic', {})])
+
+    def test_sentences(self):
+        s = expr('(A | B) & ~A')
+        self.assertTrue(pl_true(s, portfolio_satisfiable(s)))
+        self.assertEqual(portfolio_satisfiable(expr('A & ~A')), False)
+        self.assertTrue(pl_true(s, dpll_satisfiable(s, solver='portfolio')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+""" spock.tests.test_sat_preprocess
+"""
+import itertools
+import random
+import unittest2 as unittest
+
+from spock.aima.logic import (Expr, expr, pl_true, PropKB, dpll_satisfiable,
+                              pl_resolution, WalkSAT, tt_entails)
+from spock.sat.preprocess import Preprocessor
+
+def satisfies(model, clauses):
+    return all(any(model[abs(lit)] == (lit > 0) for lit in clause)
+               for clause in clauses)
+
+def brute_force(clauses, nvars):
+    for values in itertools.product([False, True], repeat=nvars):
+        model = [None] + list(values)
+        if satisfies(model, clauses):
+            return model
+    return None
+
+def random_cnf(rng, nvars, nclauses):
+    return [[rng.choice([-1, 1]) * rng.randint(1, nvars)
+             for j in range(rng.randint(1, 3))] for i in range(nclauses)]
+
+class PreprocessorTests(unittest.TestCase):
+    def test_cleanup(self):
+        pre = Preprocessor([[1, 2, 1], [2, 1], [1, -1, 3], [1, 2, 3]],
+                           frozen=[1, 2, 3])
+        self.assertEqual(pre.run(), [[1, 2]])
+
+    def test_equivalences(self):
+        ## 1 <=> 2, 2 <=> ~3
+        pre = Preprocessor([[-1, 2], [1, -2], [2, 3], [-2, -3], [1, 3, 4]],
+                           frozen=[1, 4])
+        self.assertEqual(pre.run(equivalences=True, probing=False,
+                                 subsumption=False, elimination=False), [])
+        self.assertEqual(sorted(v for kind, v, target in pre.stack
+                                if kind == 'equiv'), [2, 3])
+
+    def test_failed_literal(self):
+        ## 1 implies both 2 and ~2
+        pre = Preprocessor([[-1, 2], [-1, -2, 3], [-1, -3, -2], [1, 4, 5]],
+                           frozen=range(1, 6))
+        pre.run(subsumption=False, elimination=False)
+        self.assertEqual(pre.fixed.get(1), False)
+
+    def test_unsat(self):
+        pre = Preprocessor([[1, 2], [-1, 2], [1, -2], [-1, -2]])
+        self.assertEqual(pre.run(), [[]])
+        self.assertTrue(pre.unsat)
+
+    def test_random_against_brute_force(self):
+        rng = random.Random(7)
+        for trial in range(500):
+            nvars = rng.randint(1, 8)
+            clauses = random_cnf(rng, nvars, rng.randint(1, 35))
+            frozen = [v for v in range(1, nvars + 1) if rng.random() < 0.2]
+            pre = Preprocessor(clauses, nvars, frozen)
+            simplified = pre.run()
+            expected = brute_force(clauses, nvars)
+            if pre.unsat:
+                self.assertEqual(expected, None)
+                continue
+            model = brute_force(simplified, nvars)
+            self.assertEqual(model is None, expected is None)
+            if model is not None:
+                full = pre.extend(model)
+                self.assertTrue(satisfies(full, clauses))
+                for v in frozen:
+                    if v not in pre.fixed:
+                        self.assertEqual(full[v], model[v])
+
+class EngineTests(unittest.TestCase):
+    sentences = ['(A | B) & (~A | C) & (~C | D) & (B ==> D) & (E <=> ~D)',
+                 '(A <=> B) & (B <=> C) & (C ==> ~A) & (A | D)',
+                 '(A ^ B) & (B ^ C) & (A ^ C)',
+                 'A & (A ==> B) & (B ==> C) & ~C']
+
+    def test_dpll_satisfiable(self):
+        for text in self.sentences:
+            s = expr(text)
+            for cnf in ('distribute', 'tseitin'):
+                for solver in ('cdcl', 'dpll'):
+                    model = dpll_satisfiable(s, cnf, solver, preprocess=True)
+                    self.assertEqual(model is False,
+                                     dpll_satisfiable(s) is False)
+                    if model is not False:
+                        self.assertTrue(pl_true(s, model))
+
+    def test_walksat(self):
+        for text in self.sentences:
+            s = expr(text)
+            model = WalkSAT([s], max_tries=5, preprocess=True)
+            if dpll_satisfiable(s) is False:
+                self.assertEqual(model, None)
+            else:
+                self.assertTrue(pl_true(s, model))
+
+    def test_pl_resolution(self):
+        kb = PropKB()
+        for text in ['A ==> B', 'B ==> C', 'C | D', '~D | A']:
+            kb.tell(expr(text))
+        for query in ['A ==> C', 'C', 'A | D', 'D', '~A']:
+            q = expr(query)
+            self.assertEqual(pl_resolution(kb, q, preprocess=True),
+                             tt_entails(Expr('&', *kb._clauses),
+                                        q))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+""" spock.tests.test_sat_stats
+"""
+import random
+import unittest2 as unittest
+
+from spock.aima.logic import expr, dpll_satisfiable, WalkSAT
+from spock.sat import cdcl
+from spock.sat.stats import SolverStats, phase
+from spock.sat.walksat import walksat
+
+def pigeonhole(pigeons, holes):
+    var = lambda i, j: i * holes + j + 1
+    clauses = [[var(i, j) for j in range(holes)] for i in range(pigeons)]
+    for j in range(holes):
+        for a in range(pigeons):
+            for b in range(a + 1, pigeons):
+                clauses.append([-var(a, j), -var(b, j)])
+    return clauses
+
+def random_3sat(nvars, nclauses, seed):
+    rng = random.Random(seed)
+    return [[rng.choice([-1, 1]) * v for v in rng.sample(range(1, nvars + 1), 3)]
+            for i in range(nclauses)]
+
+class SolverStatsTest(unittest.TestCase):
+
+    def test_cdcl_counters(self):
+        stats = SolverStats()
+        solver = cdcl.Solver(pigeonhole(6, 5), stats=stats)
+        self.assertFalse(solver.solve())
+        self.assertEqual(stats.conflicts, solver.conflicts)
+        self.assertEqual(stats.decisions, solver.decisions)
+        self.assertEqual(stats.propagations, solver.propagations)
+        self.assertEqual(stats.learned, solver.learned)
+        self.assertTrue(stats.conflicts > 0 and stats.learned > 0)
+        self.assertEqual(stats.flips, 0)
+
+    def test_counters_accumulate(self):
+        stats = SolverStats()
+        self.assertFalse(cdcl.solve(pigeonhole(5, 4), stats=stats))
+        first = stats.conflicts
+        self.assertFalse(cdcl.solve(pigeonhole(5, 4), stats=stats))
+        self.assertEqual(stats.conflicts, 2 * first)
+
+    def test_callback_every_conflicts(self):
+        seen = []
+        stats = SolverStats(lambda s: seen.append(s.conflicts), every=10)
+        solver = cdcl.Solver(pigeonhole(6, 5), stats=stats)
+        solver.solve()
+        self.assertEqual(len(seen), solver.conflicts // 10)
+        self.assertEqual(seen, sorted(seen))
+
+    def test_walksat_flips(self):
+        seen = []
+        stats = SolverStats(lambda s: seen.append(s.flips), every=50)
+        model = walksat(random_3sat(50, 150, 1), max_flips=5000, max_tries=3,
+                        seed=1, stats=stats)
+        self.assertTrue(model)
+        self.assertTrue(stats.flips > 0)
+        self.assertEqual(len(seen), stats.flips // 50)
+
+    def test_phases(self):
+        stats = SolverStats()
+        s = expr('(A | B) & (~A | C) & (~B | C) & ~C')
+        self.assertFalse(dpll_satisfiable(s, stats=stats, preprocess=True))
+        self.assertEqual(set(stats.times), set(['cnf', 'preprocess']))
+        stats = SolverStats()
+        self.assertTrue(dpll_satisfiable(expr('(A | B) & ~A'), stats=stats))
+        self.assertEqual(set(stats.times), set(['cnf', 'search']))
+        self.assertTrue('search_seconds' in stats.as_dict())
+        stats = SolverStats()
+        self.assertTrue(WalkSAT([expr('A | B'), expr('~A')], stats=stats))
+        self.assertEqual(set(stats.times), set(['cnf', 'search']))
+
+    def test_no_stats(self):
+        with phase(None, 'search'):
+            pass
+        self.assertTrue(dpll_satisfiable(expr('A & B')))
+        self.assertTrue(cdcl.solve([[1, 2], [-1]]))
+
+if __name__ == '__main__':
+    unittest.main()
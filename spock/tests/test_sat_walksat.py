@@ -0,0 +1,56 @@
+""" spock.tests.test_sat_walksat
+"""
+import random
+import unittest2 as unittest
+
+from spock.aima.logic import expr, pl_true, WalkSAT as walk_sentences
+from spock.sat.walksat import WalkSAT, walksat
+
+def random_3sat(nvars, nclauses, seed):
+    rng = random.Random(seed)
+    clauses = []
+    while len(clauses) < nclauses:
+        vs = rng.sample(range(1, nvars + 1), 3)
+        clauses.append([rng.choice([-1, 1]) * v for v in vs])
+    return clauses
+
+class WalkSATSearchTests(unittest.TestCase):
+    def test_counts_stay_consistent(self):
+        clauses = random_3sat(30, 120, 1)
+        search = WalkSAT(clauses, rng=random.Random(2))
+        search.randomize()
+        rng = random.Random(3)
+        for flip in range(300):
+            search.flip(rng.randint(1, 30))
+        value = search.assignment
+        true_lits = [[lit for lit in clause if value[abs(lit)] == (lit > 0)]
+                     for clause in clauses]
+        self.assertEqual(search.numtrue, map(len, true_lits))
+        self.assertEqual(sorted(search.unsat),
+                         [i for i, lits in enumerate(true_lits) if not lits])
+        for v in range(1, 31):
+            breaks = len([lits for lits in true_lits if lits in ([v], [-v])])
+            make = len([i for i in search.unsat
+                        if v in map(abs, clauses[i])])
+            self.assertEqual((search.breaks[v], search.make[v]), (breaks, make))
+
+    def test_noise_strategies(self):
+        clauses = random_3sat(100, 350, 4)
+        for noise in ('fixed', 'adaptive'):
+            model = walksat(clauses, max_flips=20000, max_tries=3,
+                            noise=noise, seed=5)
+            self.assertTrue(model is not None)
+            for clause in clauses:
+                self.assertTrue(any(model[abs(lit)] == (lit > 0)
+                                    for lit in clause))
+        self.assertRaises(ValueError, walksat, clauses, noise='loud')
+        self.assertEqual(walksat([[1], [-1]], max_flips=100), None)
+        self.assertEqual(walksat([[1], []]), None)
+
+    def test_sentences(self):
+        sentences = [expr('(A & B) | C'), expr('C ==> ~A'), expr('D | ~D')]
+        model = walk_sentences(sentences, max_tries=5)
+        self.assertEqual(sorted(model, key=str), map(expr, 'ABCD'))
+        for sentence in sentences:
+            self.assertTrue(pl_true(sentence, model))
+        self.assertEqual(walk_sentences([expr('A & ~A')], max_flips=50), None)